@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, g
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.sql import text
@@ -11,16 +11,26 @@ import csv
 
 load_dotenv()
 
+from app.utils.replica import RoutingSession, init_replica
+
 app = Flask(__name__)
 app.config.from_object('config')
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
+init_replica(app, db)
 
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
 from app.utils import is_after_cutoff
+from app.utils.pools import current_pool_id, init_pool_routing
+from app.utils.audit_log import init_audit_log
+from app.utils.cache import init_cache
+
+init_pool_routing(app)
+init_audit_log(app, RoutingSession)
+init_cache(RoutingSession)
 
 @app.context_processor
 def context_processor():
@@ -40,18 +50,11 @@ def inject_globals():
     posthog_api_key = os.environ.get('POSTHOG_API_KEY')
     posthog_host = os.environ.get('POSTHOG_HOST', 'https://us.i.posthog.com')
 
-    pool_id = None
+    pool_id = current_pool_id()
     pool_name = None
-    pool_id_str = os.environ.get('POOL_ID')
-    if pool_id_str:
-        try:
-            pool_id = int(pool_id_str)
-            from app.models import Pool
-            pool = Pool.query.get(pool_id)
-            if pool:
-                pool_name = pool.name
-        except (ValueError, TypeError):
-            pass
+    if pool_id:
+        from app.routes import get_pool_name
+        pool_name = get_pool_name()
 
     return dict(
         measurement_id=os.environ.get('MEASUREMENT_ID'),
@@ -151,6 +154,8 @@ def update_team_names():
             db.session.add(team)
     
     db.session.commit()
+    from app.utils.teams import bump_teams_version
+    bump_teams_version()
 
 @click.command('update-team-names')
 @with_appcontext
@@ -246,5 +251,228 @@ def diagnose_expected_score_command():
 
 app.cli.add_command(diagnose_expected_score_command)
 
+@click.command('replay-tournament')
+@click.argument('replay_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--users', 'user_count', default=500, show_default=True, help='Synthetic brackets to create in the pool.')
+@click.option('--ignore-round-dates', is_flag=True, help='Accept events outside TOURNAMENT_ROUND_DATES (snapshots from another season).')
+@click.option('--seed', default=0, show_default=True, help='Random seed for synthetic brackets.')
+@click.confirmation_option(prompt='This resets games, team ESPN ids and replay users in the configured database. Continue?')
+@with_appcontext
+def replay_tournament_command(replay_dir, user_count, ignore_round_dates, seed):
+    """Replay recorded ESPN scoreboard snapshots through the score sync and report timings."""
+    from app.utils.replay import replay_tournament
+    report = replay_tournament(replay_dir, user_count=user_count, ignore_round_dates=ignore_round_dates, seed=seed)
+    click.echo(f"Loaded {report['slots']} team slots, {report['users']} synthetic brackets.")
+    click.echo(f"{'snapshot':<32} {'games':>5} {'sync ms':>9} {'queries':>8} {'recompute ms':>13}")
+    for s in report['syncs']:
+        click.echo(f"{s['snapshot']:<32} {s['games_updated']:>5} {s['latency_ms']:>9.1f} {s['queries']:>8} {s['recompute_ms']:>13.1f}")
+    total_ms = sum(s['latency_ms'] for s in report['syncs'])
+    total_queries = sum(s['queries'] for s in report['syncs'])
+    click.echo(f"Total: {len(report['syncs'])} syncs, {total_ms:.1f} ms, {total_queries} queries")
+    if not report['expected']:
+        click.echo('No games.csv expectations found; skipped winner verification.')
+    elif report['mismatches']:
+        for game_id, expected_id, actual_id in report['mismatches']:
+            click.echo(f"  Game {game_id}: expected team {expected_id}, got {actual_id}", err=True)
+        raise click.ClickException(f"{len(report['mismatches'])} of {report['expected']} winners did not match games.csv")
+    else:
+        click.echo(f"All {report['expected']} expected winners match.")
+
+app.cli.add_command(replay_tournament_command)
+
+@click.command('bench-cache')
+@click.option('--workers', default=4, show_default=True, help='Forked worker processes per backend.')
+@click.option('--hits', default=2000, show_default=True, help='Warm hits timed per worker.')
+@with_appcontext
+def bench_cache_command(workers, hits):
+    """Compare in-process and shared mmap cache backends: memory per worker and warm-hit latency."""
+    from app.utils.cache_benchmark import build_payload, run_cache_benchmark
+    payload, build_ms = build_payload(current_pool_id())
+    db.session.remove()
+    db.engine.dispose()  # Don't share pooled connections with forked workers
+    click.echo(f"Rebuild from database: {build_ms:.1f} ms")
+    click.echo(f"{'backend':<14} {'payload KiB':>11} {'RSS/worker KiB':>15} {'cold ms':>8} {'warm p50 us':>12} {'warm mean us':>13}")
+    for r in run_cache_benchmark(payload, workers=workers, hits=hits):
+        click.echo(f"{r['backend']:<14} {r['payload_bytes'] / 1024:>11.1f} {r['rss_delta_kib']:>15.1f} {r['cold_ms']:>8.2f} {r['warm_p50_us']:>12.2f} {r['warm_mean_us']:>13.2f}")
+
+app.cli.add_command(bench_cache_command)
+
+
+@click.command('reset-database-id')
+@with_appcontext
+def reset_database_id_command():
+    """Give the database a new id, retiring its shared cache files and bracket archives. Run after restoring a backup."""
+    from app.models import CacheGeneration
+    from app.utils.cache import DATABASE_ID, database_identity, new_database_id
+    row = db.session.get(CacheGeneration, DATABASE_ID)
+    if row is None:
+        row = CacheGeneration(name=DATABASE_ID)
+        db.session.add(row)
+    row.value = new_database_id()
+    db.session.commit()
+    g.pop('_cache_generations', None)
+    click.echo(f"Shared files now go under {database_identity()} in the cache directory.")
+
+app.cli.add_command(reset_database_id_command)
+
+
+@click.command('freeze-brackets')
+@click.option('--all-pools', is_flag=True, help='Freeze every pool, not just POOL_ID.')
+@with_appcontext
+def freeze_brackets_command(all_pools):
+    """Compile the pool's brackets into the memory-mapped archive workers read after the cutoff."""
+    from app.utils.bracket_archive import freeze_bracket_archive
+    from app.utils.pools import all_pool_ids
+    for pool_id in all_pool_ids() if all_pools else [current_pool_id()]:
+        archive = freeze_bracket_archive(pool_id)
+        valid = sum(archive.valid)
+        click.echo(f"Pool {pool_id}: froze {archive.user_count} brackets ({valid} valid) at picks generation {archive.generation}")
+
+app.cli.add_command(freeze_brackets_command)
+
+
+@click.command('backfill-brackets')
+@click.option('--batch-size', default=1000, show_default=True, help='Users packed per statement.')
+@click.option('--check', is_flag=True, help='Only report brackets whose packed row is missing or differs.')
+@with_appcontext
+def backfill_brackets_command(batch_size, check):
+    """Pack every user's pick rows into packed_bracket (run with BRACKET_STORAGE=dual before switching to packed)."""
+    from app.utils.bracket_store import backfill_packed_brackets, storage_mode
+    if not check and storage_mode() == 'rows':
+        click.echo("Warning: BRACKET_STORAGE is rows; saves made after the backfill won't reach packed_bracket.")
+    try:
+        processed, mismatched = backfill_packed_brackets(batch_size=batch_size, check=check)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if not check:
+        click.echo(f"Packed {processed} brackets.")
+    elif mismatched:
+        raise click.ClickException(f"{len(mismatched)} of {processed} packed brackets are missing or differ, e.g. users {mismatched[:10]}")
+    else:
+        click.echo(f"All {processed} packed brackets match the pick table.")
+
+app.cli.add_command(backfill_brackets_command)
+
+
+@click.command('archive-logs')
+@click.option('--months', type=int, default=None, help='Months kept in log_entry, the current one included (default LOG_RETENTION_MONTHS).')
+@click.option('--dry-run', is_flag=True, help='Only report the months that would be archived.')
+@with_appcontext
+def archive_logs_command(months, dry_run):
+    """Move log entries older than the retention window into compressed monthly archives."""
+    from app.utils.log_archive import archive_log_entries, retention_boundary
+    if months is not None and months < 1:
+        raise click.BadParameter('Keep at least the current month.', param_hint='--months')
+    archived = archive_log_entries(months=months, dry_run=dry_run)
+    for month, count in archived:
+        click.echo(f"{month:%Y-%m}: {count} entries{' to archive' if dry_run else ' archived'}")
+    click.echo(f"log_entry keeps entries from {retention_boundary(months):%Y-%m-%d} on.")
+
+app.cli.add_command(archive_logs_command)
+
+
+@click.command('rebuild-log-rollup')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Rebuild minutes from this UTC date on (default all).')
+@with_appcontext
+def rebuild_log_rollup_command(since):
+    """Recompute the analytics rollup from the log entries and archives. Run when the pool is quiet."""
+    from app.utils.log_rollup import rebuild_log_rollup
+    count = rebuild_log_rollup(since=since)
+    click.echo(f'Rolled up {count} log entries.')
+
+app.cli.add_command(rebuild_log_rollup_command)
+
+
+@click.command('set-pool-slug')
+@click.argument('pool_id', type=int)
+@click.argument('slug')
+@with_appcontext
+def set_pool_slug_command(pool_id, slug):
+    """Set the slug a pool is served under with subdomain or path POOL_ROUTING."""
+    from app.models import Pool
+    from app.utils.cache import bump_generation
+    from app.utils.pools import SLUG_PATTERN
+    slug = slug.lower()
+    if not SLUG_PATTERN.match(slug) or slug.isdigit():
+        raise click.BadParameter('Use lowercase letters, digits and hyphens, not only digits.', param_hint='SLUG')
+    pool = Pool.query.get(pool_id)
+    if pool is None:
+        raise click.BadParameter(f'No pool {pool_id}.', param_hint='POOL_ID')
+    if Pool.query.filter(Pool.slug == slug, Pool.id != pool_id).first():
+        raise click.BadParameter(f'Slug {slug} is taken.', param_hint='SLUG')
+    pool.slug = slug
+    bump_generation('pools')
+    click.echo(f"Pool {pool_id} ({pool.name}) is now served as {slug}")
+
+app.cli.add_command(set_pool_slug_command)
+
+
+@click.command('replica-status')
+@with_appcontext
+def replica_status_command():
+    """Show whether the read replica is configured and caught up with the primary."""
+    from app.utils.replica import replica_engine, replica_lag
+    engine = replica_engine()
+    if engine is None:
+        click.echo('No replica configured (set REPLICA_DATABASE_URL).')
+        return
+    lag = replica_lag(engine)
+    if lag:
+        behind = ', '.join(f'{name} by {count}' for name, count in sorted(lag.items()))
+        click.echo(f'Replica {engine.url.render_as_string()} is behind: {behind}. Replica views read from the primary.')
+    else:
+        click.echo(f'Replica {engine.url.render_as_string()} is current.')
+
+app.cli.add_command(replica_status_command)
+
+
+@click.command('bench-similarity')
+@click.option('--synthetic', default=0, help='Use this many random brackets instead of the pool.')
+@click.option('--clusters', default=5, show_default=True, help='Clusters to build.')
+@with_appcontext
+def bench_similarity_command(synthetic, clusters):
+    """Time the bracket similarity index: build, one row, all pairs and clustering."""
+    import time
+    from app.utils.bracket_archive import load_pool_picks
+    from app.utils.replay import synthetic_brackets
+    from app.utils.similarity import SimilarityIndex, load_game_points
+    picks_by_user = synthetic_brackets(synthetic) if synthetic else load_pool_picks(current_pool_id())
+    game_points = load_game_points()
+
+    start = time.perf_counter()
+    index = SimilarityIndex(picks_by_user, game_points)
+    click.echo(f"Index of {len(index)} brackets ({index.total_points} points, {index.lane_bytes}-byte lanes): {time.perf_counter() - start:.2f} s")
+    if not len(index):
+        return
+    user_id = index.user_ids[0]
+    start = time.perf_counter()
+    index.most_similar(index.picks(user_id), exclude=[user_id])
+    click.echo(f"Most similar to one bracket: {(time.perf_counter() - start) * 1000:.2f} ms")
+    start = time.perf_counter()
+    matrix = index.condensed_matrix()
+    pairs = len(index) * (len(index) - 1) // 2
+    click.echo(f"All {pairs} pairs: {time.perf_counter() - start:.2f} s, {len(matrix) * index.lane_bytes / 1e6:.1f} MB")
+    del matrix
+    start = time.perf_counter()
+    result = index.clusters(clusters)
+    click.echo(f"{len(result)} clusters: {time.perf_counter() - start:.2f} s, sizes {[len(c.member_ids) for c in result]}")
+
+app.cli.add_command(bench_similarity_command)
+
+
+@click.command('bench-indexes')
+@click.option('--users', default=20000, show_default=True, help='Synthetic users to seed (63 picks each).')
+@click.option('--log-entries', default=200000, show_default=True, help='Synthetic log entries to seed.')
+@click.option('--database-url', default=None, help='Empty scratch database to use instead of a temporary SQLite file.')
+@with_appcontext
+def bench_indexes_command(users, log_entries, database_url):
+    """EXPLAIN and time the hot queries in a scratch database without and with their indexes."""
+    from app.utils.index_benchmark import run_index_benchmark
+    if database_url and database_url == app.config['SQLALCHEMY_DATABASE_URI']:
+        raise click.UsageError("Refusing to seed the app's own database; pass an empty scratch database.")
+    run_index_benchmark(database_url, users=users, log_entries=log_entries, echo=click.echo)
+
+app.cli.add_command(bench_indexes_command)
+
 from app import posthog_client  # noqa: F401 - exported for routes
 from app import routes
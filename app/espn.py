@@ -6,6 +6,7 @@ import urllib.request
 from datetime import datetime
 from app import db
 from app.models import EspnTeam
+from app.utils.teams import bump_teams_version
 
 ESPN_TEAMS_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/mens-college-basketball/teams?limit=400"
 ESPN_SCOREBOARD_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/mens-college-basketball/scoreboard?seasontype=3&group=100&limit=100"
@@ -40,25 +41,62 @@ def fetch_espn_teams():
     return teams
 
 
+ESPN_TEAM_FIELDS = ("display_name", "short_display_name", "abbreviation")
+
+
+def upsert_espn_teams(rows):
+    """
+    Insert or update EspnTeam rows keyed by espn_id in a single INSERT ... ON CONFLICT statement
+    (on other dialects: one query for the existing rows, then ORM updates and adds).
+    rows: list of dicts with espn_id plus ESPN_TEAM_FIELDS. Does not commit.
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        existing = {
+            team.espn_id: team
+            for team in EspnTeam.query.filter(EspnTeam.espn_id.in_([row["espn_id"] for row in rows]))
+        }
+        for row in rows:
+            team = existing.get(row["espn_id"])
+            if team is None:
+                team = existing[row["espn_id"]] = EspnTeam(espn_id=row["espn_id"])
+                db.session.add(team)
+            for field in ESPN_TEAM_FIELDS:
+                setattr(team, field, row[field])
+        return
+    stmt = insert(EspnTeam.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["espn_id"],
+        set_={field: stmt.excluded[field] for field in ESPN_TEAM_FIELDS},
+    )
+    db.session.execute(stmt)
+
+
 def refresh_espn_teams():
     """
     Fetch teams from ESPN and upsert into EspnTeam table.
+    Loads existing rows in one query and writes only new or changed teams in one statement.
     """
     teams = fetch_espn_teams()
+    existing = {
+        row.espn_id: tuple(getattr(row, field) for field in ESPN_TEAM_FIELDS)
+        for row in db.session.query(EspnTeam.espn_id, *(getattr(EspnTeam, f) for f in ESPN_TEAM_FIELDS))
+    }
+    # Keyed by espn_id: ON CONFLICT cannot touch the same row twice in one statement
+    changed = {}
     for t in teams:
-        existing = EspnTeam.query.filter_by(espn_id=t["espn_id"]).first()
-        if existing:
-            existing.display_name = t["display_name"]
-            existing.short_display_name = t["short_display_name"]
-            existing.abbreviation = t["abbreviation"]
-        else:
-            db.session.add(EspnTeam(
-                espn_id=t["espn_id"],
-                display_name=t["display_name"],
-                short_display_name=t["short_display_name"],
-                abbreviation=t["abbreviation"],
-            ))
+        if existing.get(t["espn_id"]) != tuple(t[field] for field in ESPN_TEAM_FIELDS):
+            changed[t["espn_id"]] = t
+    upsert_espn_teams(list(changed.values()))
     db.session.commit()
+    if changed:
+        bump_teams_version()
     return len(teams)
 
 
@@ -85,15 +123,15 @@ def add_manual_espn_team(short_name, display_name=None, abbreviation=None):
     display_name = display_name or short_name
     abbrev = (abbreviation or (short_name[:4] if len(short_name) >= 4 else short_name)).upper()
     espn_id = _next_manual_espn_id()
-    et = EspnTeam(
-        espn_id=espn_id,
-        display_name=display_name,
-        short_display_name=short_name,
-        abbreviation=abbrev,
-    )
-    db.session.add(et)
+    upsert_espn_teams([{
+        "espn_id": espn_id,
+        "display_name": display_name,
+        "short_display_name": short_name,
+        "abbreviation": abbrev,
+    }])
     db.session.commit()
-    return et
+    bump_teams_version()
+    return EspnTeam.query.filter_by(espn_id=espn_id).first()
 
 
 def set_espn_id(short_name_or_placeholder_id, real_espn_id):
@@ -118,12 +156,15 @@ def set_espn_id(short_name_or_placeholder_id, real_espn_id):
     old_id = et.espn_id
     if old_id == real_espn_id:
         return et
-    for slot in Team.query.filter(Team.espn_team_id == old_id).all():
-        slot.espn_team_id = real_espn_id
-    for slot in Team.query.filter(Team.espn_play_in_team_2_id == old_id).all():
-        slot.espn_play_in_team_2_id = real_espn_id
+    Team.query.filter(Team.espn_team_id == old_id).update(
+        {Team.espn_team_id: real_espn_id}, synchronize_session=False
+    )
+    Team.query.filter(Team.espn_play_in_team_2_id == old_id).update(
+        {Team.espn_play_in_team_2_id: real_espn_id}, synchronize_session=False
+    )
     et.espn_id = real_espn_id
     db.session.commit()
+    bump_teams_version()
     return et
 
 
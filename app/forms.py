@@ -3,13 +3,11 @@ from wtforms import StringField, PasswordField, SubmitField, SelectField, Intege
 from wtforms.validators import DataRequired, Email, Length, NumberRange, EqualTo
 from app.models import Round, Team, Pick, User
 import pytz
-import os
 
 EMAIL = 'Email (used for login, shown to admins)'
 FULL_NAME = 'Full Name (shown to all users, please enter your real name, e.g. John Doe)'
 TIEBREAKER_1 = 'Tiebreaker 1: Winner\'s Score in Final'
 TIEBREAKER_2 = 'Tiebreaker 2: Loser\'s Score in Final'
-POOL_ID = int(os.getenv('POOL_ID'))
 
 class RegistrationForm(FlaskForm):
     email = StringField(EMAIL, validators=[DataRequired(), Email()])
@@ -127,7 +125,7 @@ class AdminStatusForm(FlaskForm):
     submit = SubmitField('Update Admin Status')
 
 class SortStandingsForm(FlaskForm):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, round_names, champion_names, **kwargs):
         super(SortStandingsForm, self).__init__(*args, **kwargs)
         self.sort_field.choices = [
             ('full_name', 'Name'),
@@ -135,10 +133,8 @@ class SortStandingsForm(FlaskForm):
             ('expected_score', 'Expected Score'),
             ('maxpossiblescore', 'Max Possible Score'),
             ('champion_team_name', 'Champion')
-        ] + [(f'r{round.id}score', f'{round.name}') for round in Round.query.order_by(Round.id).all()]
-
-        champion_teams = set(pick.team.get_display_name() for pick in Pick.query.filter_by(game_id=63).join(Team, Pick.team_id == Team.id).join(User, Pick.user_id == User.id).filter(User.pool_id == POOL_ID))
-        self.champion_filter.choices = [('Any', 'Any')] + [(team, team) for team in sorted(champion_teams)]
+        ] + [(f'r{round_id}score', name) for round_id, name in sorted(round_names.items())]
+        self.champion_filter.choices = [('Any', 'Any')] + [(team, team) for team in champion_names]
 
     sort_field = SelectField('Sort by')
     sort_order = SelectField('Order', choices=[('asc', 'Ascending'), ('desc', 'Descending')], default='asc')
@@ -11,6 +11,12 @@ class Pool(db.Model):
     name = db.Column(db.String(100), nullable=False)
     avg_o_rating = db.Column(db.Float, nullable=True)
     expected_standings_dirty = db.Column(db.Boolean, default=True, nullable=False)
+    pick_distribution_dirty = db.Column(db.Boolean, default=True, nullable=False)
+    slug = db.Column(db.String(50), nullable=True)  # Name in subdomain/path pool routing
+
+    __table_args__ = (
+        db.UniqueConstraint('slug', name='uq_pool_slug'),
+    )
 
     def __repr__(self):
         return f'<Pool {self.name}>'
@@ -36,6 +42,8 @@ class User(db.Model, UserMixin):
     is_verified = db.Column(db.Boolean, default=False, nullable=False)
     is_bracket_valid = db.Column(db.Boolean, default=False, nullable=False)
     last_bracket_save = db.Column(db.DateTime, nullable=True)
+    # Games (after round 1) breaking the bracket's rules; NULL until the next full validation
+    invalid_game_count = db.Column(db.Integer, nullable=True)
     expected_score = db.Column(db.Float, default=0.0, nullable=False)
     pool_id = db.Column(db.Integer, db.ForeignKey('pool.id'), nullable=True)
     reset_code = db.Column(db.String(120), nullable=True)
@@ -43,6 +51,15 @@ class User(db.Model, UserMixin):
 
     pool = db.relationship('Pool', backref='users')
 
+    __table_args__ = (
+        # Keyset pagination of pool members by (lower(full_name), id) for the users APIs
+        db.Index('ix_user_pool_id_lower_full_name_id', 'pool_id', db.func.lower(full_name), 'id'),
+        db.Index('ix_user_pool_id_is_bracket_valid', 'pool_id', 'is_bracket_valid'),
+        # Case-insensitive login and registration lookups
+        db.Index('ix_user_pool_id_lower_email', 'pool_id', db.func.lower(email)),
+        db.Index('ix_user_reset_code', 'reset_code'),
+    )
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -108,19 +125,11 @@ class Team(db.Model):
     region = db.relationship('Region', backref=db.backref('teams', lazy=True))
 
     def get_display_name(self, short=True):
-        """Display name for UI. short=True uses school name only (no mascot)."""
-        if self.espn_team_id and self.espn_play_in_team_2_id:
-            et1 = EspnTeam.query.filter_by(espn_id=self.espn_team_id).first()
-            et2 = EspnTeam.query.filter_by(espn_id=self.espn_play_in_team_2_id).first()
-            if et1 and et2:
-                n1 = et1.short_display_name if short else et1.display_name
-                n2 = et2.short_display_name if short else et2.display_name
-                return f"{n1} / {n2}"
-        if self.espn_team_id:
-            et = EspnTeam.query.filter_by(espn_id=self.espn_team_id).first()
-            if et:
-                return et.short_display_name if short else et.display_name
-        return self.name
+        """Display name for UI. short=True uses school name only (no mascot).
+        Resolved from the process-wide name cache in app.utils.teams."""
+        from app.utils.teams import team_display_name
+        name = team_display_name(self.id, short) if self.id is not None else None
+        return name if name is not None else self.name
 
     def __repr__(self):
         return f'<Team {self.name}>'
@@ -142,8 +151,42 @@ class LogEntry(db.Model):
 
     current_user = db.relationship('User')
 
+    __table_args__ = (
+        # Log viewer: newest first, optionally within one category
+        db.Index('ix_log_entry_timestamp', 'timestamp'),
+        db.Index('ix_log_entry_category_timestamp', 'category', 'timestamp'),
+    )
+
     def __repr__(self):
         return f'<LogEntry {self.timestamp} - {self.category}>'
+
+class LogCategory(db.Model):
+    """Every category ever logged, for the log viewer's filter (added by log_event)"""
+    name = db.Column(db.String(100), primary_key=True)
+
+    def __repr__(self):
+        return f'<LogCategory {self.name}>'
+
+class LogRollup(db.Model):
+    """Log entry count and user sketch per UTC minute and category, for analytics (see app/utils/log_rollup.py)"""
+    category = db.Column(db.String(100), primary_key=True)
+    minute = db.Column(db.DateTime, primary_key=True)
+    event_count = db.Column(db.Integer, nullable=False)
+    user_sketch = db.Column(db.LargeBinary, nullable=False)  # Serialized HyperLogLog
+
+    def __repr__(self):
+        return f'<LogRollup {self.minute} {self.category}>'
+
+class LogArchive(db.Model):
+    """One archived month of log entries as gzipped JSON lines (see app/utils/log_archive.py)"""
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    entry_count = db.Column(db.Integer, nullable=False)
+    categories = db.Column(db.Text, nullable=False)  # JSON list, for the log viewer's filter
+    data = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LogArchive {self.month} ({self.entry_count} entries)>'
     
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -160,6 +203,11 @@ class Game(db.Model):
     team2 = db.relationship('Team', foreign_keys=[team2_id])
     winning_team = db.relationship('Team', foreign_keys=[winning_team_id])
 
+    __table_args__ = (
+        # Feeder games of a game
+        db.Index('ix_game_winner_goes_to_game_id', 'winner_goes_to_game_id'),
+    )
+
     def __repr__(self):
         return f'<Game {self.id} - Round {self.round_id}>'
     
@@ -174,9 +222,24 @@ class Pick(db.Model):
     game = db.relationship('Game', backref='picks')
     team = db.relationship('Team', backref='picks')
 
+    __table_args__ = (
+        # One pick per user per game; also serves "this user's picks"
+        db.Index('uq_pick_user_id_game_id', 'user_id', 'game_id', unique=True),
+        # Who picked a team in a game (simulation, distribution)
+        db.Index('ix_pick_game_id_team_id', 'game_id', 'team_id'),
+    )
+
     def __repr__(self):
         return f'<Pick {self.id} - User {self.user_id}, Game {self.game_id}, Team {self.team_id}>'
 
+class PackedBracket(db.Model):
+    """A user's whole bracket in one row: team id per game as 63 uint16s (see app/utils/bracket_store.py)"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    picks = db.Column(db.LargeBinary(126), nullable=False)
+
+    def __repr__(self):
+        return f'<PackedBracket User {self.user_id}>'
+
 class Thread(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -197,6 +260,23 @@ class Post(db.Model):
 
     author = db.relationship('User')
 
+    __table_args__ = (
+        db.Index('ix_post_thread_id_created_at', 'thread_id', 'created_at'),
+    )
+
+class PickDistribution(db.Model):
+    """Materialized count of valid brackets picking team_id to win game_id (see app/utils/pick_distribution.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    pool_id = db.Column(db.Integer, db.ForeignKey('pool.id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    pct = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('pool_id', 'game_id', 'team_id', name='uq_pick_distribution_pool_game_team'),
+    )
+
 class PotentialWinner(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
@@ -222,3 +302,9 @@ class GameProbability(db.Model):
 
     game = db.relationship('Game', backref='probabilities')
     team = db.relationship('Team', backref='probabilities')
+
+
+class CacheGeneration(db.Model):
+    """Named counter bumped by writers so every worker invalidates caches built on it. See app.utils.cache."""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, default=0, nullable=False)
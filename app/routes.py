@@ -1,28 +1,35 @@
 """
 Routes module for March Madness pool application.
 
-This module manages all HTTP routes and includes several module-level caches:
-- _potential_winners_cache: Caches potential winners for games (cleared when winners update)
-- _pool_name_cache: Caches pool name (can be cleared if pool details change)
-- _winners_cache: Caches historical winners from CSV file
-- _rounds_cache: Caches round ID to name mapping
-- _regions_cache: Caches region ID to name mapping
-- _teams_cache: Caches all teams
-- _teams_dict_cache: Caches teams as {id: team} dictionary
-- _pool_users_cache: Caches users for form dropdowns (5 min TTL)
-
-Cache Management:
+This module manages all HTTP routes and includes several caches. Each is a
+GenerationCache (app/utils/cache.py) tied to a counter in the cache_generation table,
+so a clear_*() in one worker invalidates the cache in every worker:
+- _potential_winners_cache: Potential winners per game ('results', shared backend)
+- _pool_name_cache: Pool name per pool ('pool')
+- _winners_cache: Historical winners from CSV file ('winners')
+- _rounds_cache: Round ID to name mapping ('rounds')
+- _regions_cache: Region ID to name mapping ('regions')
+- _pool_users_cache: User emails for form dropdowns per pool ('users')
+- Team views and display names live in app/utils/teams.py ('teams', shared backend)
+- Standings snapshots live in app/utils/standings.py ('scores' + 'users' + 'teams', shared backend)
+
+The request's pool comes from current_pool_id() (app/utils/pools.py): POOL_ID, or the
+subdomain/path slug when one process serves every pool. 'pool', 'users', 'scores' and
+'picks' are pool-scoped generations, so clearing one pool's caches leaves the others'.
+
+Cache Management (each bumps its generation and commits):
 - clear_potential_winners_cache(): Call when game winners are set/changed
 - clear_pool_name_cache(): Call if pool name is updated
 - clear_winners_cache(): Call if winners.csv is updated
 - clear_rounds_cache(): Call when round names/points change
 - clear_regions_cache(): Call when region names change
 - clear_teams_cache(): Call when team names/seeds change
+- clear_pool_users_cache(): Call when users are added or deleted
 """
 
-from flask import render_template, redirect, url_for, flash, request, jsonify, Response
+from flask import render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context, abort
 from app import app, db, login_manager
-from app.models import User, Region, Team, Round, LogEntry, Game, Pick, Thread, Post, Pool, PotentialWinner, EspnTeam, EspnSyncLog, GameProbability
+from app.models import User, Region, Team, Round, LogEntry, Game, Thread, Post, Pool, PotentialWinner, EspnTeam, EspnSyncLog, GameProbability
 from flask_login import login_user, logout_user, login_required, current_user
 from app.forms import RegistrationForm, LoginForm, AdminPasswordResetForm, ManageRegionsForm, ManageTeamsForm, ManageRoundsForm, AdminStatusForm, EditProfileForm, SortStandingsForm, UserSelectionForm, AdminPasswordResetCodeForm, ResetPasswordRequestForm, ResetPasswordForm, RequestPasswordResetForm, ResetPasswordWithTokenForm, SuperAdminDeleteUserForm, SuperAdminAddUserForm, EditPoolForm, AnalyticsForm
 from functools import wraps
@@ -30,7 +37,7 @@ import os
 import csv
 import io
 import threading
-from sqlalchemy import text, func
+from sqlalchemy import text, func, tuple_
 from sqlalchemy.orm import joinedload
 import pytz
 from collections import defaultdict
@@ -38,18 +45,30 @@ from app.utils import is_after_cutoff, get_current_time, get_cutoff_time, TOURNA
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from app.espn import fetch_espn_scoreboard, parse_completed_events
+from app.utils.cache import GenerationCache, bump_generation
+from app.utils.audit_log import log_event, writer as audit_log_writer
+from app.utils.etag import state_etag
+from app.utils.bracket_archive import get_bracket_archive, load_pool_picks, load_user_picks
+from app.utils.bracket_bundle import bundle_users, get_bracket_bundle_json, user_picks_payload, user_standing
+from app.utils.bracket_fragments import render_bracket_grid, schedule_bracket_prerender
+from app.utils.bracket_save import get_bracket_topology, save_bracket, save_pick, submitted_picks
+from app.utils.bracket_store import delete_brackets, read_bracket, write_bracket
+from app.utils.exports import EXPORT_FORMATS, export_response
+from app.utils.log_archive import delete_archived_user_entries
+from app.utils.log_viewer import LogFilter, SYSTEM as LOG_SYSTEM_USER, EXPORT_FIELDS as LOG_EXPORT_FIELDS, export_row as export_log_row, iter_log_rows, log_categories, log_filter_users, log_page
+from app.utils.log_rollup import rollup_series
+from app.utils.pool_exports import EFFICIENCY_FIELDS, ODDS_FIELDS, PICK_FIELDS, STANDINGS_FIELDS, TEAM_FIELDS, efficiency_rows, odds_rows, pick_rows, standings_rows, team_rows
+from app.utils.pools import all_pool_ids, current_pool_id
+from app.utils.replica import pin_primary, replica_reads
+from app.utils.pick_distribution import get_pick_distribution, apply_pick_distribution_delta
+from app.utils.similarity import get_bracket_clusters, get_similarity_index, MAX_COMPARE_BRACKETS
+from app.utils.standings import get_standings_snapshot, bump_scores_version, encode_cursor, decode_cursor, SORT_FIELDS as STANDINGS_SORT_FIELDS
+from app.utils.teams import bump_teams_version, get_team_views, get_team_views_by_id
 from app.utils.email_service import send_password_reset_email, send_password_reset_confirmation_email
 from app import posthog_client
 load_dotenv()
 
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', '').strip()
-POOL_ID_STR = os.getenv('POOL_ID')
-if not POOL_ID_STR:
-    raise ValueError("POOL_ID environment variable must be set")
-try:
-    POOL_ID = int(POOL_ID_STR)
-except ValueError:
-    raise ValueError(f"POOL_ID must be an integer, got: {POOL_ID_STR}")
 
 CASUAL_DATETIME_FORMAT = '%b %d, %Y, %-I:%M %p '
 CHAMPIONSHIP_GAME_ID = 63
@@ -75,7 +94,7 @@ def super_admin_required(f):
 def pool_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or current_user.pool_id != POOL_ID:
+        if not current_user.is_authenticated or current_user.pool_id != current_pool_id():
             return redirect(url_for('logout'))
         return f(*args, **kwargs)
     return decorated_function
@@ -86,7 +105,11 @@ def page_not_found(e):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user = User.query.get(int(user_id))
+    # A login from another pool served by this process is not a login here
+    if user is not None and current_pool_id() is not None and user.pool_id != current_pool_id():
+        return None
+    return user
 
 @app.route('/')
 def index():
@@ -100,26 +123,19 @@ def index():
     else:
         return render_template('hero.html', logged_in=False, pool_name=pool_name)
 
-_pool_name_cache = None
+_pool_name_cache = GenerationCache('pool')
 
 def get_pool_name():
     """Get pool name with caching"""
-    global _pool_name_cache
-    if _pool_name_cache:
-        return _pool_name_cache
-
-    pool_name = 'Default Pool Name'
-    if POOL_ID:
-        pool = Pool.query.get(POOL_ID)
-        if pool:
-            pool_name = pool.name
-            _pool_name_cache = pool_name
-    return pool_name
+    pool_id = current_pool_id()
+    def build():
+        pool = Pool.query.get(pool_id) if pool_id else None
+        return pool.name if pool else 'Default Pool Name'
+    return _pool_name_cache.get(pool_id, build, pool_id=pool_id)
 
 def clear_pool_name_cache():
     """Clear pool name cache if pool details are updated"""
-    global _pool_name_cache
-    _pool_name_cache = None
+    bump_generation('pool')
 
 @app.route('/hero')
 def hero():
@@ -145,7 +161,7 @@ def register():
             time_zone=form.time_zone.data,
             tiebreaker_winner=form.tiebreaker_winner.data,
             tiebreaker_loser=form.tiebreaker_loser.data,
-            pool_id=POOL_ID
+            pool_id=current_pool_id()
         )
         new_user.set_password(form.password.data)
         # Automatically make user with ADMIN_EMAIL an admin (case-insensitive)
@@ -155,14 +171,14 @@ def register():
 
         db.session.add(new_user)
         
-        log_entry = LogEntry(category='Register', current_user_id=new_user.id, description=f"Name: {new_user.full_name}, Email: {new_user.email}")
-        db.session.add(log_entry)
+        log_event('Register', f"Name: {new_user.full_name}, Email: {new_user.email}", user_id=new_user.id)
+        bump_generation('users', commit=False)
         db.session.commit()
 
         posthog_client.capture(
             f'user_{new_user.id}',
             'user_registered',
-            {'pool_id': POOL_ID, 'time_zone': new_user.time_zone}
+            {'pool_id': current_pool_id(), 'time_zone': new_user.time_zone}
         )
         flash('Registration successful. Please log in.')
         return redirect(url_for('login'))
@@ -196,7 +212,7 @@ def get_user_from_form_email(form):
     """Get user from form email (case-insensitive) within the current pool"""
     return User.query.filter(
         func.lower(User.email) == func.lower(form.email.data), 
-        User.pool_id == POOL_ID
+        User.pool_id == current_pool_id()
     ).first()
 
 @app.route('/admin/reset_password', methods=['GET', 'POST'])
@@ -212,8 +228,12 @@ def admin_reset_password():
         if user:
             user.set_password(form.new_password.data)
             
-            log_entry = LogEntry(category='Reset Password', current_user_id=current_user.id, description=f"{current_user.full_name} reset password of {user.full_name}")
-            db.session.add(log_entry)
+            log_event(
+                'Reset Password',
+                f"{current_user.full_name} reset password of {user.full_name}",
+                user_id=current_user.id,
+                sync=True
+            )
             db.session.commit()
             
             flash('Password reset successfully.')
@@ -233,11 +253,11 @@ def admin_manage_regions():
         for i, region in enumerate(regions, 1):
             region_name = getattr(form, f'region_{i}').data
             region.name = region_name
-        log_entry = LogEntry(category='Manage Regions', current_user_id=current_user.id, description=f"{current_user.full_name} edited regions")
-        db.session.add(log_entry)
+        log_event('Manage Regions', f"{current_user.full_name} edited regions", user_id=current_user.id)
         db.session.commit()
         
         clear_regions_cache()  # Clear cache after updating regions
+        clear_teams_cache()  # Team views carry region names
         flash('Regions updated successfully.')
         return redirect(url_for('admin_manage_regions'))
 
@@ -274,8 +294,7 @@ def admin_manage_teams():
                 if espn_team:
                     team.name = espn_team.display_name
 
-        log_entry = LogEntry(category='Manage Teams', current_user_id=current_user.id, description=f"{current_user.full_name} edited teams")
-        db.session.add(log_entry)
+        log_event('Manage Teams', f"{current_user.full_name} edited teams", user_id=current_user.id)
         db.session.commit()
 
         clear_teams_cache()
@@ -287,30 +306,16 @@ def admin_manage_teams():
     selected_names_2 = {t.id: espn_by_id[t.espn_play_in_team_2_id].short_display_name if t.espn_play_in_team_2_id and t.espn_play_in_team_2_id in espn_by_id else '' for t in teams}
     return render_template('admin/manage_teams.html', form=form, teams=teams, espn_teams=espn_teams, selected_names=selected_names, selected_names_2=selected_names_2)
 
-@app.route('/admin/export_teams_csv')
+@app.route('/admin/export_teams_csv', defaults={'fmt': 'csv'})
+@app.route('/admin/export/teams.<fmt>')
 @login_required
 @pool_required
 @admin_required
-def admin_export_teams_csv():
-    teams = Team.query.options(joinedload(Team.region)).order_by(Team.region_id, Team.seed).all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['region_name', 'seed', 'name', 'espn_team_id', 'is_play_in_slot', 'espn_play_in_team_2_id'])
-    for team in teams:
-        writer.writerow([
-            team.region.name,
-            team.seed,
-            team.name,
-            team.espn_team_id or '',
-            '1' if team.is_play_in_slot else '0',
-            team.espn_play_in_team_2_id or '',
-        ])
-    csv_data = output.getvalue()
-    return Response(
-        csv_data,
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=teams.csv'}
-    )
+def admin_export_teams_csv(fmt):
+    """Teams in the import format, streamed as any of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    return export_response('teams', TEAM_FIELDS, team_rows(), fmt)
 
 
 @app.route('/admin/import_teams_csv', methods=['POST'])
@@ -352,9 +357,11 @@ def admin_import_teams_csv():
 
         db.session.commit()
         clear_teams_cache()
-        log_entry = LogEntry(category='Manage Teams', current_user_id=current_user.id,
-                             description=f"{current_user.full_name} imported teams CSV ({updated} updated, {skipped} skipped)")
-        db.session.add(log_entry)
+        log_event(
+            'Manage Teams',
+            f"{current_user.full_name} imported teams CSV ({updated} updated, {skipped} skipped)",
+            user_id=current_user.id
+        )
         db.session.commit()
         flash(f'Import complete: {updated} teams updated, {skipped} skipped (region or seed not found).', 'success')
     except Exception as e:
@@ -375,12 +382,11 @@ def admin_manage_rounds():
         for i, round_obj in enumerate(rounds, 1):
             round_points = getattr(form, f'round_{i}_points').data
             round_obj.points = round_points
-        log_entry = LogEntry(category='Manage Rounds', current_user_id=current_user.id, description=f"{current_user.full_name} edited round points")
-        db.session.add(log_entry)
+        log_event('Manage Rounds', f"{current_user.full_name} edited round points", user_id=current_user.id)
         db.session.commit()
 
         clear_rounds_cache()  # Clear cache after updating rounds
-        recalculate_standings()
+        recalculate_all_standings()
         flash('Rounds updated successfully.')
         return redirect(url_for('admin_manage_rounds'))
 
@@ -398,18 +404,22 @@ def super_admin_manage_admins():
         return redirect(url_for('index'))
 
     form = AdminStatusForm()
-    form.user_email.choices = [(user.id, user.email) for user in User.query.filter(User.is_super_admin.is_(False), User.pool_id == POOL_ID)]
+    form.user_email.choices = [(user.id, user.email) for user in User.query.filter(User.is_super_admin.is_(False), User.pool_id == current_pool_id())]
 
-    current_admins = User.query.filter_by(is_admin=True, pool_id=POOL_ID).all()
+    current_admins = User.query.filter_by(is_admin=True, pool_id=current_pool_id()).all()
 
     if request.method == 'POST':
         if form.validate_on_submit():
-            user = User.query.filter_by(id=form.user_email.data, pool_id=POOL_ID).first()
+            user = User.query.filter_by(id=form.user_email.data, pool_id=current_pool_id()).first()
             if user:
                 user.is_admin = form.is_admin.data
                 
-                log_entry = LogEntry(category='Manage Admins', current_user_id=current_user.id, description=f"{current_user.full_name} edited admin status of {user.full_name} to {user.is_admin}")
-                db.session.add(log_entry)
+                log_event(
+                    'Manage Admins',
+                    f"{current_user.full_name} edited admin status of {user.full_name} to {user.is_admin}",
+                    user_id=current_user.id,
+                    sync=True
+                )
                 db.session.commit()
                 
                 flash('Admin status updated successfully.')
@@ -424,7 +434,7 @@ def super_admin_edit_pool():
     if not current_user.is_super_admin:
         return redirect(url_for('index'))
 
-    pool = Pool.query.get_or_404(POOL_ID)
+    pool = Pool.query.get_or_404(current_pool_id())
     form = EditPoolForm()
     if request.method == 'GET':
         form.pool_name.data = pool.name
@@ -438,57 +448,109 @@ def super_admin_edit_pool():
 
     return render_template('super_admin/edit_pool.html', form=form)
 
-@app.route('/admin/view_logs', methods=['GET', 'POST'])
+@app.route('/admin/view_logs')
 @login_required
 @pool_required
 @admin_required
 def admin_view_logs():
     user_tz = pytz.timezone(current_user.time_zone)
+    log_filter, selected = _log_filter_args(user_tz)
+    entries, has_more = log_page(current_pool_id(), log_filter, _api_limit())
+    return render_template(
+        'admin/view_logs.html',
+        log_entries=[_log_api_row(row, user_tz) for row in entries],
+        next_cursor=_log_cursor(entries[-1]) if has_more else None,
+        users=log_filter_users(current_pool_id()),
+        categories=log_categories(),
+        query_args=selected,
+        **{f'selected_{name}': value for name, value in selected.items()},
+    )
 
-    users = User.query.filter(User.pool_id == POOL_ID).order_by(User.full_name).all()
-    categories = db.session.query(LogEntry.category).distinct().order_by(LogEntry.category).all()
-
-    selected_user = 'Any'
-    selected_category = 'Any'
-
-    limit_raw = request.form.get('limit') or request.args.get('limit', '50')
+@app.route('/admin/api/logs')
+@login_required
+@pool_required
+@admin_required
+def api_logs():
+    """
+    Keyset-paginated log entries, newest first. Query args: user (id or 'system'),
+    category, start_date, end_date (the admin's local days), limit and after (the next
+    cursor of a previous response).
+    """
+    user_tz = pytz.timezone(current_user.time_zone)
+    log_filter, _ = _log_filter_args(user_tz)
     try:
-        selected_limit = max(1, min(10000, int(limit_raw)))
-    except (TypeError, ValueError):
-        selected_limit = 50
-
-    if request.method == 'POST':
-        selected_user = request.form.get('user_full_name', 'Any')
-        selected_category = request.form.get('category', 'Any')
+        after = _api_cursor('after')
+        if after is not None:
+            after = (datetime.fromisoformat(after[0]), after[1])
+        entries, has_more = log_page(current_pool_id(), log_filter, _api_limit(), after=after)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({
+        'rows': [_log_api_row(row, user_tz) for row in entries],
+        'next': _log_cursor(entries[-1]) if has_more else None,
+    })
 
-        log_entries = LogEntry.query.outerjoin(User, LogEntry.current_user_id == User.id).filter(
-            (LogEntry.current_user_id.is_(None)) | (User.pool_id == POOL_ID)
-        )
-        if selected_user == 'System':
-            log_entries = log_entries.filter(LogEntry.current_user_id.is_(None))
-        elif selected_user != 'Any':
-            log_entries = log_entries.filter(User.full_name == selected_user)
-        if selected_category != 'Any':
-            log_entries = log_entries.filter(LogEntry.category == selected_category)
+@app.route('/admin/logs/export.<fmt>')
+@login_required
+@pool_required
+@admin_required
+def admin_export_logs(fmt):
+    """Every log entry matching the viewer's filters, oldest first, streamed as any of EXPORT_FORMATS."""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    log_filter, _ = _log_filter_args(pytz.timezone(current_user.time_zone))
+    rows = (export_log_row(row) for row in iter_log_rows(current_pool_id(), log_filter))
+    return export_response('log_entries', LOG_EXPORT_FIELDS, rows, fmt)
+
+def _log_filter_args(user_tz):
+    """(LogFilter, {name: raw value}) from the log viewer's query args."""
+    selected = {
+        'user': request.args.get('user', 'Any'),
+        'category': request.args.get('category', 'Any'),
+        'start_date': request.args.get('start_date', ''),
+        'end_date': request.args.get('end_date', ''),
+    }
+    if selected['user'] == LOG_SYSTEM_USER:
+        user = LOG_SYSTEM_USER
     else:
-        log_entries = LogEntry.query.outerjoin(User, LogEntry.current_user_id == User.id).filter(
-            (LogEntry.current_user_id.is_(None)) | (User.pool_id == POOL_ID)
-        )
-
-    log_entries = log_entries.order_by(LogEntry.timestamp.desc()).limit(selected_limit).all()
+        user = int(selected['user']) if selected['user'].isdigit() else None
+    # Dates are the admin's local days; the end date is inclusive
+    log_filter = LogFilter(
+        user,
+        None if selected['category'] == 'Any' else selected['category'],
+        local_date_to_utc(selected['start_date'], user_tz),
+        local_date_to_utc(selected['end_date'], user_tz, days=1),
+    )
+    return log_filter, selected
+
+def _log_cursor(row):
+    return encode_cursor(row.timestamp.isoformat(), row.id)
+
+def _log_api_row(row, user_tz):
+    localized_timestamp = pytz.utc.localize(row.timestamp).astimezone(user_tz)
+    return {
+        'id': row.id,
+        'timestamp': row.timestamp.isoformat(),
+        'formatted_timestamp': localized_timestamp.strftime('%Y-%m-%d, %I:%M:%S %p ') + localized_timestamp.tzname(),
+        'user_id': row.current_user_id,
+        'user_full_name': row.user_name or 'System',
+        'category': row.category,
+        'description': row.description,
+    }
 
-    for log in log_entries:
-        localized_timestamp = log.timestamp.replace(tzinfo=pytz.utc).astimezone(user_tz)
-        tz_abbr = localized_timestamp.tzname()  # Gets the time zone abbreviation
-        log.formatted_timestamp = localized_timestamp.strftime('%Y-%m-%d, %I:%M:%S %p ') + tz_abbr
-        log.user_full_name = log.current_user.full_name if log.current_user else "System"
-    return render_template('admin/view_logs.html', log_entries=log_entries, users=users, categories=categories, selected_user=selected_user, selected_category=selected_category, selected_limit=selected_limit)
+def local_date_to_utc(value, tz, days=0):
+    """Naive UTC datetime for the start of a YYYY-MM-DD day (plus days) in tz, or None if value isn't a date."""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+    return tz.localize(day + timedelta(days=days)).astimezone(pytz.utc).replace(tzinfo=None)
 
 @app.route('/user/<int:user_id>', methods=['GET', 'POST'])
 @login_required
 @pool_required
 def user_profile(user_id):
-    user = User.query.filter_by(id=user_id, pool_id=POOL_ID).first_or_404()
+    user = User.query.filter_by(id=user_id, pool_id=current_pool_id()).first_or_404()
     after_cutoff = is_after_cutoff()
 
     if user_id != current_user.id:
@@ -502,11 +564,14 @@ def user_profile(user_id):
         user.time_zone = form.time_zone.data
         user.tiebreaker_winner = form.tiebreaker_winner.data
         user.tiebreaker_loser = form.tiebreaker_loser.data
-        db.session.commit()
+        bump_generation('users')
         flash('Profile updated successfully.')
 
-        log_entry = LogEntry(category='Edit Profile', current_user_id=current_user.id, description=f"{current_user.email} set name to {user.full_name} and timezone to {user.time_zone}")
-        db.session.add(log_entry)
+        log_event(
+            'Edit Profile',
+            f"{current_user.email} set name to {user.full_name} and timezone to {user.time_zone}",
+            user_id=current_user.id
+        )
         db.session.commit()
 
         return redirect(url_for('user_profile', user_id=user_id))
@@ -523,15 +588,15 @@ def user_profile(user_id):
 @login_required
 @pool_required
 def users():
-    users = User.query.filter(User.pool_id == POOL_ID).order_by(User.full_name).all()
-    return render_template('users.html', users=users)
+    # Rows are fetched page by page from /api/users
+    return render_template('users.html')
 
 @app.route('/admin/verify_users', methods=['GET', 'POST'])
 @login_required
 @pool_required
 @admin_required
 def admin_verify_users():
-    query = User.query.filter(User.pool_id == POOL_ID)
+    query = User.query.filter(User.pool_id == current_pool_id())
     if request.args.get('show_valid_brackets') == '1':
         query = query.filter(User.is_bracket_valid.is_(True))
     users = query.order_by(User.full_name).all()
@@ -540,8 +605,7 @@ def admin_verify_users():
         for user in users:
             user.is_verified = request.form.get('verified_' + str(user.id)) == 'on'
         
-        log_entry = LogEntry(category='Verify Users', current_user_id=current_user.id, description=f"{current_user.email} verified some users")
-        db.session.add(log_entry)
+        log_event('Verify Users', f"{current_user.email} verified some users", user_id=current_user.id)
         db.session.commit()
         
         flash('User verifications updated successfully.')
@@ -561,8 +625,7 @@ def super_admin_reset_games():
         clear_potential_winners_cache()  # Clear cache after resetting games
         flash('Game table reset successfully.')
 
-        log_entry = LogEntry(category='Reset Games', current_user_id=current_user.id, description=f"{current_user.email} reset the games table")
-        db.session.add(log_entry)
+        log_event('Reset Games', f"{current_user.email} reset the games table", user_id=current_user.id, sync=True)
         db.session.commit()
 
         return redirect(url_for('admin_view_logs'))
@@ -625,6 +688,13 @@ def get_potential_picks(game_id, return_current_pick, games_dict, user_picks, ca
     cache[cache_key] = potential_picks
     return potential_picks
 
+def format_last_bracket_save(user):
+    """user.last_bracket_save in the user's time zone, as make_picks shows it."""
+    if not user.last_bracket_save:
+        return None
+    last_save_localized = user.last_bracket_save.replace(tzinfo=pytz.utc).astimezone(pytz.timezone(user.time_zone))
+    return last_save_localized.strftime('%Y-%m-%d, %I:%M:%S %p ') + last_save_localized.tzname()
+
 @app.route('/make_picks', methods=['GET', 'POST'])
 @login_required
 @pool_required
@@ -632,20 +702,32 @@ def make_picks():
     if is_after_cutoff():
         return redirect(url_for('standings'))
 
+    if request.method == 'POST' and request.form.get('action') == 'save_picks':
+        # Diff against the stored picks, write only the changes, validate and score in memory
+        user_id = current_user.id  # The commit expires current_user
+        try:
+            result = save_bracket(current_user._get_current_object(), request.form)
+        except ValueError as e:
+            flash(f'Your picks were not saved: {e}.', 'error')
+            return redirect(url_for('make_picks'))
+        posthog_client.capture(
+            f'user_{user_id}',
+            'bracket_saved',
+            {'is_valid': result.is_valid, 'games_picked': result.games_picked, 'champion_team_id': result.champion_team_id}
+        )
+        flash('Your picks have been saved.')
+        return redirect(url_for('make_picks'))
+
     # Optimized fetching with joinedload
-    games = Game.query.options(
-        joinedload(Game.round),
-        joinedload(Game.team1),
-        joinedload(Game.team2)
-    ).order_by(Game.id).all()
+    games = Game.query.options(joinedload(Game.round)).order_by(Game.id).all()
     
     teams = get_all_teams()
-    teams_dict = {team.id: team for team in teams}
+    teams_dict = get_teams_dict()
     rounds = rounds_dict()
     regions = regions_dict()
     
     # Pre-fetch user picks into a dictionary
-    user_picks = {pick.game_id: pick.team_id for pick in current_user.picks}
+    user_picks = read_bracket(current_user.id)
     games_dict = {game.id: game for game in games}
     
     # Internal cache for potential picks during this request
@@ -656,56 +738,14 @@ def make_picks():
     }
 
     is_bracket_valid = current_user.is_bracket_valid
-    user_tz = pytz.timezone(current_user.time_zone)
-    last_save_formatted = None
-    if current_user.last_bracket_save:
-        last_save_localized = current_user.last_bracket_save.replace(tzinfo=pytz.utc).astimezone(user_tz)
-        last_save_formatted = last_save_localized.strftime('%Y-%m-%d, %I:%M:%S %p ') + last_save_localized.tzname()
+    last_save_formatted = format_last_bracket_save(current_user)
 
     if request.method == 'POST':
         action = request.form.get('action')
-        if action == 'save_picks':
-            # Pre-fetch all user picks to avoid N+1 queries
-            existing_picks = {pick.game_id: pick for pick in Pick.query.filter_by(user_id=current_user.id).all()}
+        if action == 'clear_picks':
+            write_bracket(current_user.id, {}, user_picks)
             
-            for game in games:
-                selected_team_id = request.form.get(f'game{game.id}')
-                pick = existing_picks.get(game.id)
-                
-                if selected_team_id:
-                    selected_team_id = int(selected_team_id)
-                    add_or_update_pick(pick, selected_team_id, game.id)
-                else:
-                    later_round_pick_team_id = get_later_round_pick(game, request.form, games_dict)
-                    if later_round_pick_team_id and later_round_pick_team_id in potential_picks_map[game.id]:
-                        add_or_update_pick(pick, later_round_pick_team_id, game.id)
-                    else:
-                        # Delete existing pick if it exists
-                        if pick:
-                            db.session.delete(pick)
-
-            # Flush changes to the session so they are visible to set_is_bracket_valid's query
-            db.session.flush()
-
-            # Don't commit yet - update validity and standings first
-            set_is_bracket_valid(games_dict, commit=False)
-            recalculate_standings(current_user, commit=False)
-            db.session.commit()  # Single commit for all operations
-            games_picked = Pick.query.filter_by(user_id=current_user.id).count()
-            champ_pick = Pick.query.filter_by(user_id=current_user.id, game_id=CHAMPIONSHIP_GAME_ID).first()
-            posthog_client.capture(
-                f'user_{current_user.id}',
-                'bracket_saved',
-                {'is_valid': current_user.is_bracket_valid, 'games_picked': games_picked, 'champion_team_id': champ_pick.team_id if champ_pick else None}
-            )
-            flash('Your picks have been saved.')
-            return redirect(url_for('make_picks'))
-        elif action == 'clear_picks':
-            Pick.query.filter_by(user_id=current_user.id).delete()
-            db.session.flush() # Flush deletion before validation
-            
-            log_entry = LogEntry(category='Clear Picks', current_user_id=current_user.id, description=f"{current_user.email} cleared their picks")
-            db.session.add(log_entry)
+            log_event('Clear Picks', f"{current_user.email} cleared their picks", user_id=current_user.id)
             
             set_is_bracket_valid(games_dict, commit=False)
             recalculate_standings(current_user, commit=False)
@@ -714,7 +754,6 @@ def make_picks():
             return redirect(url_for('make_picks'))
         elif action == 'fill_in_better_seeds':
             auto_fill_bracket(games_dict, user_picks, commit=False)
-            db.session.flush() # Flush additions before validation
             
             set_is_bracket_valid(games_dict, commit=False)
             recalculate_standings(current_user, commit=False)
@@ -724,6 +763,44 @@ def make_picks():
 
     return render_template('make_picks.html', games=games, teams=teams, rounds=rounds, regions=regions, user_picks=user_picks, teams_dict=teams_dict, potential_picks_map=potential_picks_map, is_bracket_valid=is_bracket_valid, last_save=last_save_formatted, edit_target_user=None)
 
+@app.route('/api/picks/<int:game_id>', methods=['PATCH'])
+@login_required
+@pool_required
+def api_update_pick(game_id):
+    """
+    Autosave one pick: JSON {"team_id": <id or null>}. Clears the later-round picks the
+    change made impossible and returns them with the bracket's new validity.
+    """
+    if is_after_cutoff():
+        return jsonify({'error': 'Picks are locked after the cutoff'}), 403
+    if game_id not in get_bracket_topology().games:
+        abort(404)
+    # A JSON body can't be sent cross-site without a CORS preflight, which this app never grants
+    data = request.get_json(silent=True)
+    # Only an explicit null clears the pick; a body without team_id is an error
+    team_id = data['team_id'] if isinstance(data, dict) and 'team_id' in data else False
+    if team_id is not None and (type(team_id) is not int):
+        return jsonify({'error': 'Expected JSON {"team_id": <int or null>}'}), 400
+
+    user_id = current_user.id  # The commit expires current_user
+    try:
+        result = save_pick(current_user._get_current_object(), game_id, team_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    posthog_client.capture(
+        f'user_{user_id}',
+        'bracket_saved',
+        {'is_valid': result.is_valid, 'games_picked': result.games_picked, 'autosave': True}
+    )
+    return jsonify({
+        'game_id': game_id,
+        'team_id': result.team_id,
+        'cleared_game_ids': result.cleared_game_ids,
+        'is_bracket_valid': result.is_valid,
+        'invalid_game_count': result.invalid_game_count,
+        'last_save': format_last_bracket_save(current_user),
+    })
+
 
 @app.route('/admin/edit_bracket/<int:user_id>', methods=['GET', 'POST'])
 @login_required
@@ -735,20 +812,17 @@ def admin_edit_bracket(user_id):
         flash('Bracket editing is only available after the tournament cutoff.')
         return redirect(url_for('standings'))
 
-    target_user = User.query.filter_by(id=user_id, pool_id=POOL_ID).first_or_404()
+    pool_id = current_pool_id()
+    target_user = User.query.filter_by(id=user_id, pool_id=pool_id).first_or_404()
 
-    games = Game.query.options(
-        joinedload(Game.round),
-        joinedload(Game.team1),
-        joinedload(Game.team2)
-    ).order_by(Game.id).all()
+    games = Game.query.options(joinedload(Game.round)).order_by(Game.id).all()
 
     teams = get_all_teams()
-    teams_dict = {team.id: team for team in teams}
+    teams_dict = get_teams_dict()
     rounds = rounds_dict()
     regions = regions_dict()
 
-    user_picks = {pick.game_id: pick.team_id for pick in Pick.query.filter_by(user_id=target_user.id).all()}
+    user_picks = read_bracket(target_user.id)
     games_dict = {game.id: game for game in games}
 
     picks_cache = {}
@@ -758,84 +832,84 @@ def admin_edit_bracket(user_id):
     }
 
     is_bracket_valid = target_user.is_bracket_valid
-    user_tz = pytz.timezone(target_user.time_zone)
-    last_save_formatted = None
-    if target_user.last_bracket_save:
-        last_save_localized = target_user.last_bracket_save.replace(tzinfo=pytz.utc).astimezone(user_tz)
-        last_save_formatted = last_save_localized.strftime('%Y-%m-%d, %I:%M:%S %p ') + last_save_localized.tzname()
+    last_save_formatted = format_last_bracket_save(target_user)
 
     if request.method == 'POST':
         action = request.form.get('action')
-        if action == 'save_picks':
-            existing_picks = {pick.game_id: pick for pick in Pick.query.filter_by(user_id=target_user.id).all()}
+        # Admin edits update an up-to-date pick distribution in place instead of forcing a rebuild
+        pool = Pool.query.get(pool_id)
+        distribution_current = pool is not None and not pool.pick_distribution_dirty
 
-            for game in games:
-                selected_team_id = request.form.get(f'game{game.id}')
-                pick = existing_picks.get(game.id)
-
-                if selected_team_id:
-                    selected_team_id = int(selected_team_id)
-                    add_or_update_pick(pick, selected_team_id, game.id, user=target_user)
-                else:
-                    later_round_pick_team_id = get_later_round_pick(game, request.form, games_dict)
-                    if later_round_pick_team_id and later_round_pick_team_id in potential_picks_map[game.id]:
-                        add_or_update_pick(pick, later_round_pick_team_id, game.id, user=target_user)
-                    else:
-                        if pick:
-                            db.session.delete(pick)
+        def update_pick_distribution():
+            if distribution_current:
+                new_picks = read_bracket(target_user.id)
+                apply_pick_distribution_delta(pool_id, user_picks, new_picks, is_bracket_valid, target_user.is_bracket_valid)
 
-            db.session.flush()
+        if action == 'save_picks':
+            try:
+                new_picks = submitted_picks(get_bracket_topology(), request.form, user_picks)
+            except ValueError as e:
+                flash(f'Bracket not saved: {e}.', 'error')
+                return redirect(url_for('admin_edit_bracket', user_id=user_id))
+            write_bracket(target_user.id, new_picks, user_picks)
 
             set_is_bracket_valid(games_dict, commit=False, user=target_user, reason=f"Admin {current_user.email} edited bracket")
+            update_pick_distribution()
             recalculate_standings(user=target_user, commit=False)
             db.session.commit()
+            get_bracket_archive(pool_id)
 
-            calculate_expected_points(POOL_ID)
+            calculate_expected_points(pool_id)
 
-            db.session.add(LogEntry(
-                category='Admin Edit Bracket',
-                current_user_id=current_user.id,
-                description=f"{current_user.email} saved picks for {target_user.full_name} ({target_user.email})"
-            ))
+            log_event(
+                'Admin Edit Bracket',
+                f"{current_user.email} saved picks for {target_user.full_name} ({target_user.email})",
+                user_id=current_user.id,
+                sync=True
+            )
             db.session.commit()
 
             flash(f"Bracket saved for {target_user.full_name}. Scores recalculated.")
             return redirect(url_for('admin_edit_bracket', user_id=user_id))
 
         elif action == 'clear_picks':
-            Pick.query.filter_by(user_id=target_user.id).delete()
-            db.session.flush()
+            write_bracket(target_user.id, {}, user_picks)
 
-            db.session.add(LogEntry(
-                category='Admin Edit Bracket',
-                current_user_id=current_user.id,
-                description=f"{current_user.email} cleared all picks for {target_user.full_name} ({target_user.email})"
-            ))
+            log_event(
+                'Admin Edit Bracket',
+                f"{current_user.email} cleared all picks for {target_user.full_name} ({target_user.email})",
+                user_id=current_user.id,
+                sync=True
+            )
 
             set_is_bracket_valid(games_dict, commit=False, user=target_user, reason=f"Admin {current_user.email} cleared bracket")
+            update_pick_distribution()
             recalculate_standings(user=target_user, commit=False)
             db.session.commit()
+            get_bracket_archive(pool_id)
 
-            calculate_expected_points(POOL_ID)
+            calculate_expected_points(pool_id)
 
             flash(f"All picks cleared for {target_user.full_name}.")
             return redirect(url_for('admin_edit_bracket', user_id=user_id))
 
         elif action == 'fill_in_better_seeds':
-            auto_fill_bracket(games_dict, user_picks, commit=False, user=target_user, add_log=False)
-            db.session.flush()
+            auto_fill_bracket(games_dict, dict(user_picks), commit=False, user=target_user, add_log=False)
 
-            db.session.add(LogEntry(
-                category='Admin Edit Bracket',
-                current_user_id=current_user.id,
-                description=f"{current_user.email} used Fill In Better Seeds for {target_user.full_name} ({target_user.email})"
-            ))
+            log_event(
+                'Admin Edit Bracket',
+                f"{current_user.email} used Fill In Better Seeds for {target_user.full_name} ({target_user.email})",
+                user_id=current_user.id,
+                sync=True
+            )
 
             set_is_bracket_valid(games_dict, commit=False, user=target_user, reason=f"Admin {current_user.email} edited bracket")
+            update_pick_distribution()
             recalculate_standings(user=target_user, commit=False)
             db.session.commit()
+            get_bracket_archive(pool_id)
 
-            calculate_expected_points(POOL_ID)
+            calculate_expected_points(pool_id)
 
             flash(f"Fill In Better Seeds applied for {target_user.full_name}.")
             return redirect(url_for('admin_edit_bracket', user_id=user_id))
@@ -856,11 +930,12 @@ def admin_edit_bracket(user_id):
             target_user.tiebreaker_loser = loser
             db.session.commit()
 
-            db.session.add(LogEntry(
-                category='Admin Edit Bracket',
-                current_user_id=current_user.id,
-                description=f"{current_user.email} updated tiebreakers for {target_user.full_name} ({target_user.email}): winner={winner}, loser={loser}"
-            ))
+            log_event(
+                'Admin Edit Bracket',
+                f"{current_user.email} updated tiebreakers for {target_user.full_name} ({target_user.email}): winner={winner}, loser={loser}",
+                user_id=current_user.id,
+                sync=True
+            )
             db.session.commit()
 
             flash(f"Tiebreakers updated for {target_user.full_name}: {winner}-{loser}.")
@@ -881,48 +956,32 @@ def admin_edit_bracket(user_id):
     )
 
 
-def add_or_update_pick(pick, team_id, game_id, user=None):
-    """Add or update a user's pick for a game"""
-    if user is None:
-        user = current_user
-        
-    if pick:
-        pick.team_id = team_id
-    else:
-        pick = Pick(user_id=user.id, game_id=game_id, team_id=team_id)
-        db.session.add(pick)
-
-# Cache for get_potential_winners that gets cleared when winners are updated
-_potential_winners_cache = {}
+# Cache for get_potential_winners, tied to the 'results' generation
+_potential_winners_cache = GenerationCache('results', name='potential_winners', shared=True)
 
 def clear_potential_winners_cache():
     """Clear the cache when game winners are updated"""
-    global _potential_winners_cache
-    _potential_winners_cache = {}
+    bump_generation('results')
 
 def get_potential_winners(game):
     """
-    Get potential winners for a game, using a module-level cache.
+    Get potential winners for a game, using a shared-generation cache.
     Cache is cleared when game winners are updated via clear_potential_winners_cache()
     """
-    if game.id in _potential_winners_cache:
-        return _potential_winners_cache[game.id]
-    
-    if game.winning_team_id:
-        result = [game.winning_team_id]
-    elif game.round_id == 1:
-        result = [team_id for team_id in [game.team1_id, game.team2_id] if team_id]
-    else:
+    def build():
+        if game.winning_team_id:
+            return [game.winning_team_id]
+        if game.round_id == 1:
+            return [team_id for team_id in [game.team1_id, game.team2_id] if team_id]
         # Otherwise, find the two games that lead to this game
         previous_games = Game.query.filter_by(winner_goes_to_game_id=game.id).all()
         potential_winners = []
         # Recursively call this function on the previous games
         for prev_game in previous_games:
             potential_winners.extend(get_potential_winners(prev_game))
-        result = potential_winners
-    
-    _potential_winners_cache[game.id] = result
-    return result
+        return potential_winners
+
+    return _potential_winners_cache.get(game.id, build)
 
 def get_later_round_pick(game, form, games_dict):
     """Recursively find user's pick in later rounds for bracket auto-fill logic"""
@@ -938,6 +997,18 @@ def get_later_round_pick(game, form, games_dict):
 
     return None
 
+def log_bracket_validity(user, is_bracket_valid, first_invalid_game_id, reason=None):
+    """Record the 'Valid Bracket'/'Invalid Bracket' log entry written whenever a bracket is saved."""
+    if is_bracket_valid:
+        desc = reason if reason else f"{user.email} saved a valid bracket"
+        log_event('Valid Bracket', desc, user_id=user.id)
+        return
+    if reason:
+        desc = f"{reason} (failed at Game {first_invalid_game_id if first_invalid_game_id else 'unknown'})"
+    else:
+        desc = f"{user.email} saved an invalid bracket (failed at Game {first_invalid_game_id if first_invalid_game_id else 'unknown'})"
+    log_event('Invalid Bracket', desc, user_id=user.id)
+
 def set_is_bracket_valid(games_dict=None, commit=True, user=None, reason=None):
     """
     Validate a user's bracket and update is_bracket_valid flag.
@@ -955,50 +1026,42 @@ def set_is_bracket_valid(games_dict=None, commit=True, user=None, reason=None):
         games = list(games_dict.values())
         
     # Pre-fetch user picks from the database/session to avoid stale relationship issues
-    user_picks = {pick.game_id: pick.team_id for pick in Pick.query.filter_by(user_id=user.id).all()}
+    user_picks = read_bracket(user.id)
     
-    is_bracket_valid = True
-    first_invalid_game_id = None
+    # Count every invalid game: the per-pick endpoint keeps the count current incrementally
+    invalid_game_ids = []
     for game in games:
         if game.round_id == 1:
             continue
 
         user_pick_team_id = user_picks.get(game.id)
         if not user_pick_team_id:
-            is_bracket_valid = False
-            first_invalid_game_id = game.id
-            break
+            invalid_game_ids.append(game.id)
+            continue
 
         previous_games = [g for g in games_dict.values() if g.winner_goes_to_game_id == game.id]
         previous_picks_team_ids = [user_picks.get(prev_game.id) for prev_game in previous_games]
         
         if not all(previous_picks_team_ids) or user_pick_team_id not in previous_picks_team_ids:
-            is_bracket_valid = False
-            first_invalid_game_id = game.id
-            break
+            invalid_game_ids.append(game.id)
 
+    is_bracket_valid = not invalid_game_ids
+    first_invalid_game_id = min(invalid_game_ids) if invalid_game_ids else None
+    user.invalid_game_count = len(invalid_game_ids)
     user.is_bracket_valid = is_bracket_valid
     user.last_bracket_save = datetime.utcnow()
 
-    # Invalidate expected standings cache so we recalc when any bracket validity changes
+    # Invalidate expected standings and the pick distribution so they're recalculated
     if user.pool_id:
         pool = Pool.query.get(user.pool_id)
         if pool:
             pool.expected_standings_dirty = True
+            pool.pick_distribution_dirty = True
 
-    if is_bracket_valid:
-        desc = reason if reason else f"{user.email} saved a valid bracket"
-        log_entry = LogEntry(category='Valid Bracket', current_user_id=user.id, description=desc)
-    else:
-        if reason:
-            desc = f"{reason} (failed at Game {first_invalid_game_id if first_invalid_game_id else 'unknown'})"
-        else:
-            desc = f"{user.email} saved an invalid bracket (failed at Game {first_invalid_game_id if first_invalid_game_id else 'unknown'})"
-        log_entry = LogEntry(category='Invalid Bracket', current_user_id=user.id, description=desc)
-    
-    db.session.add(log_entry)
-    if commit:
-        db.session.commit()
+    log_bracket_validity(user, is_bracket_valid, first_invalid_game_id, reason)
+    # Validity and champion pick may have changed
+    bump_generation('picks', commit=False, pool_id=user.pool_id)
+    bump_scores_version(commit=commit, pool_id=user.pool_id)
 
 def auto_fill_bracket(games_dict=None, user_picks=None, commit=True, user=None, add_log=True):
     """
@@ -1017,7 +1080,8 @@ def auto_fill_bracket(games_dict=None, user_picks=None, commit=True, user=None,
         games = list(games_dict.values())
         
     if user_picks is None:
-        user_picks = {pick.game_id: pick.team_id for pick in Pick.query.filter_by(user_id=user.id).all()}
+        user_picks = read_bracket(user.id)
+    stored_picks = dict(user_picks)
     
     teams_dict = get_teams_dict()
     picks_cache = {}
@@ -1035,13 +1099,11 @@ def auto_fill_bracket(games_dict=None, user_picks=None, commit=True, user=None,
                     best_team = team
 
             if best_team:
-                new_pick = Pick(user_id=user.id, game_id=game.id, team_id=best_team.id)
-                db.session.add(new_pick)
                 user_picks[game.id] = best_team.id # Update local dict to inform future round fills
+    write_bracket(user.id, user_picks, stored_picks)
 
     if add_log:
-        log_entry = LogEntry(category='Fill Better Seeds', current_user_id=user.id, description=f"{user.email} filled in the better seeds")
-        db.session.add(log_entry)
+        log_event('Fill Better Seeds', f"{user.email} filled in the better seeds", user_id=user.id)
     if commit:
         db.session.commit()
 
@@ -1120,17 +1182,21 @@ def admin_set_winners():
             if selected_team_id is None:
                 game.winning_team_id = None
                 clear_team_from_future_games(game, previous_winning_team_id)
-                log_entry = LogEntry(category='Remove Winner', current_user_id=current_user.id, 
-                                     description=f"{current_user.email} cleared winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}")
-                db.session.add(log_entry)
+                log_event(
+                    'Remove Winner',
+                    f"{current_user.email} cleared winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}",
+                    user_id=current_user.id
+                )
             
             # Case 3: Setting a winner for the first time
             elif previous_winning_team_id is None:
                 game.winning_team_id = selected_team_id
                 advance_team_to_next_game(game, selected_team_id)
-                log_entry = LogEntry(category='Set Winner', current_user_id=current_user.id, 
-                                     description=f"{current_user.email} set winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}")
-                db.session.add(log_entry)
+                log_event(
+                    'Set Winner',
+                    f"{current_user.email} set winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}",
+                    user_id=current_user.id
+                )
                 
             # Case 4: Switching winner
             else:
@@ -1139,18 +1205,17 @@ def admin_set_winners():
                 clear_team_from_future_games(game, previous_winning_team_id)
                 # Then advance the new winner
                 advance_team_to_next_game(game, selected_team_id)
-                log_entry = LogEntry(category='Change Winner', current_user_id=current_user.id, 
-                                     description=f"{current_user.email} changed winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}")
-                db.session.add(log_entry)
+                log_event(
+                    'Change Winner',
+                    f"{current_user.email} changed winner of {game.team1.get_display_name()} vs {game.team2.get_display_name()}",
+                    user_id=current_user.id
+                )
 
-        db.session.commit()
-        pool = Pool.query.get(POOL_ID)
-        pool.expected_standings_dirty = True
         db.session.commit()
         flash('Game winners updated.', 'success')
         clear_potential_winners_cache()  # Clear cache before updating potential winners
         do_admin_update_potential_winners()
-        recalculate_standings()
+        recalculate_all_standings(results_changed=True)
         posthog_client.capture(
             f'user_{current_user.id}', 'admin_set_winners',
             {'admin_id': current_user.id, 'games_updated': games_changed}
@@ -1199,17 +1264,20 @@ def advance_team_to_next_game(game, team_id):
         else:
             next_game.team2_id = team_id
 
-def recalculate_standings(user=None, commit=True):
+def recalculate_standings(user=None, commit=True, pool_id=None):
     """
     Recalculate standings for users based on correct picks and potential future points.
-    If user is provided, only recalculates for that user, otherwise recalculates for all pool users.
+    If user is provided, only recalculates for that user, otherwise recalculates for all users
+    of pool_id (default: the request's pool).
     Assumes the PotentialWinner table has been updated before calling this function.
     Set commit=False to defer committing (for atomic operations).
     """
     if user:
+        pool_id = user.pool_id
         users = User.query.filter_by(id=user.id).all()
     else:
-        users = User.query.filter_by(pool_id=POOL_ID).all()
+        pool_id = pool_id or current_pool_id()
+        users = User.query.filter_by(pool_id=pool_id).all()
 
     # Pre-fetch all games and rounds in two queries, build lookup dicts
     all_games = {g.id: g for g in Game.query.all()}
@@ -1221,48 +1289,64 @@ def recalculate_standings(user=None, commit=True):
             int(tid) for tid in entry.potential_winner_ids.split(',') if tid.isdigit()
         ]
 
-    user_ids = [u.id for u in users]
-    all_picks = Pick.query.filter(Pick.user_id.in_(user_ids)).all()
-    picks_by_user = defaultdict(list)
-    for pick in all_picks:
-        picks_by_user[pick.user_id].append(pick)
+    if user:
+        picks_by_user = {user.id: read_bracket(user.id).items()}
+    else:
+        # Frozen archive after the cutoff, pick table before it
+        picks_by_user = load_pool_picks(pool_id, valid_only=False)
 
     for u in users:
         for i in range(1, 7):
             setattr(u, f'r{i}score', 0)
         potential_additional_points = 0
 
-        for pick in picks_by_user[u.id]:
-            game = all_games.get(pick.game_id)
+        for game_id, team_id in picks_by_user.get(u.id, ()):
+            game = all_games.get(game_id)
             if not game:
                 continue
             round_points = all_rounds[game.round_id].points
 
-            if game.winning_team_id is not None and game.winning_team_id == pick.team_id:
+            if game.winning_team_id is not None and game.winning_team_id == team_id:
                 attr_name = f'r{game.round_id}score'
                 setattr(u, attr_name, getattr(u, attr_name) + round_points)
 
             if game.winning_team_id is None:
-                if pick.team_id in potential_winners_dict.get(game.id, []):
+                if team_id in potential_winners_dict.get(game.id, []):
                     potential_additional_points += round_points
 
         u.currentscore = sum(getattr(u, f'r{i}score') for i in range(1, 7))
         u.maxpossiblescore = u.currentscore + potential_additional_points
 
-    if commit:
-        db.session.commit()
+    bump_scores_version(commit=commit, pool_id=pool_id)
+
+def recalculate_all_standings(results_changed=False):
+    """
+    Recalculate standings in every pool after a tournament-wide change (round points,
+    potential winners). Games and results are shared, so one change rescores all pools,
+    not just the one whose admin made it. With results_changed, also mark each pool's
+    expected standings dirty and schedule its bracket pre-render.
+    """
+    for pool_id in all_pool_ids():
+        if results_changed:
+            Pool.query.filter_by(id=pool_id).update({'expected_standings_dirty': True})
+        recalculate_standings(pool_id=pool_id)
+        if results_changed:
+            schedule_bracket_prerender(pool_id)
 
 @app.route('/standings', methods=['GET', 'POST'])
 @login_required
 @pool_required
+@replica_reads
 def standings():
     # Update expected scores if dirty
     if is_after_cutoff():
-        calculate_expected_points(POOL_ID)
+        calculate_expected_points(current_pool_id())
         
     sync_espn_results_to_games()
     show_champion = is_after_cutoff() or current_user.is_admin
-    sort_form = SortStandingsForm(sort_field='currentscore', sort_order='desc', champion_filter = 'Any')
+    # After the cutoff only valid brackets are ranked
+    snapshot = get_standings_snapshot(current_pool_id(), valid_only=is_after_cutoff())
+    sort_form = SortStandingsForm(round_names=rounds_dict(), champion_names=snapshot.champion_names, sort_field='currentscore', sort_order='desc', champion_filter='Any')
 
     if sort_form.validate_on_submit():
         sort_field = sort_form.sort_field.data
@@ -1275,126 +1359,287 @@ def standings():
         champion_filter = 'Any'
         name_filter = ""
 
-    users = champion_picks = None
-    if is_after_cutoff():
-        user_query = User.query.filter(User.pool_id == POOL_ID, User.is_bracket_valid.is_(True))
-        # Get championship picks for valid brackets only
-        champion_picks = {
-            pick.user_id: pick.team.get_display_name() 
-            for pick in Pick.query.join(User).filter(
-                User.pool_id == POOL_ID, 
-                User.is_bracket_valid.is_(True), 
-                Pick.game_id == CHAMPIONSHIP_GAME_ID
-            ).join(Team, Pick.team_id == Team.id)
+    if not show_champion:
+        champion_filter = 'Any'
+
+    # Rows are fetched page by page from /api/standings by the virtual-scrolling table
+    api_params = {'sort': sort_field, 'order': sort_order, 'champion': champion_filter, 'name': name_filter or ''}
+    user_rank = snapshot.rank_for_score(current_user.currentscore)
+
+    return render_template('standings.html', api_params=api_params, sort_form=sort_form, rounds=rounds_dict(), show_champion=show_champion, user_rank=user_rank, user_score=current_user.currentscore, current_user_id=current_user.id)
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+
+def _api_limit():
+    """Page size from ?limit=, clamped to API_MAX_PAGE_SIZE"""
+    return max(1, min(request.args.get('limit', API_PAGE_SIZE, type=int), API_MAX_PAGE_SIZE))
+
+def _api_cursor(name):
+    """Decode a keyset cursor query arg; None if absent. Raises ValueError if malformed."""
+    value = request.args.get(name)
+    return decode_cursor(value) if value else None
+
+def _standings_api_rows(entries, show_champion, show_expected):
+    rows = []
+    for position, row, rank in entries:
+        item = {
+            'id': row.id,
+            'full_name': row.full_name,
+            'rank': rank,
+            'position': position,
+            'currentscore': row.currentscore,
+            'maxpossiblescore': row.maxpossiblescore,
+            'round_scores': [row.r1score, row.r2score, row.r3score, row.r4score, row.r5score, row.r6score],
         }
+        if show_expected:
+            item['expected_score'] = round(row.expected_score, 1)
+        if show_champion:
+            item['champion'] = row.champion_team_name
+        rows.append(item)
+    return rows
+
+def _standings_api_context():
+    """Snapshot plus the sort and visibility settings shared by the standings API routes"""
+    after_cutoff = is_after_cutoff()
+    snapshot = get_standings_snapshot(current_pool_id(), valid_only=after_cutoff)
+    sort_field = request.args.get('sort', 'currentscore')
+    sort_order = request.args.get('order', 'desc')
+    if sort_field not in STANDINGS_SORT_FIELDS:
+        sort_field = 'currentscore'
+    if sort_order not in ('asc', 'desc'):
+        sort_order = 'desc'
+    show_champion = after_cutoff or current_user.is_admin
+    show_expected = after_cutoff or current_user.is_super_admin
+    return snapshot, sort_field, sort_order, show_champion, show_expected
+
+@app.route('/api/standings')
+@login_required
+@pool_required
+@replica_reads
+def api_standings():
+    """
+    Keyset-paginated standings. Query args: sort, order, champion, name, limit and one of
+    after/before (cursors from a previous response). total is only computed for the first page.
+    """
+    snapshot, sort_field, sort_order, show_champion, show_expected = _standings_api_context()
+    champion_filter = request.args.get('champion', 'Any') if show_champion else 'Any'
+    name_filter = request.args.get('name', '').strip()
+    try:
+        after = _api_cursor('after')
+        before = _api_cursor('before')
+        entries, has_more = snapshot.page(sort_field, sort_order, after=after, before=before, limit=_api_limit(),
+                                          champion_filter=champion_filter, name_filter=name_filter)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    def cursor_for(entry):
+        return encode_cursor(getattr(entry[1], sort_field), entry[1].id)
+
+    if before is not None:
+        prev_cursor = cursor_for(entries[0]) if entries and has_more else None
+        next_cursor = cursor_for(entries[-1]) if entries else None
     else:
-        user_query = User.query.filter(User.pool_id == POOL_ID)
-        # Get championship picks for all users
-        champion_picks = {
-            pick.user_id: pick.team.get_display_name() 
-            for pick in Pick.query.join(User).filter(
-                User.pool_id == POOL_ID, 
-                Pick.game_id == CHAMPIONSHIP_GAME_ID
-            ).join(Team, Pick.team_id == Team.id)
-        }
+        prev_cursor = cursor_for(entries[0]) if entries and (after is not None or entries[0][0] > 0) else None
+        next_cursor = cursor_for(entries[-1]) if entries and has_more else None
+
+    response = {
+        'rows': _standings_api_rows(entries, show_champion, show_expected),
+        'prev': prev_cursor,
+        'next': next_cursor,
+    }
+    if after is None and before is None:
+        response['total'] = snapshot.count(champion_filter=champion_filter, name_filter=name_filter)
+    return jsonify(response)
+
+@app.route('/api/standings/me')
+@login_required
+@pool_required
+@replica_reads
+def api_standings_me():
+    """The viewer's rank and the unfiltered rows around them (?radius=, default 10)"""
+    snapshot, sort_field, sort_order, show_champion, show_expected = _standings_api_context()
+    radius = max(0, min(request.args.get('radius', 10, type=int), API_MAX_PAGE_SIZE // 2))
+    entries = snapshot.around(current_user.id, sort_field, sort_order, radius=radius)
+
+    def cursor_for(entry):
+        return encode_cursor(getattr(entry[1], sort_field), entry[1].id)
+
+    return jsonify({
+        'user_id': current_user.id,
+        'score_rank': snapshot.rank_for_score(current_user.currentscore),
+        'rows': _standings_api_rows(entries, show_champion, show_expected),
+        'prev': cursor_for(entries[0]) if entries and entries[0][0] > 0 else None,
+        'next': cursor_for(entries[-1]) if entries and entries[-1][0] < len(snapshot.rows) - 1 else None,
+        'total': len(snapshot.rows),
+    })
 
+def _users_keyset_page(query, limit):
+    """
+    Page a User query ordered by (lower(full_name), id) after the ?after= cursor.
+    Served by the (pool_id, lower(full_name), id) index. Returns (users, next_cursor).
+    """
+    name_key = func.lower(User.full_name)
+    after = _api_cursor('after')
+    if after is not None:
+        # Any other key type would only fail in the database, as a 500
+        if not isinstance(after[0], str):
+            raise ValueError('Invalid cursor')
+        query = query.filter(tuple_(name_key, User.id) > tuple_(after[0], after[1]))
+    name_filter = request.args.get('name', '').strip().lower()
     if name_filter:
-        user_query = user_query.filter(User.full_name.ilike(f'%{name_filter}%'))
-    users = user_query.all()
+        query = query.filter(name_key.contains(name_filter, autoescape=True))
+    users = query.order_by(name_key, User.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].full_name.lower(), users[-1].id)
+    return users, next_cursor
+
+@app.route('/api/users')
+@login_required
+@pool_required
+def api_users():
+    """Keyset-paginated pool members by name. Query args: name, limit, after."""
+    query = db.session.query(User.id, User.full_name).filter(User.pool_id == current_pool_id())
+    try:
+        users, next_cursor = _users_keyset_page(query, _api_limit())
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({
+        'rows': [{'id': user.id, 'full_name': user.full_name} for user in users],
+        'next': next_cursor,
+    })
 
-    for user in users:
-        user.champion_team_name = champion_picks.get(user.id, "?")
+def _admin_users_query(columns):
+    """Pool users filtered by the admin users page's ?verified= / ?valid_bracket= (Yes/No/Any)"""
+    query = db.session.query(*columns).filter(User.pool_id == current_pool_id())
+    valid_bracket_filter = request.args.get('valid_bracket', 'Any')
+    verified_filter = request.args.get('verified', 'Any')
+    if valid_bracket_filter in ['Yes', 'No']:
+        query = query.filter(User.is_bracket_valid.is_(valid_bracket_filter == 'Yes'))
+    if verified_filter in ['Yes', 'No']:
+        query = query.filter(User.is_verified.is_(verified_filter == 'Yes'))
+    return query
+
+@app.route('/admin/api/users')
+@login_required
+@pool_required
+@admin_required
+def admin_api_users():
+    """Keyset-paginated admin user list. Query args: verified, valid_bracket, name, limit, after."""
+    query = _admin_users_query([
+        User.id, User.full_name, User.email, User.is_verified, User.is_bracket_valid,
+        User.currentscore, User.maxpossiblescore,
+    ])
+    try:
+        users, next_cursor = _users_keyset_page(query, _api_limit())
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({
+        'rows': [{
+            'id': user.id,
+            'full_name': user.full_name,
+            'email': user.email,
+            'is_verified': user.is_verified,
+            'is_bracket_valid': user.is_bracket_valid,
+            'currentscore': user.currentscore,
+            'maxpossiblescore': user.maxpossiblescore,
+        } for user in users],
+        'next': next_cursor,
+    })
 
-    if not show_champion:
-        champion_filter = 'Any'
+@app.route('/admin/users/emails.txt')
+@login_required
+@pool_required
+@admin_required
+def admin_user_emails():
+    """Comma-separated emails of the users matching the admin users filters, streamed"""
+    query = _admin_users_query([User.email]).order_by(func.lower(User.full_name), User.id)
 
-    if champion_filter != 'Any':
-        users = [user for user in users if champion_picks.get(user.id, "?") == champion_filter]
+    def generate():
+        separator = ''
+        for (email,) in query.yield_per(1000):
+            yield separator + email
+            separator = ', '
 
-    users.sort(key=lambda x: (getattr(x, sort_field) if sort_field != 'champion_team_name' else getattr(x, 'champion_team_name', "?")), reverse=(sort_order == 'desc'))
+    return Response(stream_with_context(generate()), mimetype='text/plain')
 
-    if sort_field == 'champion_team_name':
-        for user in users:
-            user.rank = ""
-    else:
-        last_score = None
-        current_rank = 0
-        for i, user in enumerate(users):
-            score = getattr(user, sort_field)
-            if score != last_score:
-                current_rank = i + 1
-                last_score = score
-            user.rank = current_rank
-
-    count_higher_scores = User.query.filter(User.currentscore > current_user.currentscore, User.pool_id == POOL_ID).count()
-    user_rank = count_higher_scores + 1
-
-    return render_template('standings.html', users=users, sort_form=sort_form, rounds=rounds_dict(), show_champion=show_champion, user_rank=user_rank, user_score=current_user.currentscore, current_user_id=current_user.id)
-
-_rounds_cache = None
-_regions_cache = None
-_pool_users_cache = None
-_pool_users_cache_time = None
-_teams_cache = None
-_teams_dict_cache = None
+@app.route('/admin/export/picks.<fmt>')
+@login_required
+@pool_required
+@admin_required
+def admin_export_picks(fmt):
+    """Every pick of every pool bracket (user x game x team), streamed as any of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    return export_response('picks', PICK_FIELDS, pick_rows(current_pool_id()), fmt)
+
+@app.route('/admin/export/standings.<fmt>')
+@login_required
+@pool_required
+@admin_required
+def admin_export_standings(fmt):
+    """Standings with round and expected scores, streamed as any of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    # Ranked like the standings page: only valid brackets after the cutoff
+    return export_response('standings', STANDINGS_FIELDS, standings_rows(current_pool_id(), is_after_cutoff()), fmt)
+
+@app.route('/admin/export/odds.<fmt>')
+@login_required
+@pool_required
+@admin_required
+def admin_export_odds(fmt):
+    """Simulated win probability per game and team, streamed as any of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    # Recalculated first if the pool's expected scores are stale, as on the predictions page
+    calculate_expected_points(current_pool_id())
+    return export_response('odds', ODDS_FIELDS, odds_rows(), fmt)
+
+_rounds_cache = GenerationCache('rounds')
+_regions_cache = GenerationCache('regions')
+_pool_users_cache = GenerationCache('users')
 
 def rounds_dict():
     """Get dictionary mapping round IDs to round names (cached)"""
-    global _rounds_cache
-    if _rounds_cache is None:
-        _rounds_cache = {round.id: round.name for round in Round.query.all()}
-    return _rounds_cache
+    return _rounds_cache.get('names', lambda: {round.id: round.name for round in Round.query.all()})
 
 def regions_dict():
     """Get dictionary mapping region IDs to region names (cached)"""
-    global _regions_cache
-    if _regions_cache is None:
-        _regions_cache = {region.id: region.name for region in Region.query.all()}
-    return _regions_cache
+    return _regions_cache.get('names', lambda: {region.id: region.name for region in Region.query.all()})
 
 def clear_rounds_cache():
     """Clear rounds cache if round names/points change"""
-    global _rounds_cache
-    _rounds_cache = None
+    bump_generation('rounds')
 
 def clear_pool_users_cache():
     """Clear pool users cache (e.g. after a user is added or deleted)"""
-    global _pool_users_cache, _pool_users_cache_time
-    _pool_users_cache = None
-    _pool_users_cache_time = None
+    bump_generation('users')
 
 def clear_regions_cache():
     """Clear regions cache if region names change"""
-    global _regions_cache
-    _regions_cache = None
+    bump_generation('regions')
 
 def get_pool_users_for_forms():
-    """Get pool user emails for form dropdowns with 5 minute cache.
-    Returns plain (email, email) tuples — callers should use directly as form choices."""
-    global _pool_users_cache, _pool_users_cache_time
-    now = datetime.utcnow()
-
-    if _pool_users_cache and _pool_users_cache_time and (now - _pool_users_cache_time).seconds < 300:
-        return _pool_users_cache
-
-    emails = [r.email for r in User.query.with_entities(User.email).filter_by(pool_id=POOL_ID).order_by(func.lower(User.email)).all()]
-    _pool_users_cache = emails
-    _pool_users_cache_time = now
-    return emails
+    """Get pool user emails for form dropdowns (cached until a user is added or deleted).
+    Returns plain email strings — callers build (email, email) form choices."""
+    def build():
+        return [r.email for r in User.query.with_entities(User.email).filter_by(pool_id=current_pool_id()).order_by(func.lower(User.email)).all()]
+    return _pool_users_cache.get(current_pool_id(), build, pool_id=current_pool_id())
 
 def get_all_teams():
-    """Get all teams. Always queries fresh to avoid DetachedInstanceError from cross-request caching of ORM objects."""
-    return Team.query.options(joinedload(Team.region)).all()
+    """Get all teams as read-only TeamView snapshots, cached process-wide until clear_teams_cache()."""
+    return get_team_views()
 
 def get_teams_dict():
-    """Get teams as a {id: team} dict."""
-    return {team.id: team for team in get_all_teams()}
+    """Get teams as a read-only {id: TeamView} mapping."""
+    return get_team_views_by_id()
 
 def clear_teams_cache():
-    """No-op kept for compatibility — teams are no longer cached as ORM objects."""
-    global _teams_cache, _teams_dict_cache
-    _teams_cache = None
-    _teams_dict_cache = None
+    """Invalidate cached team views and display names. Call after team slots, ESPN ids, regions or ratings change."""
+    bump_teams_version()
 
 
 def sync_espn_results_to_games(force=False):
@@ -1410,6 +1655,9 @@ def sync_espn_results_to_games(force=False):
         if log_row and (datetime.utcnow() - log_row.last_sync_at).total_seconds() < CACHE_TTL:
             return
 
+    # The sync reads games to write winners: don't read them from a replica
+    pin_primary()
+
     try:
         data = fetch_espn_scoreboard()
     except Exception:
@@ -1418,7 +1666,6 @@ def sync_espn_results_to_games(force=False):
     events.sort(key=lambda e: e["event_date"] or datetime.min)
 
     games_updated = 0
-    play_in_filled = False
 
     for ev in events:
         team_ids = set(ev["team_ids"])
@@ -1446,12 +1693,11 @@ def sync_espn_results_to_games(force=False):
                 espn_winner = EspnTeam.query.filter_by(espn_id=winner_id).first()
                 if espn_winner:
                     slot.name = espn_winner.display_name
-                play_in_filled = True
-                db.session.add(LogEntry(
-                    category='ESPN Sync',
-                    current_user_id=None,
-                    description=f"Filled play-in slot {slot.region.name} Seed {slot.seed} → {espn_winner.short_display_name if espn_winner else winner_id}"
-                ))
+                bump_teams_version(commit=False)
+                log_event(
+                    'ESPN Sync',
+                    f"Filled play-in slot {slot.region.name} Seed {slot.seed} → {espn_winner.short_display_name if espn_winner else winner_id}"
+                )
                 break
         else:
             # Normal game match
@@ -1479,24 +1725,18 @@ def sync_espn_results_to_games(force=False):
                 game.winning_team_id = winner_team.id
                 advance_team_to_next_game(game, winner_team.id)
                 games_updated += 1
-                db.session.add(LogEntry(
-                    category='ESPN Sync',
-                    current_user_id=None,
-                    description=f"Set winner of Game {game.id} ({t1.get_display_name()} vs {t2.get_display_name()}) → {winner_team.get_display_name()}"
-                ))
+                log_event(
+                    'ESPN Sync',
+                    f"Set winner of Game {game.id} ({t1.get_display_name()} vs {t2.get_display_name()}) → {winner_team.get_display_name()}"
+                )
                 break
 
     db.session.commit()
 
     if games_updated > 0:
-        pool = Pool.query.get(POOL_ID)
-        if pool:
-            pool.expected_standings_dirty = True
         clear_potential_winners_cache()
         do_admin_update_potential_winners()
-        recalculate_standings()
-    if play_in_filled:
-        clear_teams_cache()
+        recalculate_all_standings(results_changed=True)
 
     log_row = EspnSyncLog.query.first()
     if log_row:
@@ -1510,18 +1750,19 @@ def sync_espn_results_to_games(force=False):
 @app.route('/view_picks/<int:user_id>', methods=['GET', 'POST'])
 @login_required
 @pool_required
+@state_etag(csrf=True)
+@replica_reads
 def view_picks(user_id):
     if not current_user.is_admin and not is_after_cutoff() and user_id != current_user.id:
         return redirect(url_for('standings'))
 
-    user = User.query.filter_by(id=user_id, pool_id=POOL_ID).first_or_404()
+    # Name, score and rank from the standings snapshot; dropdown from the bracket bundle
+    user, user_rank = user_standing(current_pool_id(), user_id)
+    if user is None:
+        abort(404)
 
-    games = Game.query.order_by(Game.id).all()
     form = UserSelectionForm()
-    if current_user.is_admin:
-        form.user.choices = [(u.id, u.full_name) for u in User.query.filter(User.pool_id == POOL_ID).order_by(User.full_name).all()]
-    else:
-        form.user.choices = [(u.id, u.full_name) for u in User.query.filter(User.pool_id == POOL_ID, User.is_bracket_valid.is_(True)).order_by(User.full_name).all()]
+    form.user.choices = bundle_users(current_pool_id(), include_invalid=current_user.is_admin)
 
     if form.validate_on_submit():
         selected_user_id = form.user.data
@@ -1531,16 +1772,32 @@ def view_picks(user_id):
     form.user.default = user_id
     form.process()
 
-    user_picks = {pick.game_id: pick.team for pick in Pick.query.options(joinedload(Pick.team)).filter_by(user_id=user_id).all()}
-    lost_teams = get_teams_that_lost()
-
-    count_higher_scores = User.query.filter(User.currentscore > user.currentscore, User.pool_id == POOL_ID).count()
+    grid_html = render_bracket_grid(current_pool_id(), user_id)
 
-    user_rank = count_higher_scores + 1
+    return render_template('view_picks.html', form=form, grid_html=grid_html, user=user, user_rank=user_rank, current_user_id=current_user.id)
 
-    all_teams = get_all_teams()
+@app.route('/api/bracket/bundle')
+@login_required
+@pool_required
+@state_etag()
+@replica_reads
+def api_bracket_bundle():
+    """Layout, teams, rounds, regions, eliminated teams, pick percentages and the user list"""
+    return app.response_class(get_bracket_bundle_json(current_pool_id(), include_invalid=current_user.is_admin), mimetype='application/json')
 
-    return render_template('view_picks.html', form=form, games=games, user_picks=user_picks, user=user, rounds=rounds_dict(), regions=regions_dict(), teams=all_teams, lost_teams=lost_teams, user_rank=user_rank, current_user_id=current_user.id)
+@app.route('/api/bracket/<int:user_id>/picks')
+@login_required
+@pool_required
+@state_etag()
+@replica_reads
+def api_bracket_picks(user_id):
+    """One bracket's 63 pick ids plus score and rank"""
+    if not current_user.is_admin and not is_after_cutoff() and user_id != current_user.id:
+        return jsonify({'error': 'Brackets are hidden until the cutoff'}), 403
+    payload = user_picks_payload(current_pool_id(), user_id)
+    if payload is None:
+        abort(404)
+    return jsonify(payload)
 
 @app.route('/admin/cutoff_status')
 @login_required
@@ -1549,6 +1806,13 @@ def view_picks(user_id):
 def admin_cutoff_status():
     return render_template('admin/cutoff_status.html', cutoff_status=is_after_cutoff(), current_time = get_current_time(), cutoff_time=get_cutoff_time())
 
+@app.route('/admin/audit_log_metrics')
+@login_required
+@admin_required
+def admin_audit_log_metrics():
+    # Queue depth, throughput and flush latency of this worker's audit log writer
+    return jsonify(audit_log_writer.metrics())
+
 @app.route('/admin/fix_user/<int:user_id>')
 @login_required
 @admin_required
@@ -1580,7 +1844,7 @@ def admin_fix_user(user_id):
 @super_admin_required
 def admin_efficiency():
     from app.models import Team, Pool
-    pool = Pool.query.get(POOL_ID)
+    pool = Pool.query.get(current_pool_id())
     teams = Team.query.all()
     # Sort by (O - D) descending, then by seed ascending. Blank ratings at the end.
     teams.sort(key=lambda t: (
@@ -1605,45 +1869,22 @@ def admin_efficiency():
                 pool.expected_standings_dirty = True
         
         db.session.commit()
+        clear_teams_cache()
         flash("Efficiency ratings updated successfully.")
         return redirect(url_for('admin_efficiency'))
         
     return render_template('admin_efficiency.html', teams=teams, pool=pool)
 
-@app.route('/admin/efficiency/export')
+@app.route('/admin/efficiency/export', defaults={'fmt': 'csv'})
+@app.route('/admin/efficiency/export.<fmt>')
 @login_required
 @pool_required
 @super_admin_required
-def admin_export_efficiency():
-    from app.models import Team
-    import csv
-    from io import StringIO
-    from flask import make_response
-    
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['team_id', 'region', 'seed', 'team_name', 'off_efficiency', 'def_efficiency'])
-    
-    teams = Team.query.all()
-    # Sort by (O - D) descending, then by seed ascending. Blank ratings at the end.
-    teams.sort(key=lambda t: (
-        -(t.off_efficiency - t.def_efficiency) if (t.off_efficiency is not None and t.def_efficiency is not None) else float('inf'),
-        t.seed
-    ))
-    for team in teams:
-        cw.writerow([
-            team.id,
-            team.region.name,
-            team.seed,
-            team.get_display_name(),
-            team.off_efficiency or '',
-            team.def_efficiency or ''
-        ])
-    
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=team_efficiency.csv"
-    output.headers["Content-type"] = "text/csv"
-    return output
+def admin_export_efficiency(fmt):
+    """Efficiency ratings in the import format, streamed as any of EXPORT_FORMATS"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    return export_response('team_efficiency', EFFICIENCY_FIELDS, efficiency_rows(), fmt)
 
 @app.route('/admin/efficiency/import', methods=['POST'])
 @login_required
@@ -1682,9 +1923,10 @@ def admin_import_efficiency():
                     except (ValueError, TypeError):
                         continue
         
-        pool = Pool.query.get(POOL_ID)
+        pool = Pool.query.get(current_pool_id())
         pool.expected_standings_dirty = True
         db.session.commit()
+        clear_teams_cache()
         flash(f'Successfully imported efficiency for {count} teams.')
     
     return redirect(url_for('admin_efficiency'))
@@ -1694,29 +1936,17 @@ def admin_import_efficiency():
 @pool_required
 @admin_required
 def admin_users():
-    valid_bracket_filter = 'Any'
-    verified_filter = 'Any'
-    users = User.query.filter(User.pool_id == POOL_ID).order_by(func.lower(User.full_name))
-
-    if request.method == 'POST':
-        valid_bracket_filter = request.form.get('valid_bracket', 'Any')
-        verified_filter = request.form.get('verified', 'Any')
-
-        if valid_bracket_filter in ['Yes', 'No']:
-            users = users.filter_by(is_bracket_valid=(valid_bracket_filter == 'Yes'))
-        if verified_filter in ['Yes', 'No']:
-            users = users.filter_by(is_verified=(verified_filter == 'Yes'))
-
-    users = users.all()
-    user_emails = ', '.join([user.email for user in users])
-    return render_template('admin/users.html', users=users, valid_bracket_filter=valid_bracket_filter, verified_filter=verified_filter, user_emails=user_emails)
+    # Filters are applied client-side through /admin/api/users
+    valid_bracket_filter = request.values.get('valid_bracket', 'Any')
+    verified_filter = request.values.get('verified', 'Any')
+    return render_template('admin/users.html', valid_bracket_filter=valid_bracket_filter, verified_filter=verified_filter)
 
 @app.route('/admin/edit_user_names', methods=['GET'])
 @login_required
 @pool_required
 @admin_required
 def admin_edit_user_names():
-    users = User.query.filter(User.pool_id == POOL_ID).order_by(func.lower(User.full_name)).all()
+    users = User.query.filter(User.pool_id == current_pool_id()).order_by(func.lower(User.full_name)).all()
     return render_template('admin/edit_user_names.html', users=users)
 
 @app.route('/admin/edit_user_name', methods=['POST'])
@@ -1734,18 +1964,18 @@ def admin_edit_user_name():
     if not user_id or not new_name:
         return jsonify({'success': False, 'error': 'Missing user_id or full_name'}), 400
 
-    user = User.query.filter_by(id=user_id, pool_id=POOL_ID).first()
+    user = User.query.filter_by(id=user_id, pool_id=current_pool_id()).first()
     if not user:
         return jsonify({'success': False, 'error': 'User not found'}), 404
 
     old_name = user.full_name
     user.full_name = new_name
-    log_entry = LogEntry(
-        category='Edit User Name',
-        current_user_id=current_user.id,
-        description=f"{current_user.full_name} changed name of {user.email} from \"{old_name}\" to \"{new_name}\""
+    bump_generation('users', commit=False)
+    log_event(
+        'Edit User Name',
+        f"{current_user.full_name} changed name of {user.email} from \"{old_name}\" to \"{new_name}\"",
+        user_id=current_user.id
     )
-    db.session.add(log_entry)
     db.session.commit()
 
     return jsonify({'success': True, 'full_name': user.full_name})
@@ -1766,6 +1996,7 @@ def get_teams_that_lost():
 @app.route('/message_board')
 @login_required
 @pool_required
+@replica_reads
 def message_board():
     # Use a subquery to get post counts and last update times in a single trip
     subquery = db.session.query(
@@ -1774,7 +2005,7 @@ def message_board():
         func.max(Post.created_at).label('last_post_at')
     ).filter(Post.hidden.is_(False)).group_by(Post.thread_id).subquery()
 
-    query = Thread.query.join(User, Thread.creator_id == User.id).filter(User.pool_id == POOL_ID)
+    query = Thread.query.join(User, Thread.creator_id == User.id).filter(User.pool_id == current_pool_id())
     if not current_user.is_admin:
         query = query.filter(Thread.hidden.is_(False))
     
@@ -1784,7 +2015,7 @@ def message_board():
         User, Thread.creator_id == User.id
     ).outerjoin(
         subquery, Thread.id == subquery.c.thread_id
-    ).filter(User.pool_id == POOL_ID)
+    ).filter(User.pool_id == current_pool_id())
     
     # Apply hidden filter if not admin
     if not current_user.is_admin:
@@ -1829,8 +2060,7 @@ def create_thread():
         new_post = Post(content=content[:1000], author_id=current_user.id, thread_id=new_thread.id)
         db.session.add(new_post)
         
-        log_entry = LogEntry(category='Create Thread', current_user_id=current_user.id, description=f"{current_user.email} created thread \"{title}\"")
-        db.session.add(log_entry)
+        log_event('Create Thread', f"{current_user.email} created thread \"{title}\"", user_id=current_user.id)
         db.session.commit()
 
         posthog_client.capture(
@@ -1847,9 +2077,10 @@ def create_thread():
 @app.route('/thread/<int:thread_id>', methods=['GET', 'POST'])
 @login_required
 @pool_required
+@replica_reads
 def thread(thread_id):
     thread = Thread.query.options(joinedload(Thread.creator)).get_or_404(thread_id)
-    if thread.creator.pool_id != POOL_ID:
+    if thread.creator.pool_id != current_pool_id():
         return redirect(url_for('message_board'))
 
     if current_user.is_admin:
@@ -1891,8 +2122,7 @@ def thread(thread_id):
 def hide_thread(thread_id):
     thread = Thread.query.get_or_404(thread_id)
     thread.hidden = True
-    log_entry = LogEntry(category='Hide Thread', current_user_id=current_user.id, description=f"Hid thread \"{thread.title}\"")
-    db.session.add(log_entry)
+    log_event('Hide Thread', f"Hid thread \"{thread.title}\"", user_id=current_user.id)
     db.session.commit()
     return redirect(url_for('message_board'))
 
@@ -1903,8 +2133,7 @@ def hide_thread(thread_id):
 def unhide_thread(thread_id):
     thread = Thread.query.get_or_404(thread_id)
     thread.hidden = False
-    log_entry = LogEntry(category='Unhide Thread', current_user_id=current_user.id, description=f"Unhid thread \"{thread.title}\"")
-    db.session.add(log_entry)
+    log_event('Unhide Thread', f"Unhid thread \"{thread.title}\"", user_id=current_user.id)
     db.session.commit()
     return redirect(url_for('message_board'))
 
@@ -1915,8 +2144,7 @@ def unhide_thread(thread_id):
 def hide_post(post_id):
     post = Post.query.options(joinedload(Post.thread)).get_or_404(post_id)
     post.hidden = True
-    log_entry = LogEntry(category='Hide Post', current_user_id=current_user.id, description=f"Hid post on thread \"{post.thread.title}\"")
-    db.session.add(log_entry)
+    log_event('Hide Post', f"Hid post on thread \"{post.thread.title}\"", user_id=current_user.id)
     db.session.commit()
     return redirect(url_for('thread', thread_id=post.thread_id))
 
@@ -1927,19 +2155,17 @@ def hide_post(post_id):
 def unhide_post(post_id):
     post = Post.query.options(joinedload(Post.thread)).get_or_404(post_id)
     post.hidden = False
-    log_entry = LogEntry(category='Unhide Post', current_user_id=current_user.id, description=f"Unhid post on thread \"{post.thread.title}\"")
-    db.session.add(log_entry)
+    log_event('Unhide Post', f"Unhid post on thread \"{post.thread.title}\"", user_id=current_user.id)
     db.session.commit()
     return redirect(url_for('thread', thread_id=post.thread_id))
 
-_winners_cache = None
+_winners_cache = GenerationCache('winners')
 
 def get_winners_from_csv():
     """Get winners data with caching"""
-    global _winners_cache
-    if _winners_cache is not None:
-        return _winners_cache
-    
+    return _winners_cache.get('winners', _read_winners_csv)
+
+def _read_winners_csv():
     current_dir = os.path.dirname(__file__)
     file_path = os.path.join(current_dir, 'static', 'winners.csv')
     winners = []
@@ -1956,18 +2182,16 @@ def get_winners_from_csv():
                 'place3': row[5], 
                 'winner3': row[6]
             })
-    
-    _winners_cache = winners
     return winners
 
 def clear_winners_cache():
     """Clear winners cache if CSV is updated"""
-    global _winners_cache
-    _winners_cache = None
+    bump_generation('winners')
 
 @app.route('/winners')
 @login_required
 @pool_required
+@state_etag()
 def winners():
     winners_data = get_winners_from_csv()
     return render_template('winners.html', winners=winners_data)
@@ -1987,8 +2211,12 @@ def admin_reset_password_code():
             user.reset_code = os.urandom(16).hex()
             user.reset_code_expiration = datetime.utcnow() + timedelta(hours=24)
             
-            log_entry = LogEntry(category='Generate Password Code', current_user_id=current_user.id, description=f"{current_user.full_name} generated a password reset code for {user.full_name}")
-            db.session.add(log_entry)
+            log_event(
+                'Generate Password Code',
+                f"{current_user.full_name} generated a password reset code for {user.full_name}",
+                user_id=current_user.id,
+                sync=True
+            )
             db.session.commit()
 
             return render_template('admin/reset_password_code.html', form=form, reset_code=user.reset_code, user_email=user_email)
@@ -2050,15 +2278,19 @@ def request_password_reset():
 
         user = User.query.filter(
             func.lower(User.email) == email,
-            User.pool_id == POOL_ID
+            User.pool_id == current_pool_id()
         ).first()
 
         if user:
             try:
                 token = user.generate_password_reset_token()
                 send_password_reset_email(user, token, app_name=pool_name)
-                log_entry = LogEntry(category='Password Reset Request', current_user_id=user.id, description=f"{user.full_name} requested password reset link via email")
-                db.session.add(log_entry)
+                log_event(
+                    'Password Reset Request',
+                    f"{user.full_name} requested password reset link via email",
+                    user_id=user.id,
+                    sync=True
+                )
                 db.session.commit()
             except Exception:
                 pass
@@ -2101,8 +2333,7 @@ def reset_password_via_token():
 
         posthog_client.capture(f'user_{user.id}', 'password_reset_completed', {'method': 'email_link'})
 
-        log_entry = LogEntry(category='Password Reset', current_user_id=user.id, description=f"{user.full_name} reset their password via email link")
-        db.session.add(log_entry)
+        log_event('Password Reset', f"{user.full_name} reset their password via email link", user_id=user.id, sync=True)
         db.session.commit()
 
         try:
@@ -2123,8 +2354,12 @@ def reset_password_request():
         user = get_user_from_form_email(form)
         if user and user.reset_code == form.reset_code.data:
             if user.reset_code_expiration > datetime.utcnow():
-                log_entry = LogEntry(category='Enter Password Code', current_user_id=user.id, description=f"{user.full_name} entered a valid password reset code")
-                db.session.add(log_entry)
+                log_event(
+                    'Enter Password Code',
+                    f"{user.full_name} entered a valid password reset code",
+                    user_id=user.id,
+                    sync=True
+                )
                 db.session.commit()
                 return redirect(url_for('reset_password_with_user_id', user_id=user.id))
             else:
@@ -2137,7 +2372,7 @@ def reset_password_request():
 @app.route('/reset_password/<int:user_id>', methods=['GET', 'POST'], endpoint='reset_password_with_user_id')
 def reset_password_with_user_id(user_id):
     """Admin-generated code flow: set new password after verifying code."""
-    user = User.query.filter_by(id=user_id, pool_id=POOL_ID).first_or_404()
+    user = User.query.filter_by(id=user_id, pool_id=current_pool_id()).first_or_404()
     
     if not user.reset_code or not user.reset_code_expiration:
         flash('Invalid or expired reset link.', 'error')
@@ -2155,8 +2390,12 @@ def reset_password_with_user_id(user_id):
             user.reset_code_expiration = None
             db.session.commit()
 
-            log_entry = LogEntry(category='Password Reset', current_user_id=user.id, description=f"{user.full_name} reset their password after entering a valid password reset code")
-            db.session.add(log_entry)
+            log_event(
+                'Password Reset',
+                f"{user.full_name} reset their password after entering a valid password reset code",
+                user_id=user.id,
+                sync=True
+            )
             db.session.commit()
 
             flash('Your password has been updated.', 'success')
@@ -2177,7 +2416,7 @@ def super_admin_delete_user():
     form.email.choices = [(email, email) for email in get_pool_users_for_forms()]
 
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data, pool_id=POOL_ID).first()
+        user = User.query.filter_by(email=form.email.data, pool_id=current_pool_id()).first()
         if user:
             full_name = user.full_name
             user_id = user.id
@@ -2185,7 +2424,8 @@ def super_admin_delete_user():
 
             # Delete related data efficiently
             LogEntry.query.filter_by(current_user_id=user_id).delete()
-            Pick.query.filter_by(user_id=user_id).delete()
+            delete_archived_user_entries(user_id)
+            delete_brackets([user_id])
             
             # For posts and threads, we need to be careful about dependencies
             # Delete all posts authored by this user
@@ -2198,6 +2438,8 @@ def super_admin_delete_user():
                 Thread.query.filter(Thread.id.in_(thread_ids)).delete(synchronize_session=False)
             
             db.session.delete(user)
+            Pool.query.filter_by(id=current_pool_id()).update({'pick_distribution_dirty': True})
+            bump_generation('picks', commit=False)
             db.session.flush()
 
             posthog_client.capture(
@@ -2205,8 +2447,12 @@ def super_admin_delete_user():
                 {'deleted_user_id': user_id, 'deleted_by': current_user.id}
             )
 
-            log_entry = LogEntry(category='Delete User', current_user_id=current_user.id, description=f"{current_user.full_name} deleted the user {full_name} whose id was {user_id} and whose email was {email}")
-            db.session.add(log_entry)
+            log_event(
+                'Delete User',
+                f"{current_user.full_name} deleted the user {full_name} whose id was {user_id} and whose email was {email}",
+                user_id=current_user.id,
+                sync=True
+            )
             db.session.commit()
 
             recalculate_standings()
@@ -2232,7 +2478,7 @@ def super_admin_add_user():
     if form.validate_on_submit():
         existing = User.query.filter(
             func.lower(User.email) == func.lower(form.email.data),
-            User.pool_id == POOL_ID
+            User.pool_id == current_pool_id()
         ).first()
         if existing:
             flash('Email already registered in this pool.')
@@ -2244,7 +2490,7 @@ def super_admin_add_user():
             time_zone=form.time_zone.data,
             tiebreaker_winner=form.tiebreaker_winner.data,
             tiebreaker_loser=form.tiebreaker_loser.data,
-            pool_id=POOL_ID
+            pool_id=current_pool_id()
         )
         new_user.set_password(form.password.data)
         if ADMIN_EMAIL and form.email.data.lower() == ADMIN_EMAIL.lower():
@@ -2252,11 +2498,13 @@ def super_admin_add_user():
             new_user.is_super_admin = True
 
         db.session.add(new_user)
-        db.session.add(LogEntry(
-            category='Super Admin Add User',
-            current_user_id=current_user.id,
-            description=f"{current_user.email} added user {new_user.full_name} ({new_user.email})"
-        ))
+        log_event(
+            'Super Admin Add User',
+            f"{current_user.email} added user {new_user.full_name} ({new_user.email})",
+            user_id=current_user.id,
+            sync=True
+        )
+        bump_generation('users', commit=False)
         db.session.commit()
 
         flash(f'User {new_user.full_name} added successfully. They can log in with the password you set, or request a reset later.')
@@ -2276,48 +2524,20 @@ def admin_analytics():
     unique_users = None
     event_counts = None
 
-    form.category.choices = sorted(
-        [(c.category, c.category) for c in db.session.query(LogEntry.category).distinct()],
-        key=lambda x: x[0]
-    )
+    form.category.choices = [(category, category) for category in log_categories()]
 
     if form.validate_on_submit():
         granularity = int(form.granularity.data)
         category = form.category.data
         cutoff_datetime = datetime(2026, 3, 15, 23, 0, 0)
-        user_tz_name = current_user.time_zone
-
-        # Determine the SQL expression for the time bucket (period)
-        # We first convert the UTC timestamp to the user's local time zone
-        local_ts = func.timezone(user_tz_name, func.timezone('UTC', LogEntry.timestamp))
-
-        if granularity == 1440:
-            # Day level
-            period_sql = func.date_trunc('day', local_ts)
-        elif granularity == 60:
-            # Hour level
-            period_sql = func.date_trunc('hour', local_ts)
-        else:
-            # Minute buckets (1, 5, 10, 15, 30)
-            # Truncate to hour, then add back the rounded minutes
-            minutes = func.date_part('minute', local_ts).cast(db.Integer)
-            rounded_minutes = (minutes / granularity) * granularity
-            # We use text() for the interval since it's most reliable across SQLAlchemy versions
-            period_sql = func.date_trunc('hour', local_ts) + (rounded_minutes * text("interval '1 minute'"))
-
-        # Perform the aggregation entirely in SQL
-        query_results = db.session.query(
-            period_sql.label('period'),
-            func.count(LogEntry.id).label('event_count'),
-            func.count(LogEntry.current_user_id.distinct()).label('unique_users')
-        ).filter(
-            LogEntry.category == category,
-            LogEntry.timestamp > cutoff_datetime
-        ).group_by('period').order_by('period').all()
-
-        timestamps = [r.period.isoformat() for r in query_results]
-        unique_users = [r.unique_users for r in query_results]
-        event_counts = [r.event_count for r in query_results]
+        user_tz = pytz.timezone(current_user.time_zone)
+
+        # Aggregated from the per-minute rollup, in the admin's time zone
+        points = rollup_series(category, cutoff_datetime, granularity, user_tz)
+
+        timestamps = [p.period.isoformat() for p in points]
+        unique_users = [p.unique_users for p in points]
+        event_counts = [p.event_count for p in points]
 
     return render_template('admin/analytics.html', form=form, results=results, timestamps=timestamps, unique_users=unique_users, event_counts=event_counts)
 
@@ -2328,13 +2548,13 @@ def admin_analytics():
 def admin_recalculate_expected_scores():
     """Force a full recalculation of expected scores for all valid users."""
     from app.utils.simulation import calculate_expected_points
-    pool = Pool.query.get(POOL_ID)
+    pool = Pool.query.get(current_pool_id())
     if not pool:
         flash('Pool not found.', 'error')
         return redirect(url_for('index'))
     pool.expected_standings_dirty = True
     db.session.commit()
-    result = calculate_expected_points(POOL_ID)
+    result = calculate_expected_points(current_pool_id())
     if result is None:
         flash('Recalculation skipped: set pool avg_o_rating and ensure 2+ teams have efficiency ratings.', 'error')
     else:
@@ -2348,9 +2568,8 @@ def admin_recalculate_expected_scores():
 def admin_update_potential_winners_and_standings():
     clear_potential_winners_cache()  # Clear cache before updating potential winners
     do_admin_update_potential_winners()
-    recalculate_standings()
-    log_entry = LogEntry(category='Update Potential Winners', current_user_id=current_user.id, description=f"{current_user.full_name} updated the PotentialWinner table")
-    db.session.add(log_entry)
+    recalculate_all_standings()
+    log_event('Update Potential Winners', f"{current_user.full_name} updated the PotentialWinner table", user_id=current_user.id)
     db.session.commit()
 
     return jsonify({"status": "success", "message": "Potential winners updated."})
@@ -2377,17 +2596,20 @@ def do_admin_update_potential_winners():
 @app.route('/show_potential_winners')
 @login_required
 @pool_required
+@state_etag()
+@replica_reads
 def show_potential_winners():
     potential_winners_data = []
     potential_winners = PotentialWinner.query.order_by(PotentialWinner.game_id).all()
     
     # Pre-fetch all games with rounds to avoid N+1 queries
     games_dict = {g.id: g for g in Game.query.options(joinedload(Game.round)).all()}
+    teams_dict = get_teams_dict()
 
     for pw in potential_winners:
         game = games_dict.get(pw.game_id)
         team_ids = [int(id) for id in pw.potential_winner_ids.split(',') if id.isdigit()]
-        teams = Team.query.filter(Team.id.in_(team_ids)).all() if team_ids else []
+        teams = sorted((teams_dict[tid] for tid in team_ids if tid in teams_dict), key=lambda t: t.id)
         team_names = ', '.join(team.get_display_name() for team in teams)
         
         potential_winners_data.append({
@@ -2401,90 +2623,20 @@ def show_potential_winners():
 @app.route('/pool_insights')
 @login_required
 @pool_required
+@state_etag()
+@replica_reads
 def pool_insights():
     if not is_after_cutoff() and not current_user.is_admin:
         flash("Pool insights will be available once the pool starts!")
         return redirect(url_for('index'))
 
-    # 1. Champion Picks Distribution
-    champion_picks_raw = db.session.query(
-        Team, func.count(Pick.id).label('count')
-    ).join(Pick, Team.id == Pick.team_id).join(User, Pick.user_id == User.id).filter(
-        User.pool_id == POOL_ID,
-        User.is_bracket_valid.is_(True),
-        Pick.game_id == CHAMPIONSHIP_GAME_ID
-    ).group_by(Team.id).order_by(text('count DESC')).all()
-    champion_picks = [(t.get_display_name(), t.seed, c) for t, c in champion_picks_raw]
-
-    # 2. Consensus Bracket (Most picked team for each game)
-    # This query finds the most picked team for each game in the pool
-    subquery = db.session.query(
-        Pick.game_id,
-        Pick.team_id,
-        func.count(Pick.id).label('pick_count')
-    ).join(User, Pick.user_id == User.id).filter(
-        User.pool_id == POOL_ID,
-        User.is_bracket_valid.is_(True)
-    ).group_by(Pick.game_id, Pick.team_id).subquery()
-
-    max_picks = db.session.query(
-        subquery.c.game_id,
-        func.max(subquery.c.pick_count).label('max_count')
-    ).group_by(subquery.c.game_id).subquery()
-
-    consensus_picks_raw = db.session.query(
-        subquery.c.game_id,
-        subquery.c.team_id,
-        subquery.c.pick_count
-    ).join(
-        max_picks,
-        (subquery.c.game_id == max_picks.c.game_id) & (subquery.c.pick_count == max_picks.c.max_count)
-    ).all()
-
-    # Convert to a more usable format
+    # Champion distribution, consensus bracket and upsets all come from the materialized pick distribution
+    distribution = get_pick_distribution(current_pool_id())
     teams_dict = get_teams_dict()
-    consensus_bracket = {}
-    for game_id, team_id, count in consensus_picks_raw:
-        consensus_bracket[game_id] = {
-            'team': teams_dict.get(team_id),
-            'count': count
-        }
-
-    # 3. Most Popular Upset Picks (First Round)
-    # First round games are 1-32. Upset = lower seed (higher number) wins.
-    upset_picks = db.session.query(
-        Team, Game.id, func.count(Pick.id).label('count')
-    ).join(Pick, Team.id == Pick.team_id).join(Game, Pick.game_id == Game.id).join(User, Pick.user_id == User.id).filter(
-        User.pool_id == POOL_ID,
-        User.is_bracket_valid.is_(True),
-        Game.round_id == 1
-    ).group_by(Game.id, Team.id).all()
-
-    # Filter for actual upsets (where picked team seed > opponent seed)
-    # We need to fetch the games to know the opponent seeds
-    games_round_1 = Game.query.filter_by(round_id=1).all()
-    game_opponents = {}
-    for g in games_round_1:
-        if g.team1 and g.team2:
-            game_opponents[g.id] = (g.team1.seed, g.team2.seed)
-
-    popular_upsets = []
-    for team, game_id, count in upset_picks:
-        seeds = game_opponents.get(game_id)
-        if seeds:
-            opponent_seed = seeds[1] if team.seed == seeds[0] else seeds[0]
-            if team.seed > opponent_seed:
-                popular_upsets.append({
-                    'team': team.get_display_name(),
-                    'seed': team.seed,
-                    'opponent_seed': opponent_seed,
-                    'count': count
-                })
-    
-    popular_upsets.sort(key=lambda x: x['count'], reverse=True)
-    popular_upsets = popular_upsets[:10] # Top 10 upsets
-
-    total_valid_users = User.query.filter_by(pool_id=POOL_ID, is_bracket_valid=True).count()
+    consensus_bracket = {
+        game_id: {'team': teams_dict.get(entry.team_id), 'count': entry.count}
+        for game_id, entry in distribution.consensus.items()
+    }
 
     # Get data for bracket rendering
     games = Game.query.order_by(Game.id).all()
@@ -2493,10 +2645,10 @@ def pool_insights():
     regions = regions_dict()
 
     return render_template('pool_insights.html', 
-                           champion_picks=champion_picks, 
+                           champion_picks=distribution.champion_picks, 
                            consensus_bracket=consensus_bracket,
-                           popular_upsets=popular_upsets,
-                           total_users=total_valid_users,
+                           popular_upsets=distribution.popular_upsets,
+                           total_users=distribution.total_users,
                            games=games,
                            teams=all_teams,
                            rounds=rounds,
@@ -2507,18 +2659,20 @@ from app.utils.simulation import calculate_expected_points
 @app.route('/predictions')
 @login_required
 @pool_required
+@state_etag()
+@replica_reads
 def predictions():
     from app.models import Team, GameProbability, Game, Round, Pool
     
     # Trigger simulation if cache is dirty
-    calculate_expected_points(POOL_ID)
+    calculate_expected_points(current_pool_id())
     
-    pool = Pool.query.get(POOL_ID)
+    pool = Pool.query.get(current_pool_id())
     if not pool or not pool.avg_o_rating:
         flash("Predictions will be available once efficiency ratings are set by the admin.")
         return redirect(url_for('index'))
     
-    teams = Team.query.all()
+    teams = get_all_teams()
     # round_ids for S16 (3), F4 (5), Champ (6)
     # Actually let's just get all round wins
     rounds = Round.query.order_by(Round.id).all()
@@ -2541,14 +2695,19 @@ def predictions():
 @app.route('/simulate_standings', methods=['GET', 'POST'])
 @login_required
 @pool_required
+@replica_reads
 def simulate_standings():
     games = Game.query.filter(Game.winning_team_id.is_(None)).order_by(Game.id).all()
     game_ids = [g.id for g in games]
+    game_id_set = set(game_ids)
+    # Valid brackets, from the frozen archive after the cutoff
+    pool_picks = load_pool_picks(current_pool_id())
 
+    teams_dict = get_teams_dict()
     potential_winners_data = {}
     for pw in PotentialWinner.query.all():
         team_ids = [int(tid) for tid in pw.potential_winner_ids.split(',') if tid.isdigit()]
-        teams = Team.query.filter(Team.id.in_(team_ids)).all()
+        teams = sorted((teams_dict[tid] for tid in team_ids if tid in teams_dict), key=lambda t: t.id)
         potential_winners_data[pw.game_id] = teams
 
     games_data = defaultdict(list)
@@ -2563,14 +2722,10 @@ def simulate_standings():
             alive_team_ids.add(t.id)
 
     # User's own picks for remaining games (only if the picked team is still alive)
-    my_picks_by_game = {}
-    my_picks_qs = Pick.query.filter(
-        Pick.user_id == current_user.id,
-        Pick.game_id.in_(game_ids)
-    ).all()
-    for pick in my_picks_qs:
-        if pick.team_id in alive_team_ids:
-            my_picks_by_game[pick.game_id] = pick.team_id
+    my_picks_by_game = {
+        game_id: team_id for game_id, team_id in load_user_picks(current_pool_id(), current_user.id).items()
+        if game_id in game_id_set and team_id in alive_team_ids
+    }
 
     # Top seed (lowest seed number) among potential winners for each game
     top_seed_by_game = {}
@@ -2594,16 +2749,12 @@ def simulate_standings():
 
     # Other users' picks (for "Load user's picks" dropdown) - only alive picks
     other_users_picks_by_id = {}
-    all_user_picks = Pick.query.join(User).filter(
-        Pick.game_id.in_(game_ids),
-        User.pool_id == POOL_ID,
-        User.is_bracket_valid.is_(True)
-    ).all()
-    for pick in all_user_picks:
-        if pick.team_id in alive_team_ids and pick.user_id != current_user.id:
-            if pick.user_id not in other_users_picks_by_id:
-                other_users_picks_by_id[pick.user_id] = {}
-            other_users_picks_by_id[pick.user_id][pick.game_id] = pick.team_id
+    for user_id, picks in pool_picks.items():
+        if user_id == current_user.id:
+            continue
+        for game_id, team_id in picks:
+            if game_id in game_id_set and team_id in alive_team_ids:
+                other_users_picks_by_id.setdefault(user_id, {})[game_id] = team_id
     user_ids = sorted(other_users_picks_by_id.keys())
     users_by_id = {u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
     other_users_for_dropdown = sorted(
@@ -2613,20 +2764,15 @@ def simulate_standings():
 
     selected_teams = {}
     if request.method == 'POST':
-        users = User.query.filter(User.pool_id == POOL_ID, User.is_bracket_valid.is_(True)).all()
+        users = User.query.filter(User.pool_id == current_pool_id(), User.is_bracket_valid.is_(True)).all()
         user_scores = {user.id: user.currentscore for user in users}
 
-        # Optimization: Fetch all relevant picks for the remaining games in ONE query
-        all_picks = Pick.query.join(User).filter(
-            Pick.game_id.in_(game_ids),
-            User.pool_id == POOL_ID,
-            User.is_bracket_valid.is_(True)
-        ).all()
-
-        # Group picks by game and team for fast lookup
+        # Group picks for the remaining games by game and team for fast lookup
         picks_lookup = defaultdict(lambda: defaultdict(list))
-        for pick in all_picks:
-            picks_lookup[pick.game_id][pick.team_id].append(pick.user_id)
+        for user_id, picks in pool_picks.items():
+            for game_id, team_id in picks:
+                if game_id in game_id_set:
+                    picks_lookup[game_id][team_id].append(user_id)
 
         for game in games:
             game_key = f"game_{game.id}"
@@ -2686,58 +2832,84 @@ def simulate_standings():
 @app.route('/compare_brackets', methods=['GET'])
 @login_required
 @pool_required
+@state_etag()
+@replica_reads
 def compare_brackets():
-    users = User.query.filter(User.pool_id == POOL_ID, User.is_bracket_valid.is_(True)).order_by(User.full_name).all()
+    pool_id = current_pool_id()
+    users = User.query.filter(User.pool_id == pool_id, User.is_bracket_valid.is_(True)).order_by(User.full_name).all()
+    user_names = {user.id: user.full_name for user in users}
+
+    # Slots user1..user8; user1/user2 keep the two-way links from view_picks working
+    selected_ids = []
+    for slot in range(1, MAX_COMPARE_BRACKETS + 1):
+        user_id = request.args.get(f'user{slot}', type=int)
+        if user_id and user_id not in selected_ids:
+            selected_ids.append(user_id)
+    selected_users = {
+        user.id: user for user in User.query.filter(User.pool_id == pool_id, User.id.in_(selected_ids)).all()
+    } if selected_ids else {}
+    compared_users = [selected_users[user_id] for user_id in selected_ids if user_id in selected_users]
 
-    user1_id = request.args.get('user1')
-    user2_id = request.args.get('user2') 
     comparison_results = None
-    user1_name = None
-    user2_name = None
-
-    if user1_id and user2_id:
-        user1 = User.query.get(user1_id)
-        user2 = User.query.get(user2_id)
-        if user1 and user2:
-            user1_name = user1.full_name
-            user2_name = user2.full_name
-            comparison_results = perform_comparison(user1_id, user2_id)
-    
-    return render_template('compare_brackets.html', users=users, user1_id=user1_id, user2_id=user2_id, user1_name=user1_name, user2_name=user2_name, comparison_results=comparison_results)
+    similarity_matrix = None
+    index = None
+    if len(compared_users) >= 2:
+        compared_picks = [load_user_picks(pool_id, user.id) for user in compared_users]
+        comparison_results = perform_comparison(compared_picks)
+        index = get_similarity_index(pool_id)
+        similarity_matrix = [
+            [index.similarity(picks_a, picks_b) for picks_b in compared_picks]
+            for picks_a in compared_picks
+        ]
+
+    # Pool-wide similarity once brackets are locked
+    most_like_me = None
+    clusters = None
+    if is_after_cutoff() or current_user.is_admin:
+        index = index or get_similarity_index(pool_id)
+        most_like_me = [
+            (user_id, user_names.get(user_id, '?'), similarity)
+            for user_id, similarity in index.most_similar(
+                load_user_picks(pool_id, current_user.id), limit=10, exclude=[current_user.id]
+            )
+        ]
+        clusters = get_bracket_clusters(pool_id)
 
-def perform_comparison(user1_id, user2_id):
+    slots = [(slot, selected_ids[slot - 1] if slot <= len(selected_ids) else None) for slot in range(1, MAX_COMPARE_BRACKETS + 1)]
+    return render_template(
+        'compare_brackets.html', users=users, user_names=user_names, slots=slots,
+        compared_users=compared_users, comparison_results=comparison_results,
+        similarity_matrix=similarity_matrix, total_points=index.total_points if index else 0,
+        most_like_me=most_like_me, clusters=clusters,
+    )
+
+def perform_comparison(brackets):
     """
-    Compare brackets of two users and return list of differing picks.
-    Returns list of tuples: (round_name, game_id, team1_name, team1_status, team2_name, team2_status)
+    Compare up to MAX_COMPARE_BRACKETS brackets ({game_id: team_id} each) and return the
+    games they don't all agree on.
+    Returns list of tuples: (round_name, game_id, [(team_name, status) per bracket])
     """
-    picks_user1 = {pick.game_id: pick.team_id for pick in Pick.query.filter_by(user_id=user1_id).all()}
-    picks_user2 = {pick.game_id: pick.team_id for pick in Pick.query.filter_by(user_id=user2_id).all()}
-    
-    all_game_ids = set(picks_user1.keys()) | set(picks_user2.keys())
+    all_game_ids = set().union(*brackets)
     games = {g.id: g for g in Game.query.options(joinedload(Game.round)).filter(Game.id.in_(all_game_ids)).all()}
-    
-    all_team_ids = set(picks_user1.values()) | set(picks_user2.values())
-    teams = {t.id: t.name for t in Team.query.filter(Team.id.in_(all_team_ids)).all() if t.id is not None}
-    
+    teams = get_teams_dict()
+
     differing_picks = []
     for game_id in sorted(all_game_ids):
-        team1_pick = picks_user1.get(game_id)
-        team2_pick = picks_user2.get(game_id)
-        
-        if team1_pick != team2_pick:
-            game = games.get(game_id)
-            if not game:
-                continue
-                
-            team1_name = teams.get(team1_pick, "No Pick") if team1_pick else "No Pick"
-            team2_name = teams.get(team2_pick, "No Pick") if team2_pick else "No Pick"
-            
+        picks = [bracket.get(game_id) for bracket in brackets]
+        if len(set(picks)) == 1:
+            continue
+        game = games.get(game_id)
+        if not game:
+            continue
+
+        cells = []
+        for team_id in picks:
+            team_name = teams[team_id].name if team_id in teams else "No Pick"
             if game.winning_team_id is None:
-                team1_status = team2_status = "tbd"
+                status = "tbd"
             else:
-                team1_status = "correct" if team1_pick == game.winning_team_id else "incorrect"
-                team2_status = "correct" if team2_pick == game.winning_team_id else "incorrect"
-                
-            differing_picks.append((game.round.name, game_id, team1_name, team1_status, team2_name, team2_status))
+                status = "correct" if team_id == game.winning_team_id else "incorrect"
+            cells.append((team_name, status))
+        differing_picks.append((game.round.name, game_id, cells))
 
     return differing_picks
\ No newline at end of file
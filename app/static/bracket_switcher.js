@@ -0,0 +1,122 @@
+/*
+ * Switch the view_picks grid between brackets without reloading the page.
+ *
+ * The first switch fetches the bracket bundle (/api/bracket/bundle: games, teams,
+ * eliminated teams, pick percentages); every switch fetches only the chosen user's
+ * 63 pick ids (/api/bracket/<id>/picks) and restyles the existing grid cells the way
+ * _view_picks_grid.html renders them. Both endpoints send ETags, so revisits are 304s.
+ * If anything fails the form falls back to its normal POST.
+ *
+ * BracketSwitcher.attach({
+ *     form: the user selection <form>, select: its <select>,
+ *     bundleUrl: ..., picksUrl: URL with 0 as the user id placeholder,
+ *     viewUrl: view_picks URL with 0 placeholder, compareUrl: compare URL with 0 placeholder
+ * });
+ */
+var BracketSwitcher = {
+    attach: function(options) {
+        var self = Object.create(BracketSwitcher);
+        self.options = options;
+        self.bundle = null;
+        options.form.addEventListener('submit', function(event) {
+            event.preventDefault();
+            self.show(parseInt(options.select.value, 10), true).catch(function() {
+                options.form.submit();
+            });
+        });
+        window.addEventListener('popstate', function(event) {
+            if (event.state && event.state.bracketUserId) {
+                self.show(event.state.bracketUserId, false).catch(function() {
+                    window.location.reload();
+                });
+            }
+        });
+        return self;
+    },
+
+    fetchJson: function(url) {
+        return fetch(url, {credentials: 'same-origin'}).then(function(response) {
+            if (!response.ok) throw new Error('Request failed: ' + response.status);
+            return response.json();
+        });
+    },
+
+    loadBundle: function() {
+        var self = this;
+        if (this.bundle) return Promise.resolve(this.bundle);
+        return this.fetchJson(this.options.bundleUrl).then(function(data) {
+            var teams = {};
+            data.teams.forEach(function(team) { teams[team.id] = team; });
+            data.teamsById = teams;
+            data.eliminated = new Set(data.eliminated_team_ids);
+            self.bundle = data;
+            return data;
+        });
+    },
+
+    urlFor: function(template, userId) {
+        // The placeholder is a 0 path segment or query value
+        return template.replace(/([\/=])0(?=$|[\/?&#])/, '$1' + userId);
+    },
+
+    show: function(userId, pushHistory) {
+        var self = this;
+        return Promise.all([
+            this.loadBundle(),
+            this.fetchJson(this.urlFor(this.options.picksUrl, userId))
+        ]).then(function(results) {
+            self.render(results[0], results[1]);
+            if (pushHistory) {
+                history.pushState({bracketUserId: userId}, '', self.urlFor(self.options.viewUrl, userId));
+            }
+            if (window.posthog) {
+                posthog.capture('view_picks_viewed', { viewed_user_id: userId });
+            }
+        });
+    },
+
+    render: function(bundle, payload) {
+        document.getElementById('bracket-owner').textContent = payload.full_name;
+        document.getElementById('bracket-rank').textContent = payload.rank;
+        document.getElementById('bracket-score').textContent = payload.score;
+        document.getElementById('bracket-compare-link').href = this.urlFor(this.options.compareUrl, payload.user_id);
+        this.options.select.value = String(payload.user_id);
+
+        bundle.games.forEach(function(game) {
+            var cell = document.querySelector('div#game' + game.id);
+            if (!cell) return;
+            var span = cell.querySelector('.bracket-grid-span');
+            var pick = payload.picks[game.id - 1];
+            var team = pick ? bundle.teamsById[pick] : null;
+            var pickClass = 'pick-unmade';
+            var tooltip = '';
+            if (team) {
+                if (game.winning_team_id || bundle.eliminated.has(pick)) {
+                    if (pick === game.winning_team_id) {
+                        pickClass = 'pick-correct';
+                    } else {
+                        pickClass = 'pick-incorrect';
+                        if (game.winning_team_id && bundle.teamsById[game.winning_team_id]) {
+                            tooltip = bundle.teamsById[game.winning_team_id].display_name;
+                        }
+                    }
+                } else {
+                    pickClass = 'pick-undecided';
+                }
+            }
+            cell.className = 'game-view-pick ' + pickClass;
+            cell.setAttribute('data-tooltip', tooltip);
+            span.setAttribute('data-tooltip', tooltip);
+
+            span.replaceChildren(document.createTextNode(team ? team.display_name : 'No Pick'));
+            var pct = team && bundle.pick_pcts[game.id] ? bundle.pick_pcts[game.id][pick] : undefined;
+            if (pct !== undefined) {
+                var note = document.createElement('div');
+                note.style.fontSize = '8px';
+                note.style.color = '#666';
+                note.textContent = pct + '% picked';
+                span.appendChild(note);
+            }
+        });
+    }
+};
@@ -0,0 +1,156 @@
+/*
+ * Virtual-scrolling table fed by a keyset-paginated JSON API.
+ *
+ * The endpoint returns {rows, next, prev, total?}; next/prev are opaque cursors passed
+ * back as ?after= / ?before=. Only the rows inside the scroll viewport (plus overscan)
+ * are in the DOM; spacer rows stand in for the rest, so tens of thousands of users
+ * render as a few dozen <tr>s.
+ *
+ * new KeysetTable({
+ *     container: scrollable element, tbody: <tbody>, url: API url, params: {...},
+ *     columns: number of <td>s per row (for spacers), rowHeight: px,
+ *     renderRow: function(row) -> <tr> element
+ * });
+ */
+function KeysetTable(options) {
+    this.container = options.container;
+    this.tbody = options.tbody;
+    this.url = options.url;
+    this.params = options.params || {};
+    this.columns = options.columns || 1;
+    this.rowHeight = options.rowHeight || 36;
+    this.renderRow = options.renderRow;
+    this.pageSize = options.pageSize || 100;
+    this.overscan = options.overscan || 10;
+    this.onLoad = options.onLoad || null;
+    this.reset();
+    var self = this;
+    var scheduled = false;
+    this.container.addEventListener('scroll', function() {
+        if (scheduled) return;
+        scheduled = true;
+        window.requestAnimationFrame(function() {
+            scheduled = false;
+            self.render();
+        });
+    });
+}
+
+KeysetTable.prototype.reset = function() {
+    this.rows = [];        // contiguous loaded rows
+    this.base = 0;         // list index of rows[0]
+    this.total = 0;
+    this.next = null;
+    this.prev = null;
+    this.loading = false;
+};
+
+KeysetTable.prototype.fetchPage = function(extra) {
+    var query = new URLSearchParams();
+    var key;
+    for (key in this.params) {
+        if (this.params[key] !== null && this.params[key] !== '') query.set(key, this.params[key]);
+    }
+    for (key in extra) query.set(key, extra[key]);
+    query.set('limit', this.pageSize);
+    return fetch(this.url + '?' + query.toString(), {credentials: 'same-origin'}).then(function(response) {
+        if (!response.ok) throw new Error('Request failed: ' + response.status);
+        return response.json();
+    });
+};
+
+KeysetTable.prototype.load = function() {
+    var self = this;
+    this.reset();
+    this.loading = true;
+    return this.fetchPage({}).then(function(data) {
+        self.rows = data.rows;
+        self.total = data.total !== undefined ? data.total : data.rows.length;
+        self.next = data.next;
+        self.prev = null;
+        self.loading = false;
+        self.container.scrollTop = 0;
+        self.render();
+        if (self.onLoad) self.onLoad(self);
+    });
+};
+
+// Replace the loaded window with rows whose list positions are known (e.g. the viewer's
+// neighbourhood from /api/standings/me) and scroll so the row with id rowId is centred.
+KeysetTable.prototype.jumpTo = function(data, rowId) {
+    if (!data.rows.length) return;
+    this.rows = data.rows;
+    this.base = data.rows[0].position;
+    this.total = data.total;
+    this.next = data.next;
+    this.prev = data.prev;
+    var offset = 0;
+    for (var i = 0; i < data.rows.length; i++) {
+        if (data.rows[i].id === rowId) offset = i;
+    }
+    this.render();
+    this.container.scrollTop = Math.max(0, (this.base + offset) * this.rowHeight - this.container.clientHeight / 2);
+    this.render();
+};
+
+KeysetTable.prototype.spacer = function(height) {
+    var tr = document.createElement('tr');
+    tr.className = 'keyset-spacer';
+    var td = document.createElement('td');
+    td.colSpan = this.columns;
+    td.style.height = height + 'px';
+    td.style.padding = '0';
+    td.style.border = '0';
+    tr.appendChild(td);
+    return tr;
+};
+
+KeysetTable.prototype.render = function() {
+    var first = Math.floor(this.container.scrollTop / this.rowHeight);
+    var visible = Math.ceil(this.container.clientHeight / this.rowHeight);
+    var start = Math.max(this.base, first - this.overscan);
+    var end = Math.min(this.base + this.rows.length, first + visible + this.overscan);
+    if (end < start) end = start;
+
+    var fragment = document.createDocumentFragment();
+    fragment.appendChild(this.spacer(start * this.rowHeight));
+    for (var i = start; i < end; i++) {
+        var tr = this.renderRow(this.rows[i - this.base]);
+        tr.style.height = this.rowHeight + 'px';
+        fragment.appendChild(tr);
+    }
+    fragment.appendChild(this.spacer(Math.max(0, this.total - end) * this.rowHeight));
+    this.tbody.replaceChildren(fragment);
+
+    // Keep a page of slack loaded in whichever direction the viewport is heading
+    if (this.loading) return;
+    if (this.next && first + visible + this.overscan >= this.base + this.rows.length - this.pageSize / 2) {
+        this.loadMore('after');
+    } else if (this.prev && first - this.overscan <= this.base + this.pageSize / 2) {
+        this.loadMore('before');
+    }
+};
+
+KeysetTable.prototype.loadMore = function(direction) {
+    var self = this;
+    var cursor = direction === 'after' ? this.next : this.prev;
+    this.loading = true;
+    var extra = {};
+    extra[direction] = cursor;
+    this.fetchPage(extra).then(function(data) {
+        if (direction === 'after') {
+            self.rows = self.rows.concat(data.rows);
+            self.next = data.next;
+            // Filtered lists have no total up front past the first page; grow as we go
+            self.total = Math.max(self.total, self.base + self.rows.length);
+        } else {
+            self.rows = data.rows.concat(self.rows);
+            self.base = Math.max(0, self.base - data.rows.length);
+            self.prev = data.prev;
+        }
+        self.loading = false;
+        self.render();
+    }).catch(function() {
+        self.loading = false;
+    });
+};
@@ -0,0 +1,210 @@
+"""
+Audit log writes off the request path.
+
+Request code records audit events with log_event() instead of adding LogEntry rows to
+the request's transaction. The event is held on the session until the transaction
+commits. Then it goes to an in-process queue; a rolled-back request logs nothing, as
+before. A background thread drains the queue with one multi-row INSERT on its own
+connection. It writes every AUDIT_LOG_BATCH_SIZE records or every
+AUDIT_LOG_FLUSH_MS milliseconds, whichever comes first. At exit (gunicorn's graceful
+worker shutdown included) the queue is flushed before the process ends.
+
+log_event(..., sync=True) writes the row inside the caller's transaction instead, for
+entries that must commit or fail with the change they describe (account, admin and
+password actions). With AUDIT_LOG_ASYNC off every entry is written that way. Those rows
+still pass through the queue once committed, but only to be counted: after each batch
+the writer folds every row it wrote, or saw committed, into the analytics rollup (see
+log_rollup) in a second short transaction.
+
+If a batch fails it is retried row by row. A row that still fails (its user was
+deleted meanwhile, the database is down) is counted as dropped, and its content goes
+to the application log, so it isn't lost silently. metrics() reports queue depth,
+throughput and flush latency for this worker (see /admin/audit_log_metrics).
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event
+
+PENDING_KEY = 'audit_log_pending'
+ROLLUP_KEY = 'audit_log_rollup'
+
+
+class AuditLogWriter:
+    """Queue plus background flusher for one worker process."""
+
+    def __init__(self, batch_size=100, flush_interval_ms=500, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._engine = None
+        self._logger = None
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._stats = {
+            'enqueued': 0, 'written': 0, 'batches': 0, 'failed_batches': 0, 'dropped': 0, 'rollup_failed': 0,
+            'max_queue_depth': 0, 'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0,
+        }
+
+    def enqueue(self, rows, engine, logger, rollup_only=()):
+        """
+        Queue row dicts for the LogEntry table, and rows already written (rollup_only) for
+        the rollup alone; starts the flusher in this process if needed.
+        """
+        with self._condition:
+            self._engine = engine
+            self._logger = logger
+            overflow = len(self._queue) + len(rows) + len(rollup_only) - self.max_queue
+            if overflow > 0:
+                # The database can't keep up: keep the newest records and say what was lost
+                for _ in range(min(overflow, len(self._queue))):
+                    row, insert = self._queue.popleft()
+                    if insert:
+                        self._log_dropped(row)
+            self._queue.extend((row, True) for row in rows)
+            self._queue.extend((row, False) for row in rollup_only)
+            self._stats['enqueued'] += len(rows)
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], len(self._queue))
+            self._ensure_thread()
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork: a worker forked from a preloaded app starts its own
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    self._condition.wait(self.flush_interval)
+                if not self._queue:
+                    if self._stopping:
+                        return
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._write(batch)
+
+    def _write(self, batch):
+        from app.models import LogEntry
+        from app.utils.log_rollup import apply_log_rollup
+        table = LogEntry.__table__
+        rows = [row for row, insert in batch if insert]
+        started = time.perf_counter()
+        batch_failed = False
+        dropped = []
+        if rows:
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(table.insert(), rows)
+            except Exception:
+                batch_failed = True
+                for row in rows:
+                    try:
+                        with self._engine.begin() as conn:
+                            conn.execute(table.insert(), [row])
+                    except Exception:
+                        dropped.append(row)
+        dropped_ids = {id(row) for row in dropped}
+        rollup_failed = False
+        try:
+            # Separate transaction: a rollup conflict or bug must not lose the entries themselves
+            with self._engine.begin() as conn:
+                apply_log_rollup(conn, [row for row, insert in batch if id(row) not in dropped_ids])
+        except Exception:
+            rollup_failed = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._condition:
+            self._stats['failed_batches'] += batch_failed
+            if rollup_failed:
+                self._stats['rollup_failed'] += 1
+                if self._logger is not None:
+                    self._logger.exception('Audit log rollup not updated; run flask rebuild-log-rollup')
+            for row in dropped:
+                self._log_dropped(row)
+            self._stats['written'] += len(rows) - len(dropped)
+            self._stats['batches'] += 1
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            self._stats['total_flush_ms'] += elapsed_ms
+
+    def _log_dropped(self, row):
+        self._stats['dropped'] += 1
+        if self._logger is not None:
+            self._logger.error('Audit log entry not written: %s', row)
+
+    def close(self, timeout=10):
+        """Flush everything queued and stop the flusher (registered with atexit)."""
+        with self._condition:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid():
+                return
+            self._stopping = True
+            self._condition.notify()
+        thread.join(timeout)
+
+    def metrics(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+        stats['avg_flush_ms'] = stats.pop('total_flush_ms') / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+
+writer = AuditLogWriter()
+
+
+def log_event(category, description, user_id=None, sync=False):
+    """
+    Record an audit log entry. Written after the current transaction commits, in the
+    background; with sync=True (or AUDIT_LOG_ASYNC off) added to the transaction itself.
+    """
+    from app import db
+    from app.utils.log_viewer import note_log_category
+    row = {'timestamp': datetime.utcnow(), 'category': category, 'current_user_id': user_id, 'description': description}
+    note_log_category(category)
+    session = db.session()
+    if not session.in_transaction():
+        # A rollback before anything else ran would otherwise skip after_rollback
+        session.begin()
+    if sync or not current_app.config.get('AUDIT_LOG_ASYNC', True):
+        from app.models import LogEntry
+        session.add(LogEntry(**row))
+        session.info.setdefault(ROLLUP_KEY, []).append(row)
+    else:
+        session.info.setdefault(PENDING_KEY, []).append(row)
+
+
+def _enqueue_committed(session):
+    rows = session.info.pop(PENDING_KEY, None)
+    rollup_only = session.info.pop(ROLLUP_KEY, None)
+    if rows or rollup_only:
+        from app import db
+        writer.enqueue(rows or [], db.engine, current_app.logger, rollup_only or ())
+
+
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(ROLLUP_KEY, None)
+
+
+def init_audit_log(app, session_class):
+    """Size the writer from config and hook it to session commits and process exit."""
+    writer.batch_size = app.config.get('AUDIT_LOG_BATCH_SIZE', 100)
+    writer.flush_interval = app.config.get('AUDIT_LOG_FLUSH_MS', 500) / 1000
+    writer.max_queue = app.config.get('AUDIT_LOG_MAX_QUEUE', 10000)
+    event.listen(session_class, 'after_commit', _enqueue_committed)
+    event.listen(session_class, 'after_rollback', _discard_rolled_back)
+    atexit.register(writer.close)
@@ -0,0 +1,207 @@
+"""
+Frozen post-cutoff bracket archive: every pool bracket packed into one memory-mapped file.
+
+After the cutoff picks only change through admin edits, yet scoring, expected points,
+simulation and comparisons each re-read the pick table. freeze_bracket_archive() compiles
+the pool's brackets into a binary file that every worker maps read-only:
+
+    header   magic 'MMBRKT01', format, games, pool_id, user_count,
+             picks generation, database identity, sha256 of the body
+    body     user_ids  uint32[user_count]       ascending, native byte order
+             picks     uint16[user_count * 63]  team id per game (game_id - 1), 0 = no pick
+             valid     uint8[user_count]        is_bracket_valid at freeze time
+
+Readers get memoryview slices straight from the mapping; nothing is copied or decoded
+until a caller asks for a dict. The archive is stamped with the 'picks' generation
+(bumped by every bracket save and user deletion) so a worker that sees a newer generation
+refreezes instead of serving stale brackets. The generation is read as committed, and an
+archive is only frozen when the request's transaction sees that same generation, so a
+file never carries picks that may yet roll back. Generation counters start from the
+same numbers in every database, so the file also lives under, and is stamped with, the
+database identity (see cache.database_identity): another database on the host never
+matches it. The file is written to a temp name and renamed into place, so readers never
+see a partial archive.
+
+Before the cutoff get_bracket_archive() returns None and load_pool_picks() /
+load_user_picks() read the live brackets (see bracket_store).
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import current_app
+
+from app import db
+from app.utils import is_after_cutoff
+from app.utils.cache import cache_dir, database_identity, get_committed_generation, get_generation
+
+GAME_COUNT = 63
+MAX_TEAM_ID = 0xFFFF
+MAGIC = b'MMBRKT01'
+FORMAT_VERSION = 3
+HEADER = struct.Struct('<8sHHIIq32s32s')
+
+_archives = {}
+_lock = threading.Lock()
+
+
+class BracketArchive:
+    """Read-only view over a mapped archive file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, games, self.pool_id, self.user_count, self.generation, database, digest = HEADER.unpack_from(self._mmap)
+        self.database = database.rstrip(b'\0').decode('ascii', 'replace')
+        if magic != MAGIC or version != FORMAT_VERSION or games != GAME_COUNT:
+            raise ValueError(f'{path} is not a bracket archive this version can read')
+        view = memoryview(self._mmap)[HEADER.size:]
+        if hashlib.sha256(view).digest() != digest:
+            raise ValueError(f'{path} failed its checksum')
+        ids_end = 4 * self.user_count
+        picks_end = ids_end + 2 * GAME_COUNT * self.user_count
+        self.user_ids = view[:ids_end].cast('I')
+        self.picks = view[ids_end:picks_end].cast('H')
+        self.valid = view[picks_end:picks_end + self.user_count]
+
+    def _index(self, user_id):
+        index = bisect_left(self.user_ids, user_id)
+        if index < self.user_count and self.user_ids[index] == user_id:
+            return index
+        return None
+
+    def __contains__(self, user_id):
+        return self._index(user_id) is not None
+
+    def bracket(self, user_id):
+        """The user's 63 picks as a zero-copy memoryview (index game_id - 1), or None."""
+        index = self._index(user_id)
+        if index is None:
+            return None
+        return self.picks[index * GAME_COUNT:(index + 1) * GAME_COUNT]
+
+    def picks_dict(self, user_id):
+        """{game_id: team_id} for the user's picks, or None if they aren't in the archive."""
+        bracket = self.bracket(user_id)
+        if bracket is None:
+            return None
+        return {game_id: team_id for game_id, team_id in enumerate(bracket, 1) if team_id}
+
+    def brackets(self, valid_only=True):
+        """Yield (user_id, bracket memoryview) in user id order."""
+        for index in range(self.user_count):
+            if valid_only and not self.valid[index]:
+                continue
+            yield self.user_ids[index], self.picks[index * GAME_COUNT:(index + 1) * GAME_COUNT]
+
+
+def _archive_path(database, pool_id):
+    directory = os.path.join(cache_dir(), database)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'bracket-archive-{pool_id}.bin')
+
+
+def freeze_bracket_archive(pool_id):
+    """Compile the pool's brackets into the archive file. Returns the mapped BracketArchive."""
+    from app.models import User
+    from app.utils.bracket_store import read_pool_brackets
+    database = database_identity()
+    # Read first: a bump committed while we work makes the file stale, not wrong
+    generation = get_committed_generation('picks', pool_id)
+    if get_generation('picks', pool_id) != generation:
+        raise ValueError('the picks generation this transaction sees is not the committed one')
+    users = db.session.query(User.id, User.is_bracket_valid).filter(User.pool_id == pool_id).order_by(User.id).all()
+    index_of = {user_id: index for index, (user_id, _) in enumerate(users)}
+    picks = array('H', bytes(2 * GAME_COUNT * len(users)))
+    for user_id, user_picks in read_pool_brackets(pool_id, valid_only=False).items():
+        for game_id, team_id in user_picks:
+            if not 1 <= game_id <= GAME_COUNT or not 0 < team_id <= MAX_TEAM_ID:
+                raise ValueError(f'Pick ({game_id}, {team_id}) does not fit the archive format')
+            picks[index_of[user_id] * GAME_COUNT + game_id - 1] = team_id
+
+    # Native byte order: the file is host-local and read back with memoryview.cast()
+    body = struct.pack(f'={len(users)}I', *(user_id for user_id, _ in users))
+    body += picks.tobytes()
+    body += bytes(1 if is_valid else 0 for _, is_valid in users)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, GAME_COUNT, pool_id, len(users), generation, database.encode('ascii'),
+        hashlib.sha256(body).digest(),
+    )
+
+    path = _archive_path(database, pool_id)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    archive = BracketArchive(path)
+    with _lock:
+        _archives[database, pool_id] = archive
+    return archive
+
+
+def get_bracket_archive(pool_id):
+    """
+    The pool's archive, mapping or (re)freezing it as needed; None before the cutoff
+    or if the archive can't be built, in which case callers read the pick table.
+    """
+    if not is_after_cutoff():
+        return None
+    database = database_identity()
+    generation = get_generation('picks', pool_id)
+    archive = _archives.get((database, pool_id))
+    if archive is not None and archive.generation == generation:
+        return archive
+    try:
+        archive = BracketArchive(_archive_path(database, pool_id))
+        if archive.generation == generation and archive.pool_id == pool_id and archive.database == database:
+            with _lock:
+                _archives[database, pool_id] = archive
+            return archive
+    except (OSError, ValueError, struct.error):
+        pass  # Missing, stale format or corrupt: rebuild below
+    if get_committed_generation('picks', pool_id) != generation:
+        return None  # Bracket changes this transaction hasn't committed: read the live brackets
+    try:
+        return freeze_bracket_archive(pool_id)
+    except (OSError, ValueError) as e:
+        current_app.logger.warning('Bracket archive unavailable for pool %s: %s', pool_id, e)
+        return None
+
+
+def load_pool_picks(pool_id, valid_only=True):
+    """{user_id: [(game_id, team_id), ...]} for the pool, from the archive when frozen."""
+    archive = get_bracket_archive(pool_id)
+    picks_by_user = defaultdict(list)
+    if archive is not None:
+        for user_id, bracket in archive.brackets(valid_only=valid_only):
+            picks_by_user[user_id] = [(game_id, team_id) for game_id, team_id in enumerate(bracket, 1) if team_id]
+        return picks_by_user
+
+    from app.utils.bracket_store import read_pool_brackets
+    return read_pool_brackets(pool_id, valid_only=valid_only)
+
+
+def load_user_picks(pool_id, user_id):
+    """{game_id: team_id} for one user, from the archive when frozen."""
+    archive = get_bracket_archive(pool_id)
+    if archive is not None:
+        picks = archive.picks_dict(user_id)
+        if picks is not None:
+            return picks
+
+    from app.utils.bracket_store import read_bracket
+    return read_bracket(user_id)
@@ -0,0 +1,113 @@
+"""
+Bracket data bundle: everything a bracket page needs except whose picks it shows.
+
+view_picks used to query the user list, games, picks, finished games, a rank COUNT,
+teams, rounds and regions on every navigation between brackets. The bundle gathers the
+bracket layout (games with feeders and results), teams, rounds, regions, eliminated
+teams, the "% picked" overlay and the dropdown's user list into one JSON document,
+serialized once per state version in the shared cache. The per-user payload is then
+just 63 pick ids plus score and rank, read from the bracket archive and the standings
+snapshot, so switching brackets in the browser costs one small request.
+
+The bundle is tied to the 'results', 'teams', 'rounds', 'regions', 'users' and
+'scores' generations; admins get a variant listing every user, not only valid brackets.
+"""
+import json
+
+from app import db
+from app.utils import is_after_cutoff
+from app.utils.bracket_archive import GAME_COUNT, load_user_picks
+from app.utils.cache import GenerationCache
+from app.utils.standings import get_standings_snapshot
+
+_bundle_cache = GenerationCache(
+    'results', 'teams', 'rounds', 'regions', 'users', 'scores', name='bracket_bundle', shared=True
+)
+
+
+def bundle_users(pool_id, include_invalid):
+    """[(user_id, full_name)] for the bracket dropdown, ordered by name."""
+    return [(user['id'], user['full_name']) for user in get_bracket_bundle(pool_id, include_invalid)['users']]
+
+
+def _build_bundle(pool_id, include_invalid):
+    from app.models import Game, Region, Round, User
+    from app.routes import get_teams_that_lost
+    from app.utils.pick_distribution import get_pick_distribution
+    from app.utils.teams import get_team_views
+
+    users = db.session.query(User.id, User.full_name).filter(User.pool_id == pool_id)
+    if not include_invalid:
+        users = users.filter(User.is_bracket_valid.is_(True))
+
+    pick_pcts = {}
+    if is_after_cutoff():
+        for (game_id, team_id), pct in get_pick_distribution(pool_id).pcts.items():
+            pick_pcts.setdefault(str(game_id), {})[str(team_id)] = round(pct)
+
+    data = {
+        'games': [
+            {
+                'id': game.id, 'round_id': game.round_id, 'winner_goes_to_game_id': game.winner_goes_to_game_id,
+                'team1_id': game.team1_id, 'team2_id': game.team2_id, 'winning_team_id': game.winning_team_id,
+            }
+            for game in Game.query.order_by(Game.id).all()
+        ],
+        'teams': [
+            {
+                'id': team.id, 'seed': team.seed, 'name': team.name, 'display_name': team.get_display_name(),
+                'region_id': team.region_id,
+            }
+            for team in get_team_views()
+        ],
+        'rounds': {str(round_id): {'name': name, 'points': points} for round_id, name, points in db.session.query(Round.id, Round.name, Round.points)},
+        'regions': {str(region_id): name for region_id, name in db.session.query(Region.id, Region.name)},
+        'eliminated_team_ids': sorted(get_teams_that_lost()),
+        'pick_pcts': pick_pcts,
+        'users': [
+            {'id': user_id, 'full_name': full_name}
+            for user_id, full_name in users.order_by(User.full_name).all()
+        ],
+    }
+    return data, json.dumps(data, separators=(',', ':'))
+
+
+def _cached_bundle(pool_id, include_invalid):
+    # The overlay appears at the cutoff, which bumps no generation
+    key = (pool_id, bool(include_invalid), is_after_cutoff())
+    return _bundle_cache.get(key, lambda: _build_bundle(pool_id, include_invalid), pool_id=pool_id)
+
+
+def get_bracket_bundle(pool_id, include_invalid=False):
+    """The bundle as a dict. Treat as read-only."""
+    return _cached_bundle(pool_id, include_invalid)[0]
+
+
+def get_bracket_bundle_json(pool_id, include_invalid=False):
+    """The bundle pre-serialized as compact JSON."""
+    return _cached_bundle(pool_id, include_invalid)[1]
+
+
+def user_standing(pool_id, user_id):
+    """(StandingsRow, score rank) for a pool user, or (None, None) if they aren't in the pool."""
+    snapshot = get_standings_snapshot(pool_id, valid_only=False)
+    index = snapshot.index_by_id.get(user_id)
+    if index is None:
+        return None, None
+    row = snapshot.rows[index]
+    return row, snapshot.rank_for_score(row.currentscore)
+
+
+def user_picks_payload(pool_id, user_id):
+    """{user_id, full_name, score, rank, picks} with picks[game_id - 1] = team id or None; None if not in the pool."""
+    row, rank = user_standing(pool_id, user_id)
+    if row is None:
+        return None
+    picks = load_user_picks(pool_id, user_id)
+    return {
+        'user_id': row.id,
+        'full_name': row.full_name,
+        'score': row.currentscore,
+        'rank': rank,
+        'picks': [picks.get(game_id) for game_id in range(1, GAME_COUNT + 1)],
+    }
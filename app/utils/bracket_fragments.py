@@ -0,0 +1,163 @@
+"""
+Rendered bracket-grid fragments, cached per user and tournament state.
+
+After the cutoff a user's bracket grid (63 pick cells plus the first-round team
+column) depends only on their frozen picks and the current results, yet view_picks
+rendered it, with a display-name lookup per cell, on every view. render_bracket_grid()
+renders _view_picks_grid.html once per (user_id, grid version) and keeps the HTML in a
+size-bounded LRU, so a bracket view is a dict lookup plus the page chrome.
+
+The grid version is the 'results', 'teams', 'picks' and 'scores' generations (winners,
+team slots, bracket edits and the "% picked" overlay) plus 'rounds' and 'regions' for
+the labels. Entries from an older version are dropped as soon as a newer one is stored.
+Each pool served by the process has its own LRU, keyed to its own pool-scoped version.
+
+With PRERENDER_BRACKETS set, schedule_bracket_prerender() re-renders every valid
+bracket on a background thread after results change, so the first views after a game
+don't each pay for a render. The LRU is per process; each worker warms its own.
+"""
+import threading
+from collections import OrderedDict
+
+from flask import current_app, render_template
+from markupsafe import Markup
+
+from app import db
+from app.utils import is_after_cutoff
+from app.utils.cache import get_generation
+
+GRID_GENERATIONS = ('results', 'teams', 'picks', 'scores', 'rounds', 'regions')
+
+
+class BracketGridCache:
+    """Thread-safe LRU of rendered grids keyed by (user_id, version)."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            html = self._entries.get((user_id, version))
+            if html is not None:
+                self._entries.move_to_end((user_id, version))
+            return html
+
+    def put(self, user_id, version, html, max_size):
+        with self._lock:
+            if version != self._version:
+                if self._version is not None and version < self._version:
+                    return  # A slow render from an older version: don't evict the newer entries
+                self._entries.clear()
+                self._version = version
+            self._entries[user_id, version] = html
+            self._entries.move_to_end((user_id, version))
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_grid_caches = {}
+_grid_caches_lock = threading.Lock()
+
+
+def _grid_cache(pool_id):
+    cache = _grid_caches.get(pool_id)
+    if cache is None:
+        with _grid_caches_lock:
+            cache = _grid_caches.setdefault(pool_id, BracketGridCache())
+    return cache
+
+
+def grid_version(pool_id):
+    """Tuple identifying the state a pool's rendered grids depend on."""
+    return tuple(get_generation(name, pool_id) for name in GRID_GENERATIONS)
+
+
+def _grid_context(pool_id):
+    """The per-state inputs shared by every user's grid."""
+    from app.models import Game
+    from app.routes import get_teams_that_lost, regions_dict, rounds_dict
+    from app.utils.pick_distribution import get_pick_distribution
+    from app.utils.teams import get_team_views, get_team_views_by_id
+    return {
+        'games': Game.query.order_by(Game.id).all(),
+        'teams': get_team_views(),
+        'teams_dict': get_team_views_by_id(),
+        'lost_teams': get_teams_that_lost(),
+        'rounds': rounds_dict(),
+        'regions': regions_dict(),
+        # "% of the pool picked this" overlay, once brackets are locked
+        'pick_pcts': get_pick_distribution(pool_id).pcts if is_after_cutoff() else {},
+    }
+
+
+def _render_grid(pool_id, user_id, context):
+    from app.utils.bracket_archive import load_user_picks
+    teams_dict = context['teams_dict']
+    user_picks = {
+        game_id: teams_dict[team_id]
+        for game_id, team_id in load_user_picks(pool_id, user_id).items()
+        if team_id in teams_dict
+    }
+    return Markup(render_template('_view_picks_grid.html', user_picks=user_picks, **context))
+
+
+def render_bracket_grid(pool_id, user_id):
+    """Rendered bracket grid for the user; cached after the cutoff, when brackets are frozen."""
+    if not is_after_cutoff():
+        return _render_grid(pool_id, user_id, _grid_context(pool_id))
+    version = grid_version(pool_id)
+    grid_cache = _grid_cache(pool_id)
+    html = grid_cache.get(user_id, version)
+    if html is None:
+        html = _render_grid(pool_id, user_id, _grid_context(pool_id))
+        grid_cache.put(user_id, version, html, current_app.config['BRACKET_GRID_CACHE_SIZE'])
+    return html
+
+
+def prerender_bracket_grids(pool_id):
+    """Render every valid bracket (up to the cache size) for the current state. Returns the count."""
+    from app.models import User
+    if not is_after_cutoff():
+        return 0
+    max_size = current_app.config['BRACKET_GRID_CACHE_SIZE']
+    version = grid_version(pool_id)
+    grid_cache = _grid_cache(pool_id)
+    context = _grid_context(pool_id)
+    user_ids = [
+        user_id for user_id, in db.session.query(User.id).filter(
+            User.pool_id == pool_id, User.is_bracket_valid.is_(True)
+        ).order_by(User.id).limit(max_size)
+    ]
+    for user_id in user_ids:
+        if grid_cache.get(user_id, version) is None:
+            grid_cache.put(user_id, version, _render_grid(pool_id, user_id, context), max_size)
+    return len(user_ids)
+
+
+def _prerender_in_background(app, pool_id):
+    with app.app_context():
+        try:
+            count = prerender_bracket_grids(pool_id)
+            app.logger.info('Pre-rendered %s bracket grids for pool %s', count, pool_id)
+        except Exception:
+            app.logger.exception('Bracket grid pre-render failed for pool %s', pool_id)
+        finally:
+            db.session.remove()
+
+
+def schedule_bracket_prerender(pool_id):
+    """Start a background pre-render if PRERENDER_BRACKETS is enabled. Call after results are committed."""
+    if not current_app.config.get('PRERENDER_BRACKETS'):
+        return
+    app = current_app._get_current_object()
+    threading.Thread(target=_prerender_in_background, args=(app, pool_id), daemon=True).start()
@@ -0,0 +1,263 @@
+"""
+Single-pass bracket save for make_picks.
+
+The save used to apply the form game by game through the ORM and flush. It then
+re-read the picks and the pool to validate, re-read every game, round and
+PotentialWinner row to score, committed, and counted picks twice more for the
+analytics event. save_bracket() instead:
+- reads the stored picks once, as the base for the diff,
+- resolves the submitted form against the cached bracket topology,
+- writes only the changed picks (with pick rows: one upsert for new or changed rows,
+  plus one DELETE if any were cleared; packed: one row),
+- validates and scores the new bracket in memory,
+- updates the user row, the pool's dirty flags and the generations, and commits once.
+
+The topology (games, feeders, round points, potential winners) is cached on the
+'results' and 'rounds' generations, so a save reads no games. Potential winners are
+derived from the games by the rule do_admin_update_potential_winners() writes to the
+PotentialWinner table, so scores match recalculate_standings() without reading it.
+Brackets are read and written through bracket_store, in whichever storage
+BRACKET_STORAGE selects.
+
+save_pick() is the autosave path: it changes one pick, clears the later-round picks
+it made impossible and recounts user.invalid_game_count (the bracket is valid when it
+is 0) on the topology. Both saves lock the user row before reading the bracket, so two
+tabs (or a form save racing an autosave) apply one after the other.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app import db
+from app.utils.bracket_store import read_bracket, write_bracket
+from app.utils.cache import GenerationCache, bump_generation
+
+GameNode = namedtuple('GameNode', [
+    'id', 'round_id', 'winner_goes_to_game_id', 'team1_id', 'team2_id', 'winning_team_id', 'points',
+])
+BracketSave = namedtuple('BracketSave', ['is_valid', 'games_picked', 'champion_team_id', 'changed', 'removed'])
+PickSave = namedtuple('PickSave', ['team_id', 'cleared_game_ids', 'is_valid', 'invalid_game_count', 'games_picked'])
+
+CHAMPIONSHIP_GAME_ID = 63
+
+_topology_cache = GenerationCache('results', 'rounds', name='bracket_topology', shared=True)
+
+
+class BracketTopology:
+    """Immutable snapshot of the bracket's games. Treat as read-only."""
+
+    def __init__(self, games):
+        # Game id order, as Game.query.order_by(Game.id) returns them
+        self.games = {game.id: game for game in sorted(games, key=lambda game: game.id)}
+        self.feeders = {game_id: [] for game_id in self.games}
+        for game in self.games.values():
+            if game.winner_goes_to_game_id in self.feeders:
+                self.feeders[game.winner_goes_to_game_id].append(game.id)
+        self.potential_winners = {}
+        self.candidates = {}
+        for game in self.games.values():
+            self._potential_winners(game.id)
+            self._candidates(game.id)
+
+    def _candidates(self, game_id):
+        """Teams a bracket may pick for the game at all: the round 1 teams that feed into it."""
+        candidates = self.candidates.get(game_id)
+        if candidates is None:
+            game = self.games[game_id]
+            if game.round_id == 1:
+                candidates = frozenset(team_id for team_id in (game.team1_id, game.team2_id) if team_id)
+            else:
+                candidates = frozenset().union(*(self._candidates(feeder) for feeder in self.feeders[game_id]))
+            self.candidates[game_id] = candidates
+        return candidates
+
+    def _potential_winners(self, game_id):
+        """Teams that can still win the game: the same rule as routes.get_potential_winners."""
+        winners = self.potential_winners.get(game_id)
+        if winners is None:
+            game = self.games[game_id]
+            if game.winning_team_id:
+                winners = frozenset([game.winning_team_id])
+            elif game.round_id == 1:
+                winners = frozenset(team_id for team_id in (game.team1_id, game.team2_id) if team_id)
+            else:
+                winners = frozenset().union(*(self._potential_winners(feeder) for feeder in self.feeders[game_id]))
+            self.potential_winners[game_id] = winners
+        return winners
+
+    def is_game_valid(self, game_id, picks):
+        """Whether the pick for game_id follows the rules of routes.set_is_bracket_valid. Round 1 always does."""
+        if self.games[game_id].round_id == 1:
+            return True
+        team_id = picks.get(game_id)
+        feeder_picks = [picks.get(feeder) for feeder in self.feeders[game_id]]
+        return bool(team_id) and all(feeder_picks) and team_id in feeder_picks
+
+    def invalid_games(self, picks, game_ids=None):
+        """Ids of the games (default: all) whose pick breaks the rules, in game id order."""
+        game_ids = self.games if game_ids is None else sorted(game_ids)
+        return [game_id for game_id in game_ids if not self.is_game_valid(game_id, picks)]
+
+    def downstream(self, game_id):
+        """Ids of the games the winner of game_id goes on to play, in round order."""
+        game_ids = []
+        next_game_id = self.games[game_id].winner_goes_to_game_id
+        while next_game_id in self.games:
+            game_ids.append(next_game_id)
+            next_game_id = self.games[next_game_id].winner_goes_to_game_id
+        return game_ids
+
+    def options(self, game_id, picks):
+        """Teams the bracket can pick for game_id: the two teams in round 1, the feeder picks after."""
+        game = self.games[game_id]
+        if game.round_id == 1:
+            return [team_id for team_id in (game.team1_id, game.team2_id) if team_id]
+        return [picks[feeder] for feeder in self.feeders[game_id] if picks.get(feeder)]
+
+    def score(self, picks):
+        """({round_id: points}, current score, max possible score), as routes.recalculate_standings computes them."""
+        round_scores = dict.fromkeys(range(1, 7), 0)
+        potential = 0
+        for game_id, team_id in picks.items():
+            game = self.games.get(game_id)
+            if game is None:
+                continue
+            if game.winning_team_id is not None and game.winning_team_id == team_id:
+                round_scores[game.round_id] += game.points
+            if game.winning_team_id is None and team_id in self.potential_winners[game_id]:
+                potential += game.points
+        current = sum(round_scores.values())
+        return round_scores, current, current + potential
+
+
+def _build_topology():
+    from app.models import Game, Round
+    rows = db.session.query(
+        Game.id, Game.round_id, Game.winner_goes_to_game_id, Game.team1_id, Game.team2_id, Game.winning_team_id,
+        Round.points,
+    ).join(Round, Game.round_id == Round.id)
+    return BracketTopology([GameNode(*row) for row in rows])
+
+
+def get_bracket_topology():
+    return _topology_cache.get('topology', _build_topology)
+
+
+def submitted_picks(topology, form, stored_picks):
+    """
+    {game_id: team_id} the form asks for. An empty game takes the team picked for it in a
+    later round, if that team can reach it, exactly as the per-game save did.
+    Raises ValueError for a value that isn't the id of a team that can reach the game.
+    """
+    from app.routes import get_later_round_pick, get_potential_picks
+    picks = {}
+    picks_cache = {}
+    for game in topology.games.values():
+        selected_team_id = form.get(f'game{game.id}')
+        if selected_team_id:
+            try:
+                team_id = int(selected_team_id)
+            except ValueError:
+                raise ValueError(f'Invalid pick for game {game.id}') from None
+            if team_id not in topology.candidates[game.id]:
+                raise ValueError(f'Team {team_id} cannot be picked for game {game.id}')
+            picks[game.id] = team_id
+            continue
+        later_round_pick_team_id = get_later_round_pick(game, form, topology.games)
+        if later_round_pick_team_id and later_round_pick_team_id in get_potential_picks(
+            game.id, False, topology.games, stored_picks, picks_cache
+        ):
+            picks[game.id] = later_round_pick_team_id
+    return picks
+
+
+def save_bracket(user, form):
+    """
+    Save the make_picks form for user in one transaction. Returns a BracketSave.
+    Raises ValueError, saving nothing, if the form picks a team that can't reach a game.
+    """
+    from app.routes import log_bracket_validity
+    topology = get_bracket_topology()
+    _lock_user(user)
+    stored = read_bracket(user.id)
+    picks = submitted_picks(topology, form, stored)
+
+    changed = {game_id: team_id for game_id, team_id in picks.items() if stored.get(game_id) != team_id}
+    removed = [game_id for game_id in stored if game_id not in picks]
+    write_bracket(user.id, picks, stored)
+
+    invalid_games = topology.invalid_games(picks)
+    is_valid = not invalid_games
+    _apply_bracket_state(user, topology, picks, len(invalid_games))
+    log_bracket_validity(user, is_valid, invalid_games[0] if invalid_games else None)
+    bump_generation('picks', 'scores', commit=False, pool_id=user.pool_id)
+    db.session.commit()
+    return BracketSave(is_valid, len(picks), picks.get(CHAMPIONSHIP_GAME_ID), len(changed), len(removed))
+
+
+def _lock_user(user):
+    """Lock user's row until the commit and refresh user from it."""
+    from app.models import User
+    db.session.execute(
+        select(User).where(User.id == user.id).with_for_update().execution_options(populate_existing=True)
+    )
+
+
+def _apply_bracket_state(user, topology, picks, invalid_game_count):
+    """Store the saved bracket's validity and scores on user and mark the pool's derived data dirty."""
+    from app.models import Pool
+    round_scores, current_score, max_score = topology.score(picks)
+    user.invalid_game_count = invalid_game_count
+    user.is_bracket_valid = invalid_game_count == 0
+    user.last_bracket_save = datetime.utcnow()
+    for round_id, points in round_scores.items():
+        setattr(user, f'r{round_id}score', points)
+    user.currentscore = current_score
+    user.maxpossiblescore = max_score
+
+    # Expected standings and the pick distribution are recalculated on next view
+    if user.pool_id:
+        db.session.execute(
+            update(Pool).where(Pool.id == user.pool_id).values(expected_standings_dirty=True, pick_distribution_dirty=True)
+        )
+
+
+def save_pick(user, game_id, team_id):
+    """
+    Set (or with team_id None, clear) one pick and clear the later-round picks of the team
+    it replaces, which can no longer get there. Commits. Returns a PickSave.
+    Raises ValueError if the bracket can't pick team_id for the game.
+    """
+    from app.routes import log_bracket_validity
+    topology = get_bracket_topology()
+    _lock_user(user)
+    picks = read_bracket(user.id)
+    old_team_id = picks.get(game_id)
+    if team_id is not None and team_id not in topology.options(game_id, picks):
+        raise ValueError(f'Team {team_id} cannot be picked for game {game_id}')
+    if team_id == old_team_id:
+        return PickSave(team_id, [], user.is_bracket_valid, user.invalid_game_count, len(picks))
+
+    new_picks = dict(picks)
+    if team_id is None:
+        del new_picks[game_id]
+    else:
+        new_picks[game_id] = team_id
+    cleared = []
+    if old_team_id is not None:
+        for later_game_id in topology.downstream(game_id):
+            if new_picks.get(later_game_id) == old_team_id:
+                del new_picks[later_game_id]
+                cleared.append(later_game_id)
+    invalid_games = topology.invalid_games(new_picks)
+    invalid_game_count = len(invalid_games)
+    was_valid = user.is_bracket_valid
+
+    write_bracket(user.id, new_picks, picks)
+    _apply_bracket_state(user, topology, new_picks, invalid_game_count)
+    if user.is_bracket_valid != was_valid:
+        log_bracket_validity(user, user.is_bracket_valid, invalid_games[0] if invalid_games else None)
+    bump_generation('picks', 'scores', commit=False, pool_id=user.pool_id)
+    db.session.commit()
+    return PickSave(team_id, cleared, invalid_game_count == 0, invalid_game_count, len(new_picks))
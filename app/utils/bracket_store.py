@@ -0,0 +1,352 @@
+"""
+Live bracket storage: pick rows or one packed row per user.
+
+Every bracket used to be 63 pick rows (surrogate id, user_id, game_id, team_id plus two
+indexes), so a 50k-user pool held over 3M rows and most features joined pick to user.
+packed_bracket holds the whole bracket in one row instead: 126 bytes, the team id per
+game (game_id - 1) as a little-endian uint16, 0 = no pick, the same layout as a frozen
+bracket archive entry. Rows packed before team ids went to two bytes are 63 bytes, one
+per game, and still read. A save never fails on the format: a bracket it can't hold (a
+team id above 65535) gets no packed row and goes to the pick table in every mode, and
+packed reads use the pick rows of users without a packed row.
+
+BRACKET_STORAGE picks where brackets live:
+    rows    the pick table only (default)
+    dual    writes go to both, reads come from the pick table. Run this while
+            `flask backfill-brackets` packs the existing brackets, until
+            `flask backfill-brackets --check` reports none missing or different.
+    packed  reads and writes use packed_bracket only; the pick table is left as it was,
+            apart from brackets that can't be packed
+
+Code reads and writes brackets only through this module (read_bracket,
+read_pool_brackets, iter_pool_picks, write_bracket, ...), never the Pick model
+directly, so switching modes is a config change. The Pick model stays for the rows and dual modes, and on
+PostgreSQL the bracket_pick view presents packed brackets, plus the pick rows of users
+without one, as (user_id, game_id, team_id) rows for ad-hoc SQL.
+"""
+import heapq
+import struct
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import delete, exists, func, select
+
+from app import db
+from app.utils.bracket_archive import GAME_COUNT, MAX_TEAM_ID
+
+STORAGE_MODES = ('rows', 'dual', 'packed')
+CHAMPIONSHIP_GAME_ID = 63
+PACKED_BRACKET = struct.Struct(f'<{GAME_COUNT}H')
+
+
+def storage_mode():
+    mode = current_app.config.get('BRACKET_STORAGE', 'rows')
+    if mode not in STORAGE_MODES:
+        raise ValueError(f'BRACKET_STORAGE must be one of {", ".join(STORAGE_MODES)}, not {mode!r}')
+    return mode
+
+
+def _reads_packed():
+    return storage_mode() == 'packed'
+
+
+def _writes_rows():
+    return storage_mode() in ('rows', 'dual')
+
+
+def _writes_packed():
+    return storage_mode() in ('dual', 'packed')
+
+
+def pack_bracket(picks):
+    """{game_id: team_id} -> 126 bytes. Raises ValueError for picks the format can't hold."""
+    team_ids = [0] * GAME_COUNT
+    for game_id, team_id in picks.items():
+        if not 1 <= game_id <= GAME_COUNT or not 0 < team_id <= MAX_TEAM_ID:
+            raise ValueError(f'Pick ({game_id}, {team_id}) does not fit the packed bracket format')
+        team_ids[game_id - 1] = team_id
+    return PACKED_BRACKET.pack(*team_ids)
+
+
+def _pack_or_none(picks):
+    """pack_bracket(picks), or None for a bracket only pick rows can hold."""
+    try:
+        return pack_bracket(picks)
+    except ValueError:
+        return None
+
+
+def unpack_bracket(packed):
+    """126 bytes (or a 63-byte row from the one-byte format) -> {game_id: team_id} of the picks made."""
+    team_ids = packed if len(packed) == GAME_COUNT else PACKED_BRACKET.unpack(packed)
+    return {game_id: team_id for game_id, team_id in enumerate(team_ids, 1) if team_id}
+
+
+def _insert_for_dialect(model):
+    """Dialect INSERT supporting ON CONFLICT for model's bind, or None where there is none."""
+    dialect = db.session.get_bind(mapper=model).dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+
+def _read_pick_rows(user_id):
+    from app.models import Pick
+    return dict(db.session.query(Pick.game_id, Pick.team_id).filter(Pick.user_id == user_id).all())
+
+
+def _pool_pick_rows(pool_id, valid_only, unpacked_only=False):
+    """
+    SELECT (user_id, game_id, team_id) of the pool's pick rows; with unpacked_only, just
+    those of users without a packed row (brackets the packed format can't hold).
+    """
+    from app.models import PackedBracket, Pick, User
+    query = select(Pick.user_id, Pick.game_id, Pick.team_id).join(User, Pick.user_id == User.id).where(
+        User.pool_id == pool_id
+    )
+    if valid_only:
+        query = query.where(User.is_bracket_valid.is_(True))
+    if unpacked_only:
+        query = query.where(~exists().where(PackedBracket.user_id == Pick.user_id))
+    return query
+
+
+def read_bracket(user_id):
+    """{game_id: team_id} for one user's live bracket."""
+    if _reads_packed():
+        from app.models import PackedBracket
+        packed = db.session.scalar(select(PackedBracket.picks).where(PackedBracket.user_id == user_id))
+        return unpack_bracket(packed) if packed else _read_pick_rows(user_id)
+    return _read_pick_rows(user_id)
+
+
+def read_pool_brackets(pool_id, valid_only=True):
+    """{user_id: [(game_id, team_id), ...]} for the pool's live brackets."""
+    from app.models import User
+    picks_by_user = defaultdict(list)
+    if _reads_packed():
+        from app.models import PackedBracket
+        query = db.session.query(PackedBracket.user_id, PackedBracket.picks).join(
+            User, PackedBracket.user_id == User.id
+        ).filter(User.pool_id == pool_id)
+        if valid_only:
+            query = query.filter(User.is_bracket_valid.is_(True))
+        for user_id, packed in query:
+            picks_by_user[user_id] = list(unpack_bracket(packed).items())
+        rows = _pool_pick_rows(pool_id, valid_only, unpacked_only=True)
+    else:
+        rows = _pool_pick_rows(pool_id, valid_only)
+    for user_id, game_id, team_id in db.session.execute(rows):
+        picks_by_user[user_id].append((game_id, team_id))
+    return picks_by_user
+
+
+def iter_pool_picks(pool_id, valid_only=True, batch_size=1000):
+    """
+    (user_id, game_id, team_id) for every pick in the pool's live brackets, by user then
+    game, streamed through a server-side cursor (batch_size rows or brackets per fetch).
+    """
+    from app.models import Pick, User
+    rows = _pool_pick_rows(pool_id, valid_only, unpacked_only=_reads_packed()).order_by(Pick.user_id, Pick.game_id)
+    rows = db.session.execute(rows.execution_options(yield_per=batch_size))
+    if not _reads_packed():
+        yield from rows
+        return
+
+    from app.models import PackedBracket
+    query = select(PackedBracket.user_id, PackedBracket.picks).join(
+        User, PackedBracket.user_id == User.id
+    ).where(User.pool_id == pool_id).order_by(PackedBracket.user_id)
+    if valid_only:
+        query = query.where(User.is_bracket_valid.is_(True))
+
+    def packed_picks():
+        for user_id, packed in db.session.execute(query.execution_options(yield_per=batch_size)):
+            for game_id, team_id in unpack_bracket(packed).items():
+                yield user_id, game_id, team_id
+
+    # Each user's bracket comes from exactly one of the two streams
+    yield from heapq.merge(packed_picks(), rows, key=lambda pick: (pick[0], pick[1]))
+
+
+def read_champion_picks(pool_id):
+    """{user_id: champion team_id} for every pool bracket with a championship pick."""
+    from app.models import User
+    if _reads_packed():
+        return {
+            user_id: dict(picks)[CHAMPIONSHIP_GAME_ID]
+            for user_id, picks in read_pool_brackets(pool_id, valid_only=False).items()
+            if CHAMPIONSHIP_GAME_ID in dict(picks)
+        }
+    from app.models import Pick
+    return dict(
+        db.session.query(Pick.user_id, Pick.team_id).join(User, Pick.user_id == User.id).filter(
+            User.pool_id == pool_id, Pick.game_id == CHAMPIONSHIP_GAME_ID
+        ).all()
+    )
+
+
+def count_pool_picks(pool_id):
+    """[(game_id, team_id, count)] over the pool's valid brackets."""
+    from app.models import User
+    if _reads_packed():
+        counter = Counter()
+        for picks in read_pool_brackets(pool_id).values():
+            counter.update(picks)
+        return [(game_id, team_id, count) for (game_id, team_id), count in counter.items()]
+    from app.models import Pick
+    return db.session.query(Pick.game_id, Pick.team_id, func.count(Pick.id)).join(
+        User, Pick.user_id == User.id
+    ).filter(
+        User.pool_id == pool_id,
+        User.is_bracket_valid.is_(True),
+    ).group_by(Pick.game_id, Pick.team_id).all()
+
+
+def _write_pick_rows(user_id, changed, removed):
+    """Apply a pick diff to the pick table: one upsert for new or changed picks, one DELETE for cleared games."""
+    from app.models import Pick
+    if changed:
+        rows = [{'user_id': user_id, 'game_id': game_id, 'team_id': team_id} for game_id, team_id in changed.items()]
+        statement = _insert_for_dialect(Pick)
+        if statement is not None:
+            statement = statement.values(rows)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[Pick.user_id, Pick.game_id], set_={'team_id': statement.excluded.team_id}
+            ))
+        else:
+            # No portable upsert: update the existing rows, insert the rest
+            existing = {pick.game_id: pick for pick in Pick.query.filter(Pick.user_id == user_id, Pick.game_id.in_(changed))}
+            for game_id, team_id in changed.items():
+                if game_id in existing:
+                    existing[game_id].team_id = team_id
+                else:
+                    db.session.add(Pick(user_id=user_id, game_id=game_id, team_id=team_id))
+    if removed:
+        db.session.execute(delete(Pick).where(Pick.user_id == user_id, Pick.game_id.in_(removed)))
+
+
+def _write_packed(rows):
+    """Upsert [{'user_id': ..., 'picks': bytes}] into packed_bracket in one statement."""
+    from app.models import PackedBracket
+    statement = _insert_for_dialect(PackedBracket)
+    if statement is not None:
+        statement = statement.values(rows)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[PackedBracket.user_id], set_={'picks': statement.excluded.picks}
+        ))
+        return
+    for row in rows:
+        db.session.merge(PackedBracket(**row))
+
+
+def write_bracket(user_id, picks, stored=None):
+    """
+    Replace the user's bracket with picks ({game_id: team_id}). Pass stored (the bracket
+    as read_bracket() returned it) to skip re-reading it; only changed pick rows are
+    written. Doesn't commit.
+    """
+    packed = _pack_or_none(picks) if _writes_packed() else None
+    if packed is not None:
+        _write_packed([{'user_id': user_id, 'picks': packed}])
+    elif _writes_packed():
+        # Doesn't fit the packed format: drop the packed row so reads use the pick rows
+        _delete_packed([user_id])
+    if _writes_rows() or packed is None:
+        if stored is None or _reads_packed():
+            # In packed mode stored may have come from the packed row, not the pick rows
+            stored = _read_pick_rows(user_id)
+        changed = {game_id: team_id for game_id, team_id in picks.items() if stored.get(game_id) != team_id}
+        removed = [game_id for game_id in stored if game_id not in picks]
+        _write_pick_rows(user_id, changed, removed)
+
+
+def insert_brackets(brackets):
+    """Store new brackets ({user_id: {game_id: team_id}}) for users that have none yet, in bulk. Doesn't commit."""
+    from app.models import PackedBracket, Pick
+    if not brackets:
+        return
+    packed = {}
+    if _writes_packed():
+        packed = {user_id: _pack_or_none(picks) for user_id, picks in brackets.items()}
+        packed = {user_id: picks for user_id, picks in packed.items() if picks is not None}
+        if packed:
+            db.session.execute(PackedBracket.__table__.insert(), [
+                {'user_id': user_id, 'picks': picks} for user_id, picks in packed.items()
+            ])
+    # Brackets the packed format can't hold go to the pick table in every mode
+    rows = [
+        {'user_id': user_id, 'game_id': game_id, 'team_id': team_id}
+        for user_id, picks in brackets.items() if _writes_rows() or user_id not in packed
+        for game_id, team_id in picks.items()
+    ]
+    if rows:
+        db.session.execute(Pick.__table__.insert(), rows)
+
+
+def _delete_packed(user_ids):
+    from app.models import PackedBracket
+    db.session.execute(delete(PackedBracket).where(PackedBracket.user_id.in_(user_ids)))
+
+
+def delete_brackets(user_ids):
+    """Delete the users' brackets from every store (done in all modes, so nothing is orphaned). Doesn't commit."""
+    from app.models import Pick
+    user_ids = list(user_ids)
+    if user_ids:
+        db.session.execute(delete(Pick).where(Pick.user_id.in_(user_ids)))
+        _delete_packed(user_ids)
+
+
+def backfill_packed_brackets(batch_size=1000, check=False):
+    """
+    Pack every user's pick rows into packed_bracket, batch_size users per statement.
+    Idempotent: rows already matching are rewritten unchanged. Brackets the packed format
+    can't hold get no packed row. With check, write nothing and return the ids of users
+    whose packed bracket is missing or differs.
+    Returns (users processed, mismatched user ids).
+    """
+    from app.models import PackedBracket, Pick, User
+    if not check and storage_mode() == 'packed':
+        # The pick table stopped receiving saves when packed mode began
+        raise ValueError('Backfilling with BRACKET_STORAGE=packed would overwrite brackets with stale pick rows')
+    processed = 0
+    mismatched = []
+    last_user_id = 0
+    while True:
+        user_ids = db.session.scalars(
+            select(User.id).where(User.id > last_user_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+        brackets = {user_id: {} for user_id in user_ids}
+        rows = db.session.query(Pick.user_id, Pick.game_id, Pick.team_id).filter(Pick.user_id.in_(user_ids))
+        for user_id, game_id, team_id in rows:
+            brackets[user_id][game_id] = team_id
+        packed = {user_id: _pack_or_none(picks) for user_id, picks in brackets.items()}
+        if check:
+            stored = dict(db.session.query(PackedBracket.user_id, PackedBracket.picks).filter(
+                PackedBracket.user_id.in_(user_ids)
+            ).all())
+            empty = pack_bracket({})
+            for user_id in user_ids:
+                expected = packed[user_id]
+                actual = bytes(stored[user_id]) if user_id in stored else None
+                # No row reads as an empty bracket; a bracket that can't be packed should have none
+                if actual != expected and not (actual is None and expected == empty):
+                    mismatched.append(user_id)
+        else:
+            rows = [{'user_id': user_id, 'picks': picks} for user_id, picks in packed.items() if picks is not None]
+            if rows:
+                _write_packed(rows)
+            unpackable = [user_id for user_id, picks in packed.items() if picks is None]
+            if unpackable:
+                _delete_packed(unpackable)
+            db.session.commit()
+        processed += len(user_ids)
+    return processed, mismatched
@@ -0,0 +1,333 @@
+"""
+Cross-process cache invalidation via named generation counters.
+
+Each cache is tied to a named counter in the cache_generation table. Writers bump the
+counter (normally in the same transaction as the data change); readers load every
+counter in one query at most once per request and rebuild any cache whose stored
+generation is behind. Every gunicorn worker can therefore cache aggressively and
+still see another worker's admin edit on its next request.
+
+Generations:
+- pool: pool name
+- users: pool user list (form dropdowns)
+- teams: team views and display names
+- rounds: round names/points
+- regions: region names
+- results: game winners and everything derived from them
+- winners: historical winners CSV
+- scores: user scores, expected scores, bracket validity and champion picks
+- picks: bracket contents (the frozen bracket archive)
+- pools: pool slugs used by request routing
+- log_categories: categories in the log viewer's filter
+
+'pool', 'users', 'scores' and 'picks' are pool-scoped: a bump moves the counter of one
+pool (stored as '<name>:<pool_id>', defaulting to the request's pool), and a read is
+that counter plus the legacy unscoped one. Caches of one pool therefore survive edits
+in another pool served by the same process. Pass pool_id when the pool isn't the
+request's (background threads, loops over every pool).
+
+Storage is pluggable. By default entries live in a per-process dict. Caches created
+with shared=True use the shared backend when CACHE_BACKEND=shared: entries are
+pickled to memory-mapped files under CACHE_DIR, published atomically
+(write-new-then-rename), so a rebuild done by one worker is reused by every worker
+on the host instead of being recomputed.
+
+Counters start from the same small numbers in every database, so files on the host
+are only trusted for the database that wrote them: they go in a subdirectory named
+by database_identity(), the random 'database_id' row of cache_generation (never
+bumped) plus a hash of the database URL. A reset database gets a new id. After
+restoring a backup, run `flask reset-database-id` to retire the files written since.
+"""
+import hashlib
+import mmap
+import os
+import pickle
+import re
+import secrets
+import struct
+import tempfile
+import threading
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+GENERATIONS = ('pool', 'users', 'teams', 'rounds', 'regions', 'results', 'winners', 'scores', 'picks', 'pools', 'log_categories')
+POOL_GENERATIONS = ('pool', 'users', 'scores', 'picks')
+DATABASE_ID = 'database_id'
+
+
+def get_generations():
+    """Return {name: value} for all counters, read once per request/app context."""
+    generations = g.get('_cache_generations')
+    if generations is None:
+        from app.models import CacheGeneration
+        # Always from the primary: the counters are what tells whether a replica is current
+        generations = dict(db.session.execute(
+            select(CacheGeneration.name, CacheGeneration.value), bind_arguments={'bind': db.engine}
+        ).all())
+        g._cache_generations = generations
+    return generations
+
+
+def new_database_id():
+    return secrets.randbelow(2 ** 31 - 1) + 1
+
+
+def _create_database_id():
+    """Store a database_id for a database created without the migration that adds it."""
+    from app.models import CacheGeneration
+    table = CacheGeneration.__table__
+    # Own transaction: called from read paths, whose session must not be committed here
+    with db.engine.begin() as conn:
+        if conn.dialect.name in ('postgresql', 'sqlite'):
+            if conn.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            conn.execute(insert(table).values(name=DATABASE_ID, value=new_database_id()).on_conflict_do_nothing())
+        else:
+            try:
+                with conn.begin_nested():
+                    conn.execute(table.insert().values(name=DATABASE_ID, value=new_database_id()))
+            except IntegrityError:
+                pass  # Another process stored one first
+        database_id = conn.scalar(select(table.c.value).where(table.c.name == DATABASE_ID))
+    g.pop('_cache_generations', None)
+    return database_id
+
+
+def database_identity():
+    """
+    Name of this database for files shared on the host (shared cache entries, frozen
+    bracket archives): its random database_id plus a hash of its URL.
+    """
+    database_id = get_generations().get(DATABASE_ID)
+    if database_id is None:
+        database_id = _create_database_id()
+    url = db.engine.url.render_as_string(hide_password=True)
+    return f'{database_id:08x}-{hashlib.sha1(url.encode()).hexdigest()[:8]}'
+
+
+def generation_key(name, pool_id=None):
+    """Counter row for name: '<name>:<pool_id>' for pool-scoped generations."""
+    if name not in POOL_GENERATIONS:
+        return name
+    if pool_id is None:
+        from app.utils.pools import current_pool_id
+        pool_id = current_pool_id()
+    return name if pool_id is None else f'{name}:{pool_id}'
+
+
+def get_generation(name, pool_id=None):
+    generations = get_generations()
+    key = generation_key(name, pool_id)
+    value = generations.get(name, 0)
+    return value if key == name else value + generations.get(key, 0)
+
+
+def get_committed_generation(name, pool_id=None):
+    """get_generation() as committed, read outside the request's transaction and its uncommitted bumps."""
+    from app.models import CacheGeneration
+    key = generation_key(name, pool_id)
+    with db.engine.connect() as conn:
+        values = dict(conn.execute(
+            select(CacheGeneration.name, CacheGeneration.value).where(CacheGeneration.name.in_({name, key}))
+        ).all())
+    value = values.get(name, 0)
+    return value if key == name else value + values.get(key, 0)
+
+
+def bump_generation(*names, commit=True, pool_id=None):
+    """
+    Increment the named counters so every process drops caches built on them.
+    Pool-scoped counters are bumped for pool_id (default: the request's pool).
+    Set commit=False to bump inside the caller's transaction (atomic with the data change).
+    """
+    from app.models import CacheGeneration
+    keys = sorted({generation_key(name, pool_id) for name in names})
+    dialect = db.session.get_bind(mapper=CacheGeneration).dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        # One statement, so concurrent first bumps of a pool-scoped counter can't both insert it
+        db.session.execute(
+            insert(CacheGeneration)
+            .values([{'name': key, 'value': 1} for key in keys])
+            .on_conflict_do_update(index_elements=['name'], set_={'value': CacheGeneration.value + 1})
+        )
+    else:
+        result = db.session.execute(
+            update(CacheGeneration)
+            .where(CacheGeneration.name.in_(keys))
+            .values(value=CacheGeneration.value + 1)
+        )
+        if result.rowcount < len(keys):
+            # First bump of a pool-scoped counter: create the missing rows
+            existing = set(db.session.scalars(select(CacheGeneration.name).where(CacheGeneration.name.in_(keys))))
+            for key in sorted(set(keys) - existing):
+                db.session.add(CacheGeneration(name=key, value=1))
+    # Re-read on next access so this request sees its own bump
+    g.pop('_cache_generations', None)
+    if commit:
+        db.session.commit()
+
+
+def _forget_generations(session):
+    # A rolled-back bump must not go on labelling caches built later in the request
+    if has_app_context():
+        g.pop('_cache_generations', None)
+
+
+def init_cache(session_class):
+    """Re-read the counters after a rollback (see _forget_generations)."""
+    event.listen(session_class, 'after_rollback', _forget_generations)
+
+
+class InProcessBackend:
+    """Entries held in a dict in this process."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key, generation):
+        """Return (True, value) on a hit at this generation, else (False, None)."""
+        entry = self._entries.get((namespace, key))
+        if entry is not None and entry[0] == generation:
+            return True, entry[1]
+        return False, None
+
+    def set(self, namespace, key, generation, value):
+        with self._lock:
+            self._entries[(namespace, key)] = (generation, value)
+
+    def clear(self, namespace):
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if k[0] != namespace}
+
+
+class SharedMemoryBackend:
+    """
+    Entries pickled into memory-mapped files shared by every process on the host.
+    File layout: 8-byte magic, 8-byte generation, pickle payload.
+    With memoize=True (default) each process also keeps the decoded value until the
+    generation moves, trading per-worker memory for dict-speed warm hits.
+    """
+    MAGIC = b'MMCACHE1'
+    HEADER = struct.Struct('<8sq')
+
+    def __init__(self, directory, memoize=True):
+        self.directory = directory
+        self.memoize = memoize
+        self._local = InProcessBackend()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, namespace, key):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', f'{namespace}-{key}')
+        return os.path.join(self.directory, safe + '.cache')
+
+    def get(self, namespace, key, generation):
+        if self.memoize:
+            hit, value = self._local.get(namespace, key, generation)
+            if hit:
+                return hit, value
+        try:
+            with open(self._path(namespace, key), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    magic, stored_generation = self.HEADER.unpack_from(mm)
+                    if magic != self.MAGIC or stored_generation != generation:
+                        return False, None
+                    with memoryview(mm) as view:
+                        value = pickle.loads(view[self.HEADER.size:])
+        except (OSError, ValueError, struct.error, pickle.UnpicklingError):
+            return False, None
+        if self.memoize:
+            self._local.set(namespace, key, generation, value)
+        return True, value
+
+    def set(self, namespace, key, generation, value):
+        path = self._path(namespace, key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, generation))
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)  # Readers see the old file or the new one, never a partial write
+        except BaseException:
+            # Don't leave a temp file behind for every failed attempt
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self.memoize:
+            self._local.set(namespace, key, generation, value)
+
+    def clear(self, namespace):
+        self._local.clear(namespace)
+
+
+_shared_backend = None
+_shared_memory_backends = {}
+
+
+def cache_dir():
+    """CACHE_DIR, or a madness-cache directory under the system temp dir."""
+    return current_app.config.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'madness-cache')
+
+
+def get_shared_backend():
+    """The backend for shared=True caches, chosen by CACHE_BACKEND (memory | shared)."""
+    global _shared_backend
+    if current_app.config.get('CACHE_BACKEND') == 'shared':
+        # One directory per database, so another database on the host never matches its entries
+        identity = database_identity()
+        backend = _shared_memory_backends.get(identity)
+        if backend is None:
+            backend = _shared_memory_backends[identity] = SharedMemoryBackend(os.path.join(cache_dir(), identity))
+        return backend
+    if _shared_backend is None:
+        _shared_backend = InProcessBackend()
+    return _shared_backend
+
+
+class GenerationCache:
+    """
+    Cache whose entries are valid while the named generations are unchanged.
+    Several generations may be given; counters only grow, so their sum changes
+    whenever any one is bumped. name distinguishes caches that share a generation;
+    shared=True opts the cache into the configured shared backend (values must be picklable).
+    """
+
+    def __init__(self, *generations, name=None, shared=False):
+        self.generations = generations
+        self.name = name or '+'.join(generations)
+        self.shared = shared
+        self._backend = None if shared else InProcessBackend()
+
+    @property
+    def backend(self):
+        return get_shared_backend() if self.shared else self._backend
+
+    def get(self, key, build, pool_id=None):
+        """
+        Return the cached value for key, calling build() if missing or stale.
+        pool_id selects the pool-scoped generations (default: the request's pool).
+        """
+        current = sum(get_generation(generation, pool_id) for generation in self.generations)
+        backend = self.backend
+        hit, value = backend.get(self.name, key, current)
+        if hit:
+            return value
+        value = build()
+        backend.set(self.name, key, current, value)
+        return value
+
+    def clear(self):
+        """Drop this process's entries without bumping the shared generation."""
+        self.backend.clear(self.name)
@@ -0,0 +1,119 @@
+"""
+Benchmark of cache backends across forked worker processes.
+
+The payload is what workers actually cache: team views and names, potential winners
+for every game, and a standings-sized list of (user_id, name, score, max score) rows
+for the pool. For each backend, N forked workers each fetch it once (cold) and then
+time repeated warm hits, reporting resident memory added per worker:
+
+- memory: InProcessBackend; each worker holds its own decoded copy (cold time is
+  the deserialize cost, the database rebuild is reported separately)
+- shared: SharedMemoryBackend, memoized; decoded once per worker from the mmap file
+- shared-nomemo: SharedMemoryBackend(memoize=False); every hit decodes from the
+  mmap, so workers hold only the page-cache copy shared across processes
+"""
+import multiprocessing
+import os
+import pickle
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+
+from app import db
+from app.utils.cache import InProcessBackend, SharedMemoryBackend
+
+NAMESPACE = 'benchmark'
+KEY = 'payload'
+GENERATION = 1
+
+
+def build_payload(pool_id):
+    """Collect the hot objects from the database. Returns (payload, build_ms)."""
+    from app.models import Game, User
+    from app.routes import get_potential_winners
+    from app.utils.teams import _build_team_names, _build_team_views
+
+    start = time.perf_counter()
+    payload = {
+        'team_names': _build_team_names(),
+        'team_views': _build_team_views(),
+        'potential_winners': {game.id: list(get_potential_winners(game)) for game in Game.query.all()},
+        'standings': [
+            tuple(row) for row in db.session.query(
+                User.id, User.full_name, User.currentscore, User.maxpossiblescore
+            ).filter(User.pool_id == pool_id).all()
+        ],
+    }
+    return payload, (time.perf_counter() - start) * 1000
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # ru_maxrss is a high-water mark (KiB on Linux), good enough off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _worker(backend_name, directory, blob, hits, results):
+    if backend_name == 'memory':
+        backend = InProcessBackend()
+    else:
+        backend = SharedMemoryBackend(directory, memoize=(backend_name == 'shared'))
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    hit, value = backend.get(NAMESPACE, KEY, GENERATION)
+    if not hit:
+        value = pickle.loads(blob)
+        backend.set(NAMESPACE, KEY, GENERATION, value)
+    cold_ms = (time.perf_counter() - start) * 1000
+    rss_after = _rss_bytes()
+
+    timings = []
+    for _ in range(hits):
+        start = time.perf_counter()
+        backend.get(NAMESPACE, KEY, GENERATION)
+        timings.append(time.perf_counter() - start)
+    del value
+    results.put({
+        'rss_delta': rss_after - rss_before,
+        'cold_ms': cold_ms,
+        'warm_p50_us': statistics.median(timings) * 1e6,
+        'warm_mean_us': statistics.fmean(timings) * 1e6,
+    })
+
+
+def run_cache_benchmark(payload, workers=4, hits=2000):
+    """Return one result dict per backend with per-worker averages."""
+    blob = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    ctx = multiprocessing.get_context('fork')
+    directory = tempfile.mkdtemp(prefix='madness-cache-bench-')
+    report = []
+    try:
+        for backend_name in ('memory', 'shared', 'shared-nomemo'):
+            if backend_name != 'memory':
+                # One worker's rebuild, published for everyone else
+                SharedMemoryBackend(directory, memoize=False).set(NAMESPACE, KEY, GENERATION, payload)
+            results = ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(backend_name, directory, blob, hits, results)) for _ in range(workers)]
+            for proc in procs:
+                proc.start()
+            rows = [results.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+            report.append({
+                'backend': backend_name,
+                'workers': workers,
+                'payload_bytes': len(blob),
+                'rss_delta_kib': statistics.fmean(r['rss_delta'] for r in rows) / 1024,
+                'cold_ms': statistics.fmean(r['cold_ms'] for r in rows),
+                'warm_p50_us': statistics.fmean(r['warm_p50_us'] for r in rows),
+                'warm_mean_us': statistics.fmean(r['warm_mean_us'] for r in rows),
+            })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return report
@@ -0,0 +1,92 @@
+"""
+Conditional GETs for pages that only change with tournament state.
+
+Bracket and results pages depend on game results, team ratings, brackets and scores,
+all of which bump a cache generation when they change. The tournament state version
+is the set of generation counters (one query, memoized per request) plus the cutoff
+flag; hashed together with the viewer, the URL and the deployed code it becomes the
+page's ETag. A conditional GET whose If-None-Match matches gets a 304 before the view
+runs, so a refresh costs the login lookup and the generation read, nothing else.
+
+Responses carry Cache-Control: private, no-cache so browsers always revalidate.
+"""
+import hashlib
+import os
+import time
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from app.utils import is_after_cutoff
+from app.utils.cache import get_generations
+from app.utils.pools import current_pool_id
+
+
+def _build_tag():
+    """Newest mtime of the app's code and templates: changes on every deploy."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    newest = 0
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(('.py', '.html')):
+                newest = max(newest, os.stat(os.path.join(directory, filename)).st_mtime_ns)
+    return str(newest)
+
+
+_BUILD_TAG = _build_tag()
+
+
+def tournament_state_version():
+    """Opaque string that changes whenever results, ratings, brackets or scores change."""
+    pool_id = current_pool_id()
+    # Tournament-wide counters plus this pool's; other pools' edits don't touch the page
+    generations = {
+        name: value for name, value in get_generations().items()
+        if ':' not in name or name.endswith(f':{pool_id}')
+    }
+    state = ','.join(f'{name}={generations[name]}' for name in sorted(generations))
+    return f'pool={pool_id};{state};cutoff={int(is_after_cutoff())}'
+
+
+def _page_etag(csrf):
+    parts = [
+        _BUILD_TAG,
+        tournament_state_version(),
+        request.full_path,
+        # Everything base.html shows about the viewer
+        repr((current_user.id, current_user.email, current_user.is_verified, current_user.is_admin,
+              current_user.is_super_admin, current_user.time_zone)),
+    ]
+    if csrf:
+        # Embedded CSRF tokens expire: never revalidate a page older than half their lifetime
+        time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600) or 3600
+        parts.append(str(int(time.time() // (time_limit / 2))))
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+def state_etag(csrf=False):
+    """
+    Serve GETs of the wrapped view with a tournament-state ETag and answer matching
+    conditional GETs with 304. Set csrf=True for pages embedding a CSRF-protected form.
+    Place below login_required/pool_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages are rendered into the page, so it can't be reused
+            if request.method != 'GET' or session.get('_flashes'):
+                return f(*args, **kwargs)
+            etag = _page_etag(csrf)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
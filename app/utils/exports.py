@@ -0,0 +1,88 @@
+"""
+Streamed CSV and JSON-lines bodies for download routes.
+
+The generators take an iterable of rows (normally a query executed with yield_per, so
+the database hands them over in batches through a server-side cursor). They yield text
+in chunks of about CHUNK_SIZE characters, so a download starts with the first batch
+and memory stays flat however many rows follow. gzip_chunks() compresses such a stream
+as it goes, for the '.gz' formats.
+
+export_response() puts it together for a route: any of EXPORT_FORMATS, streamed with
+stream_with_context() so the session stays open while the response is sent.
+"""
+import csv
+import io
+import json
+import zlib
+
+from flask import Response, stream_with_context
+
+CHUNK_SIZE = 64 * 1024
+EXPORT_FORMATS = ('csv', 'jsonl', 'csv.gz', 'jsonl.gz')
+
+
+def csv_chunks(header, rows):
+    """CSV text: the header row, then one line per row (a sequence of values)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    # The header goes out before the first row is fetched
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(fields, rows):
+    """One JSON object per line, keyed by fields, for each row (a sequence of values)."""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(fields, row)), default=str)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+            size = 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compressed bytes of the text chunks, compressed one chunk at a time."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if first:
+            # Send the gzip header and the first rows now rather than when the deflate block fills
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(name, fields, rows, fmt):
+    """
+    Streamed download of rows (sequences of values for fields) as name.fmt; fmt is one
+    of EXPORT_FORMATS (callers 404 others).
+    """
+    text_format, _, compression = fmt.partition('.')
+    if text_format == 'csv':
+        body, mimetype = csv_chunks(fields, rows), 'text/csv'
+    else:
+        body, mimetype = jsonl_chunks(fields, rows), 'application/x-ndjson'
+    if compression:
+        body, mimetype = gzip_chunks(body), 'application/gzip'
+    return Response(
+        stream_with_context(body), mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'},
+    )
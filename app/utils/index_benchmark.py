@@ -0,0 +1,205 @@
+"""
+EXPLAIN benchmark for the hot-query indexes.
+
+Builds the schema from the models in a scratch database (a temporary SQLite file by
+default, or any empty database URL), seeds a large synthetic pool, then for each hot
+query prints the plan and median timing first without the indexes added by migration
+b6e1d4f8a273 and again with them. Never point it at the app's own database: it drops
+and recreates indexes and fills tables with synthetic rows.
+"""
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from app import db
+
+HOT_INDEXES = (
+    'uq_pick_user_id_game_id', 'ix_pick_game_id_team_id',
+    'ix_user_pool_id_is_bracket_valid', 'ix_user_pool_id_lower_email', 'ix_user_reset_code',
+    'ix_log_entry_timestamp', 'ix_log_entry_category_timestamp',
+    'ix_post_thread_id_created_at', 'ix_game_winner_goes_to_game_id',
+)
+
+POOL_ID = 1
+LOG_CATEGORIES = ('Login', 'Save Picks', 'View Picks', 'Standings', 'Password Reset', 'Admin')
+
+
+def _tables():
+    from app import models
+    return {
+        name: getattr(models, name).__table__
+        for name in ('Pool', 'User', 'Round', 'Region', 'Team', 'Game', 'Pick', 'LogEntry', 'Thread', 'Post')
+    }
+
+
+def _hot_indexes():
+    indexes = {}
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name in HOT_INDEXES:
+                indexes[index.name] = index
+    return [indexes[name] for name in HOT_INDEXES]
+
+
+def seed(engine, users=20000, log_entries=200000, threads=200, posts=50000, seed=0):
+    """Create the schema and fill it with a synthetic pool."""
+    t = _tables()
+    db.metadata.create_all(engine)
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(t['Pool']), [{'id': POOL_ID, 'name': 'Benchmark Pool'}])
+        conn.execute(insert(t['Round']), [{'id': r, 'name': f'Round {r}', 'points': 2 ** (r - 1)} for r in range(1, 7)])
+        conn.execute(insert(t['Region']), [{'id': r, 'name': f'Region {r}'} for r in range(1, 5)])
+        conn.execute(insert(t['Team']), [
+            {'id': i, 'name': f'Team {i}', 'seed': (i - 1) % 16 + 1, 'region_id': (i - 1) // 16 + 1}
+            for i in range(1, 65)
+        ])
+        # Standard 63-game tree: games 1-32 are round 1, each pair feeds the next round
+        games = []
+        first, size = 1, 32
+        for round_id in range(1, 7):
+            for offset in range(size):
+                game_id = first + offset
+                games.append({
+                    'id': game_id, 'round_id': round_id,
+                    'winner_goes_to_game_id': first + size + offset // 2 if size > 1 else None,
+                    'team1_id': 2 * game_id - 1 if round_id == 1 else None,
+                    'team2_id': 2 * game_id if round_id == 1 else None,
+                })
+            first, size = first + size, size // 2
+        conn.execute(insert(t['Game']), sorted(games, key=lambda g: -g['id']))
+
+        conn.execute(insert(t['User']), [
+            {
+                'id': i, 'email': f'User{i}@Example.com', 'full_name': f'User {i}', 'password_hash': 'x',
+                'pool_id': POOL_ID, 'is_bracket_valid': rng.random() < 0.9, 'is_verified': True,
+                'reset_code': os.urandom(16).hex() if rng.random() < 0.02 else None,
+            }
+            for i in range(1, users + 1)
+        ])
+        feeders = {}
+        for game in games:
+            if game['winner_goes_to_game_id']:
+                feeders.setdefault(game['winner_goes_to_game_id'], []).append(game['id'])
+        batch = []
+        for user_id in range(1, users + 1):
+            picks = {}
+            for game in sorted(games, key=lambda g: g['id']):
+                if game['id'] in feeders:
+                    picks[game['id']] = picks[rng.choice(feeders[game['id']])]
+                else:
+                    picks[game['id']] = rng.choice((game['team1_id'], game['team2_id']))
+            batch.extend({'user_id': user_id, 'game_id': g, 'team_id': team} for g, team in picks.items())
+            if len(batch) >= 50000:
+                conn.execute(insert(t['Pick']), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(t['Pick']), batch)
+
+        conn.execute(insert(t['LogEntry']), [
+            {
+                'timestamp': now - timedelta(seconds=rng.randrange(90 * 86400)),
+                'category': rng.choice(LOG_CATEGORIES),
+                'current_user_id': rng.randrange(1, users + 1),
+                'description': 'Synthetic log entry',
+            }
+            for _ in range(log_entries)
+        ])
+        conn.execute(insert(t['Thread']), [
+            {'id': i, 'title': f'Thread {i}', 'creator_id': rng.randrange(1, users + 1), 'created_at': now, 'hidden': False}
+            for i in range(1, threads + 1)
+        ])
+        conn.execute(insert(t['Post']), [
+            {
+                'content': 'Synthetic post', 'author_id': rng.randrange(1, users + 1),
+                'thread_id': rng.randrange(1, threads + 1), 'hidden': False,
+                'created_at': now - timedelta(seconds=rng.randrange(90 * 86400)),
+            }
+            for _ in range(posts)
+        ])
+
+
+def hot_queries(users):
+    """(label, statement) for the query shapes the indexes target."""
+    t = _tables()
+    user, pick, log, post, game = t['User'], t['Pick'], t['LogEntry'], t['Post'], t['Game']
+    some_user = users // 2
+    return [
+        ('picks of one user', select(pick.c.game_id, pick.c.team_id).where(pick.c.user_id == some_user)),
+        ('one pick (save)', select(pick.c.id).where(pick.c.user_id == some_user, pick.c.game_id == 40)),
+        ('who picked a team', select(func.count()).select_from(pick).where(pick.c.game_id == 63, pick.c.team_id == 1)),
+        ('valid brackets', select(user.c.id).where(user.c.pool_id == POOL_ID, user.c.is_bracket_valid.is_(True))),
+        ('login by email', select(user.c.id).where(
+            user.c.pool_id == POOL_ID, func.lower(user.c.email) == f'user{some_user}@example.com'
+        )),
+        ('reset code', select(user.c.id).where(user.c.reset_code == 'no-such-code')),
+        ('latest logs', select(log.c.id).order_by(log.c.timestamp.desc()).limit(100)),
+        ('latest logs in category', select(log.c.id).where(log.c.category == 'Save Picks').order_by(log.c.timestamp.desc()).limit(100)),
+        ('thread posts', select(post.c.id).where(post.c.thread_id == 7).order_by(post.c.created_at.desc())),
+        ('feeder games', select(game.c.id).where(game.c.winner_goes_to_game_id == 63)),
+    ]
+
+
+def _explain(conn, statement):
+    sql = str(statement.compile(conn, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = conn.execute(text(prefix + sql)).fetchall()
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def _time(conn, statement, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(statement).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def measure(engine, users, repeat=20):
+    """{label: (plan lines, median ms)} for every hot query."""
+    with engine.connect() as conn:
+        # Fresh statistics so the planner sees the seeded row counts
+        conn.execute(text('ANALYZE'))
+        return {label: (_explain(conn, statement), _time(conn, statement, repeat)) for label, statement in hot_queries(users)}
+
+
+def run_index_benchmark(database_url=None, users=20000, log_entries=200000, repeat=20, echo=print):
+    """Seed a scratch database and print plans and timings without and with the hot indexes."""
+    directory = None
+    if database_url is None:
+        directory = tempfile.mkdtemp(prefix='madness-index-bench-')
+        database_url = f'sqlite:///{os.path.join(directory, "bench.db")}'
+    engine = create_engine(database_url)
+    try:
+        start = time.perf_counter()
+        seed(engine, users=users, log_entries=log_entries)
+        echo(f'Seeded {users} users, {users * 63} picks, {log_entries} log entries in {time.perf_counter() - start:.1f} s ({engine.dialect.name})')
+
+        indexes = _hot_indexes()
+        for index in indexes:
+            index.drop(engine)
+        before = measure(engine, users, repeat)
+        for index in indexes:
+            index.create(engine)
+        after = measure(engine, users, repeat)
+
+        for label, (plan_before, ms_before) in before.items():
+            plan_after, ms_after = after[label]
+            echo(f'\n== {label}: {ms_before:.3f} ms -> {ms_after:.3f} ms')
+            echo('   before: ' + ' | '.join(plan_before))
+            echo('   after:  ' + ' | '.join(plan_after))
+        return before, after
+    finally:
+        engine.dispose()
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,277 @@
+"""
+Log entry retention: monthly partitions and compressed archives.
+
+log_entry used to keep every entry of every season, and the log viewer, analytics and
+user deletion scanned all of it. `flask archive-logs` (run monthly) now keeps only the
+current month and the LOG_RETENTION_MONTHS - 1 months before it. Each older month is
+moved into log_archive as one row: the month's entries as gzipped JSON lines, in id
+order, together with its entry count and categories.
+
+On PostgreSQL log_entry is partitioned by month on timestamp (migration f3b8d2a7c910).
+Partitions are named log_entry_yYYYYmMM, and log_entry_default catches anything outside
+them. Archiving a month detaches its partition, copies the partition out and drops it,
+so no DELETE runs over the hot table. The job also creates the partitions for the next
+PARTITION_MONTHS_AHEAD months, moving any rows the default partition already holds for
+them. SQLite has no partitioning: there the job archives a month by range-deleting it
+through the timestamp index.
+
+archived_log_entries() reads archives back for the log viewer. It only decompresses the
+archives of months that overlap the requested date range, newest month first, and stops
+once it has enough entries. A month archived twice (late entries) gets a second gzip
+member appended to its data, and the gzip format reads that as one stream.
+"""
+import gzip
+import heapq
+import io
+import json
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, text
+
+from app import db
+
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_NAME = re.compile(r'^log_entry_y(\d{4})m(\d{2})$')
+
+ArchivedLogEntry = namedtuple('ArchivedLogEntry', ['id', 'timestamp', 'category', 'current_user_id', 'description'])
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _month_datetime(month):
+    return datetime(month.year, month.month, 1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def retention_boundary(months=None, now=None):
+    """First month kept in log_entry: the current month and the months - 1 before it."""
+    if months is None:
+        months = current_app.config.get('LOG_RETENTION_MONTHS', 6)
+    return add_months(month_start(now or datetime.utcnow()), -(max(months, 1) - 1))
+
+
+def is_partitioned():
+    """Whether log_entry is a partitioned PostgreSQL table."""
+    from app.models import LogEntry
+    if db.session.get_bind(mapper=LogEntry).dialect.name != 'postgresql':
+        return False
+    return bool(db.session.scalar(text(
+        "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = to_regclass('log_entry')"
+    )))
+
+
+def _partition_name(month):
+    return f'log_entry_y{month.year}m{month.month:02d}'
+
+
+def log_partitions():
+    """{month: table name} for log_entry's monthly partitions."""
+    names = db.session.scalars(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'log_entry'
+    """))
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_log_partitions(first_month, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Create the monthly partitions from first_month through months_ahead months after
+    the current one, moving the rows the default partition holds for them. Commits.
+    Returns the names created.
+    """
+    existing = log_partitions()
+    last_month = add_months(month_start(datetime.utcnow()), months_ahead)
+    created = []
+    month = first_month
+    while month <= last_month:
+        if month not in existing:
+            name = _partition_name(month)
+            bounds = {'start': month, 'end': add_months(month, 1)}
+            db.session.execute(text(f'CREATE TABLE {name} (LIKE log_entry INCLUDING DEFAULTS)'))
+            # Attaching checks the default partition holds nothing in the new range
+            db.session.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM log_entry_default WHERE timestamp >= :start AND timestamp < :end
+                    RETURNING id, timestamp, category, current_user_id, description
+                )
+                INSERT INTO {name} (id, timestamp, category, current_user_id, description) SELECT * FROM moved
+            """), bounds)
+            db.session.execute(text(
+                f"ALTER TABLE log_entry ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            ))
+            db.session.commit()
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def _append_archive(month, rows):
+    """Add rows (oldest first) to the month's archive. Doesn't commit. Returns the number added."""
+    from app.models import LogArchive
+    buffer = io.BytesIO()
+    categories = set()
+    count = 0
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        for row in rows:
+            f.write(json.dumps({
+                'id': row.id, 'timestamp': row.timestamp.isoformat(), 'category': row.category,
+                'user_id': row.current_user_id, 'description': row.description,
+            }).encode() + b'\n')
+            categories.add(row.category)
+            count += 1
+    if not count:
+        return 0
+    archive = db.session.get(LogArchive, month)
+    if archive is None:
+        db.session.add(LogArchive(
+            month=month, entry_count=count, categories=json.dumps(sorted(categories)), data=buffer.getvalue(),
+        ))
+    else:
+        archive.data = archive.data + buffer.getvalue()
+        archive.entry_count += count
+        archive.categories = json.dumps(sorted(categories.union(json.loads(archive.categories))))
+        archive.archived_at = datetime.utcnow()
+    return count
+
+
+def archive_log_entries(months=None, dry_run=False):
+    """
+    Move every whole month before the retention boundary from log_entry into log_archive,
+    one transaction per month, then make sure the kept months have partitions.
+    Returns [(month, entries)] for the months archived (or, with dry_run, that would be).
+    """
+    from app.models import LogEntry
+    boundary = retention_boundary(months)
+    partitioned = is_partitioned()
+    columns = [LogEntry.id, LogEntry.timestamp, LogEntry.category, LogEntry.current_user_id, LogEntry.description]
+    archived = []
+
+    if partitioned:
+        for month, name in sorted(log_partitions().items()):
+            if month >= boundary:
+                continue
+            if dry_run:
+                archived.append((month, db.session.scalar(text(f'SELECT count(*) FROM {name}'))))
+                continue
+            db.session.execute(text(f'ALTER TABLE log_entry DETACH PARTITION {name}'))
+            rows = db.session.execute(text(
+                f'SELECT id, timestamp, category, current_user_id, description FROM {name} ORDER BY id'
+            ))
+            archived.append((month, _append_archive(month, rows)))
+            db.session.execute(text(f'DROP TABLE {name}'))
+            db.session.commit()
+
+    # Older rows not in a partition of their own: the whole table on SQLite, the default partition on PostgreSQL
+    counted = {month for month, _ in archived}  # A dry run leaves the old partitions attached
+    boundary_at = _month_datetime(boundary)
+    oldest = db.session.scalar(select(func.min(LogEntry.timestamp)).where(LogEntry.timestamp < boundary_at))
+    while oldest is not None:
+        month = month_start(oldest)
+        month_end = _month_datetime(add_months(month, 1))
+        in_month = (LogEntry.timestamp >= _month_datetime(month), LogEntry.timestamp < month_end)
+        if dry_run:
+            if month not in counted:
+                archived.append((month, db.session.scalar(select(func.count()).select_from(LogEntry).where(*in_month))))
+        else:
+            rows = db.session.execute(select(*columns).where(*in_month).order_by(LogEntry.id)).all()
+            archived.append((month, _append_archive(month, rows)))
+            db.session.execute(delete(LogEntry).where(*in_month))
+            db.session.commit()
+        oldest = db.session.scalar(
+            select(func.min(LogEntry.timestamp)).where(LogEntry.timestamp >= month_end, LogEntry.timestamp < boundary_at)
+        )
+
+    if partitioned and not dry_run:
+        ensure_log_partitions(boundary)
+    return sorted(archived)
+
+
+def read_archive(archive):
+    """Yield the archive's entries as ArchivedLogEntry, in id order."""
+    with gzip.GzipFile(fileobj=io.BytesIO(archive.data)) as f:
+        for line in f:
+            entry = json.loads(line)
+            yield ArchivedLogEntry(
+                entry['id'], datetime.fromisoformat(entry['timestamp']), entry['category'], entry['user_id'],
+                entry['description'],
+            )
+
+
+def _archive_months(start, end, descending):
+    from app.models import LogArchive
+    query = select(LogArchive.month).order_by(LogArchive.month.desc() if descending else LogArchive.month)
+    if start is not None:
+        query = query.where(LogArchive.month >= month_start(start))
+    if end is not None:
+        query = query.where(LogArchive.month <= month_start(end))
+    return db.session.scalars(query).all()
+
+
+def _matching_entries(month, user_ids, start, end, category, before=None):
+    from app.models import LogArchive
+    archive = db.session.get(LogArchive, month)
+    entries = [
+        entry for entry in read_archive(archive)
+        if entry.current_user_id in user_ids and (category is None or entry.category == category)
+        and (start is None or entry.timestamp >= start) and (end is None or entry.timestamp < end)
+        and (before is None or (entry.timestamp, entry.id) < before)
+    ]
+    db.session.expunge(archive)
+    return entries
+
+
+def archived_log_entries(limit, user_ids, start=None, end=None, category=None, before=None):
+    """
+    Up to limit archived entries newest first, from users in user_ids (None in it matches
+    system entries), within [start, end), in category and before the (timestamp, id) key
+    before when given.
+    """
+    if before is not None:
+        end = before[0] if end is None else min(end, before[0] + timedelta(microseconds=1))
+    entries = []
+    for month in _archive_months(start, end, descending=True):
+        if len(entries) >= limit:
+            break
+        matching = _matching_entries(month, user_ids, start, end, category, before)
+        entries.extend(heapq.nlargest(limit - len(entries), matching, key=lambda entry: (entry.timestamp, entry.id)))
+    return entries
+
+
+def iter_archived_log_entries(user_ids, start=None, end=None, category=None):
+    """Every archived entry matching the filters of archived_log_entries(), oldest first, one month in memory at a time."""
+    for month in _archive_months(start, end, descending=False):
+        yield from sorted(
+            _matching_entries(month, user_ids, start, end, category), key=lambda entry: (entry.timestamp, entry.id)
+        )
+
+
+def delete_archived_user_entries(user_id):
+    """Rewrite the archives without the user's entries, as deleting a user deletes their log entries. Doesn't commit."""
+    from app.models import LogArchive
+    for month in db.session.scalars(select(LogArchive.month)).all():
+        archive = db.session.get(LogArchive, month)
+        entries = list(read_archive(archive))
+        kept = [entry for entry in entries if entry.current_user_id != user_id]
+        if len(kept) == len(entries):
+            db.session.expunge(archive)
+            continue
+        db.session.delete(archive)
+        db.session.flush()
+        _append_archive(month, kept)
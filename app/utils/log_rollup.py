@@ -0,0 +1,237 @@
+"""
+Per-minute log analytics rollup.
+
+admin_analytics used to GROUP BY a date_trunc/timezone expression over every raw
+log_entry row of the category on each chart refresh. That SQL was PostgreSQL only.
+log_rollup instead keeps one row per (UTC minute, category). Each row holds the event
+count and a HyperLogLog sketch of the users behind those events, so unique users can
+be merged across minutes. The audit log writer folds every batch it writes into
+log_rollup (see audit_log). `flask rebuild-log-rollup` recomputes it from log_entry and
+the archived months; archiving a month leaves its rollup rows in place.
+
+rollup_series() builds a chart at any granularity. It reads only the category's minute
+buckets and shifts each one to the admin's time zone, then adds up counts and merges
+sketches per period. The work grows with the number of buckets, not events, and it is
+plain Python over plain columns, so PostgreSQL and SQLite give identical results.
+
+Sketches use 2**PRECISION registers (standard error about 3%; small counts are near
+exact through linear counting). A sketch with few users is stored sparse, as (register,
+value) pairs, so a typical minute bucket is a few bytes rather than 1 KB.
+"""
+import math
+import struct
+from collections import namedtuple
+
+from sqlalchemy import bindparam, delete, select, tuple_, update
+
+from app import db
+
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+SPARSE, DENSE = 0, 1
+PAIR = struct.Struct('<HB')
+REBUILD_BATCH_SIZE = 5000
+
+RollupPoint = namedtuple('RollupPoint', ['period', 'event_count', 'unique_users'])
+
+
+def _hash64(value):
+    """splitmix64 finalizer: spreads consecutive user ids over all 64 bits."""
+    value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch over integer ids."""
+
+    def __init__(self, registers=None):
+        self.registers = registers if registers is not None else bytearray(REGISTERS)
+
+    def add(self, value):
+        hashed = _hash64(value)
+        index = hashed >> (64 - PRECISION)
+        rest = hashed & ((1 << (64 - PRECISION)) - 1)
+        rank = (64 - PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, data):
+        """Fold in a serialized sketch (register-wise max)."""
+        registers = self.registers
+        if not data:
+            return
+        if data[0] == SPARSE:
+            for index, rank in PAIR.iter_unpack(data[1:]):
+                if rank > registers[index]:
+                    registers[index] = rank
+        else:
+            for index, rank in enumerate(data[1:]):
+                if rank > registers[index]:
+                    registers[index] = rank
+
+    def estimate(self):
+        registers = self.registers
+        zeros = registers.count(0)
+        if zeros == REGISTERS:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+        estimate = alpha * REGISTERS * REGISTERS / sum(2.0 ** -rank for rank in registers)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return round(estimate)
+
+    def serialize(self):
+        pairs = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if len(pairs) * PAIR.size < REGISTERS:
+            return bytes([SPARSE]) + b''.join(PAIR.pack(index, rank) for index, rank in pairs)
+        return bytes([DENSE]) + bytes(self.registers)
+
+    @classmethod
+    def from_serialized(cls, data):
+        sketch = cls()
+        sketch.merge(data)
+        return sketch
+
+
+def _insert_ignore(connection, table, rows):
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    connection.execute(insert(table).values(rows).on_conflict_do_nothing())
+
+
+def apply_log_rollup(connection, rows):
+    """
+    Fold log entry rows (dicts with timestamp, category and current_user_id) into
+    log_rollup, inside the connection's transaction.
+    """
+    from app.models import LogRollup
+    table = LogRollup.__table__
+    buckets = {}
+    for row in rows:
+        key = (row['timestamp'].replace(second=0, microsecond=0), row['category'])
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [0, HyperLogLog()]
+        bucket[0] += 1
+        if row['current_user_id'] is not None:
+            bucket[1].add(row['current_user_id'])
+    if not buckets:
+        return
+
+    keys = sorted(buckets)
+    # Create missing buckets first: the insert takes SQLite's write lock, and on PostgreSQL
+    # the rows then exist to be locked, so concurrent writers merge one after the other
+    _insert_ignore(connection, table, [
+        {'minute': minute, 'category': category, 'event_count': 0, 'user_sketch': bytes([SPARSE])}
+        for minute, category in keys
+    ])
+    stored = connection.execute(
+        select(table.c.minute, table.c.category, table.c.event_count, table.c.user_sketch)
+        .where(tuple_(table.c.minute, table.c.category).in_(keys))
+        .order_by(table.c.minute, table.c.category)
+        .with_for_update()
+    )
+    updates = []
+    for minute, category, event_count, user_sketch in stored:
+        count, sketch = buckets[(minute, category)]
+        sketch.merge(user_sketch)
+        updates.append({
+            'b_minute': minute, 'b_category': category, 'b_count': event_count + count,
+            'b_sketch': sketch.serialize(),
+        })
+    connection.execute(
+        update(table)
+        .where(table.c.minute == bindparam('b_minute'), table.c.category == bindparam('b_category'))
+        .values(event_count=bindparam('b_count'), user_sketch=bindparam('b_sketch')),
+        updates,
+    )
+
+
+def _entries_to_rebuild(since):
+    """(timestamp, category, current_user_id) of every entry from since on: archived months, then log_entry."""
+    from app.models import LogArchive, LogEntry
+    from app.utils.log_archive import month_start, read_archive
+    months = select(LogArchive.month).order_by(LogArchive.month)
+    if since is not None:
+        months = months.where(LogArchive.month >= month_start(since))
+    for month in db.session.scalars(months).all():
+        archive = db.session.get(LogArchive, month)
+        for entry in read_archive(archive):
+            if since is None or entry.timestamp >= since:
+                yield entry.timestamp, entry.category, entry.current_user_id
+        # One month's archive in memory at a time
+        db.session.expunge(archive)
+    query = select(LogEntry.timestamp, LogEntry.category, LogEntry.current_user_id)
+    if since is not None:
+        query = query.where(LogEntry.timestamp >= since)
+    yield from db.session.execute(query.execution_options(yield_per=REBUILD_BATCH_SIZE))
+
+
+def rebuild_log_rollup(since=None):
+    """
+    Recompute log_rollup from log_entry and the archives, for minutes from since on
+    (default all). Commits. Returns the number of entries rolled up.
+    """
+    from app.models import LogRollup
+    clear = delete(LogRollup)
+    if since is not None:
+        since = since.replace(second=0, microsecond=0)
+        clear = clear.where(LogRollup.minute >= since)
+    db.session.execute(clear)
+    total = 0
+    batch = []
+    for timestamp, category, user_id in _entries_to_rebuild(since):
+        batch.append({'timestamp': timestamp, 'category': category, 'current_user_id': user_id})
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            apply_log_rollup(db.session.connection(), batch)
+            total += len(batch)
+            batch = []
+    apply_log_rollup(db.session.connection(), batch)
+    total += len(batch)
+    db.session.commit()
+    return total
+
+
+def _period_start(local_minute, granularity):
+    if granularity >= 1440:
+        return local_minute.replace(hour=0, minute=0)
+    if granularity >= 60:
+        return local_minute.replace(minute=0)
+    return local_minute.replace(minute=local_minute.minute // granularity * granularity)
+
+
+def rollup_series(category, since, granularity, tz):
+    """
+    [RollupPoint] per granularity-minute period in tz (naive local period starts, as the
+    chart labels them) for the category's events from since (naive UTC) on.
+    """
+    import pytz
+    from app.models import LogRollup
+    rows = db.session.execute(
+        select(LogRollup.minute, LogRollup.event_count, LogRollup.user_sketch)
+        .where(LogRollup.category == category, LogRollup.minute >= since)
+        .order_by(LogRollup.minute)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    offsets = {}
+    periods = {}
+    for minute, event_count, user_sketch in rows:
+        # Zone offsets (and their changes) fall on UTC quarter hours, so look one up per quarter
+        quarter = minute.replace(minute=minute.minute // 15 * 15)
+        offset = offsets.get(quarter)
+        if offset is None:
+            offset = offsets[quarter] = pytz.utc.localize(quarter).astimezone(tz).utcoffset()
+        period = _period_start(minute + offset, granularity)
+        point = periods.get(period)
+        if point is None:
+            point = periods[period] = [0, HyperLogLog()]
+        point[0] += event_count
+        point[1].merge(user_sketch)
+    return [
+        RollupPoint(period, event_count, sketch.estimate())
+        for period, (event_count, sketch) in sorted(periods.items())
+    ]
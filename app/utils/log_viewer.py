@@ -0,0 +1,143 @@
+"""
+Log viewer queries: cached filter choices, keyset pages and streamed exports.
+
+admin_view_logs used to load up to 10,000 ORM entries, lazy-load each entry's user and
+re-run DISTINCT queries for the user and category dropdowns on every view. Now:
+- the user and category choices are cached ('users' and 'log_categories' generations).
+  Categories come from the log_category table, which log_event() extends, and bumps the
+  generation for, the first time a category is logged.
+- log_page() returns one page newest first, ordered by the (timestamp, id) keyset, with
+  the user's name joined in the same query. A cursor from the last row fetches the next
+  page through the timestamp index, however deep the page is.
+- iter_log_rows() yields every matching entry oldest first, with a server-side cursor
+  (yield_per), for the CSV / JSON-lines export.
+Both read the archived months as well when a date range is given (see log_archive).
+"""
+from collections import namedtuple
+
+from sqlalchemy import or_, select, tuple_
+
+from app import db
+from app.utils.cache import GenerationCache, bump_generation
+from app.utils.log_archive import archived_log_entries, iter_archived_log_entries
+
+SYSTEM = 'system'
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ['id', 'timestamp', 'user_id', 'user_name', 'category', 'description']
+
+LogRow = namedtuple('LogRow', ['id', 'timestamp', 'category', 'current_user_id', 'description', 'user_name'])
+LogFilter = namedtuple('LogFilter', ['user', 'category', 'start', 'end'])
+
+_log_users_cache = GenerationCache('users', name='log_users')
+_log_categories_cache = GenerationCache('log_categories')
+
+
+def log_filter_users(pool_id):
+    """[(user id, full name)] of the pool's users by name, for the user filter."""
+    from app.models import User
+
+    def build():
+        return [tuple(row) for row in db.session.execute(
+            select(User.id, User.full_name).where(User.pool_id == pool_id).order_by(User.full_name, User.id)
+        )]
+    return _log_users_cache.get(pool_id, build, pool_id=pool_id)
+
+
+def log_categories():
+    """Every category ever logged, sorted."""
+    from app.models import LogCategory
+    return _log_categories_cache.get('names', lambda: db.session.scalars(select(LogCategory.name).order_by(LogCategory.name)).all())
+
+
+def note_log_category(category):
+    """Add a category the filter doesn't list yet, in the caller's transaction."""
+    from app.models import LogCategory
+    if category in log_categories():
+        return
+    if db.session.get_bind(mapper=LogCategory).dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    # Another worker may add the same category first
+    db.session.execute(insert(LogCategory).values(name=category).on_conflict_do_nothing())
+    bump_generation('log_categories', commit=False)
+
+
+def _user_ids(pool_id, user):
+    """The current_user_id values the user filter matches, for filtering archived entries."""
+    if user == SYSTEM:
+        return {None}
+    pool_user_ids = {user_id for user_id, _ in log_filter_users(pool_id)}
+    if user is None:
+        return {None} | pool_user_ids
+    return {user} & pool_user_ids
+
+
+def _log_query(pool_id, log_filter):
+    from app.models import LogEntry, User
+    query = select(
+        LogEntry.id, LogEntry.timestamp, LogEntry.category, LogEntry.current_user_id, LogEntry.description,
+        User.full_name,
+    ).outerjoin(User, LogEntry.current_user_id == User.id).where(
+        or_(LogEntry.current_user_id.is_(None), User.pool_id == pool_id)
+    )
+    if log_filter.user == SYSTEM:
+        query = query.where(LogEntry.current_user_id.is_(None))
+    elif log_filter.user is not None:
+        query = query.where(LogEntry.current_user_id == log_filter.user)
+    if log_filter.category:
+        query = query.where(LogEntry.category == log_filter.category)
+    if log_filter.start:
+        query = query.where(LogEntry.timestamp >= log_filter.start)
+    if log_filter.end:
+        query = query.where(LogEntry.timestamp < log_filter.end)
+    return query
+
+
+def _archived_rows(pool_id, entries):
+    names = dict(log_filter_users(pool_id))
+    return [
+        LogRow(entry.id, entry.timestamp, entry.category, entry.current_user_id, entry.description,
+               names.get(entry.current_user_id))
+        for entry in entries
+    ]
+
+
+def log_page(pool_id, log_filter, limit, after=None):
+    """
+    (rows, has_more): up to limit LogRows newest first. after is the (timestamp, id) of
+    the previous page's last row.
+    """
+    from app.models import LogEntry
+    query = _log_query(pool_id, log_filter).order_by(LogEntry.timestamp.desc(), LogEntry.id.desc()).limit(limit + 1)
+    if after is not None:
+        query = query.where(tuple_(LogEntry.timestamp, LogEntry.id) < tuple_(*after))
+    rows = [LogRow(*row) for row in db.session.execute(query)]
+    # Archived months are older than anything left in log_entry: read them only to fill a date range
+    if len(rows) <= limit and (log_filter.start or log_filter.end):
+        before = (rows[-1].timestamp, rows[-1].id) if rows else after
+        rows.extend(_archived_rows(pool_id, archived_log_entries(
+            limit + 1 - len(rows), _user_ids(pool_id, log_filter.user), log_filter.start, log_filter.end,
+            log_filter.category, before=before,
+        )))
+    return rows[:limit], len(rows) > limit
+
+
+def iter_log_rows(pool_id, log_filter):
+    """Every matching LogRow oldest first: archived months (with a date range), then log_entry, streamed."""
+    from app.models import LogEntry
+    if log_filter.start or log_filter.end:
+        names = dict(log_filter_users(pool_id))
+        for entry in iter_archived_log_entries(
+            _user_ids(pool_id, log_filter.user), log_filter.start, log_filter.end, log_filter.category
+        ):
+            yield LogRow(entry.id, entry.timestamp, entry.category, entry.current_user_id, entry.description,
+                         names.get(entry.current_user_id))
+    query = _log_query(pool_id, log_filter).order_by(LogEntry.timestamp, LogEntry.id)
+    for row in db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+        yield LogRow(*row)
+
+
+def export_row(row):
+    """Values for EXPORT_FIELDS; timestamps are UTC."""
+    return [row.id, row.timestamp.isoformat(), row.current_user_id, row.user_name or 'System', row.category, row.description]
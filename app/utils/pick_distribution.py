@@ -0,0 +1,207 @@
+"""
+Materialized pick distribution: how many valid brackets picked each team in each game.
+
+The pick_distribution table holds one (pool, game, team, count, pct) row per team that
+any valid bracket advanced through a game. It is rebuilt from the pick table when
+Pool.pick_distribution_dirty is set (every bracket save sets it, so before the cutoff
+it tracks edits, and after the cutoff it is built once) and updated in place by admin
+bracket edits through apply_pick_distribution_delta().
+
+Pool insights (champion distribution, consensus bracket, popular upsets) and the
+"% of the pool picked this" overlay on brackets read a PickDistribution snapshot derived
+from the table, cached per scores version, so warm views cost no extra queries.
+"""
+from collections import Counter, namedtuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.utils.bracket_archive import get_bracket_archive
+from app.utils.bracket_store import count_pool_picks
+from app.utils.cache import GenerationCache
+from app.utils.teams import get_team_views_by_id
+
+CHAMPIONSHIP_GAME_ID = 63
+UPSET_LIST_SIZE = 10
+
+DistributionEntry = namedtuple('DistributionEntry', ['team_id', 'count', 'pct'])
+
+_distribution_cache = GenerationCache('scores', 'teams', name='pick_distribution', shared=True)
+
+
+def _valid_user_count(pool_id):
+    from app.models import User
+    return User.query.filter_by(pool_id=pool_id, is_bracket_valid=True).count()
+
+
+def _update_pcts(pool_id, total_users):
+    from app.models import PickDistribution
+    PickDistribution.query.filter_by(pool_id=pool_id).update(
+        {'pct': (PickDistribution.count * 100.0 / total_users) if total_users else 0.0},
+        synchronize_session=False,
+    )
+
+
+def rebuild_pick_distribution(pool_id, commit=True):
+    """Recount the pool's valid brackets into pick_distribution and clear the dirty flag."""
+    from app.models import PickDistribution, Pool
+    PickDistribution.query.filter_by(pool_id=pool_id).delete(synchronize_session=False)
+    total_users = _valid_user_count(pool_id)
+    archive = get_bracket_archive(pool_id)
+    if archive is not None:
+        # Post-cutoff: count straight from the mapped brackets
+        counter = Counter()
+        for _, bracket in archive.brackets():
+            counter.update((game_id, team_id) for game_id, team_id in enumerate(bracket, 1) if team_id)
+        counts = [(game_id, team_id, count) for (game_id, team_id), count in counter.items()]
+    else:
+        counts = count_pool_picks(pool_id)
+    if counts:
+        db.session.execute(PickDistribution.__table__.insert(), [
+            {
+                'pool_id': pool_id, 'game_id': game_id, 'team_id': team_id, 'count': count,
+                'pct': count * 100.0 / total_users if total_users else 0.0,
+            }
+            for game_id, team_id, count in counts
+        ])
+    pool = Pool.query.get(pool_id)
+    if pool:
+        pool.pick_distribution_dirty = False
+    if commit:
+        db.session.commit()
+
+
+def apply_pick_distribution_delta(pool_id, old_picks, new_picks, was_valid, is_valid):
+    """
+    Apply one bracket's change ({game_id: team_id} before and after, plus validity
+    before and after) to an up-to-date distribution and clear the dirty flag that
+    set_is_bracket_valid raised. Doesn't commit.
+    """
+    from app.models import PickDistribution, Pool
+    delta = Counter()
+    if was_valid:
+        delta.subtract(old_picks.items())
+    if is_valid:
+        delta.update(new_picks.items())
+    delta = {key: change for key, change in delta.items() if change}
+
+    if delta:
+        game_ids = {game_id for game_id, _ in delta}
+        existing = {
+            (row.game_id, row.team_id): row
+            for row in PickDistribution.query.filter(
+                PickDistribution.pool_id == pool_id, PickDistribution.game_id.in_(game_ids)
+            )
+        }
+        for (game_id, team_id), change in delta.items():
+            row = existing.get((game_id, team_id))
+            if row is None:
+                if change > 0:
+                    db.session.add(PickDistribution(pool_id=pool_id, game_id=game_id, team_id=team_id, count=change, pct=0.0))
+            elif row.count + change > 0:
+                row.count += change
+            else:
+                db.session.delete(row)
+        db.session.flush()
+    if was_valid != is_valid or delta:
+        _update_pcts(pool_id, _valid_user_count(pool_id))
+
+    pool = Pool.query.get(pool_id)
+    if pool:
+        pool.pick_distribution_dirty = False
+
+
+class PickDistributionSnapshot:
+    """Per-game pick counts plus the pool insights derived from them. Treat as read-only."""
+
+    def __init__(self, total_users, by_game, round1_opponents):
+        self.total_users = total_users
+        self.by_game = by_game  # {game_id: (DistributionEntry, ...)} most picked first
+        self.pcts = {
+            (game_id, entry.team_id): entry.pct
+            for game_id, entries in by_game.items() for entry in entries
+        }
+        teams = get_team_views_by_id()
+
+        self.champion_picks = tuple(
+            (teams[entry.team_id].get_display_name(), teams[entry.team_id].seed, entry.count)
+            for entry in by_game.get(CHAMPIONSHIP_GAME_ID, ())
+            if entry.team_id in teams
+        )
+        self.consensus = {game_id: entries[0] for game_id, entries in by_game.items() if entries}
+
+        upsets = []
+        for game_id, seeds in round1_opponents.items():
+            for entry in by_game.get(game_id, ()):
+                team = teams.get(entry.team_id)
+                if team is None or team.seed not in seeds:
+                    continue
+                opponent_seed = seeds[1] if team.seed == seeds[0] else seeds[0]
+                if team.seed > opponent_seed:
+                    upsets.append({
+                        'team': team.get_display_name(),
+                        'seed': team.seed,
+                        'opponent_seed': opponent_seed,
+                        'count': entry.count,
+                    })
+        upsets.sort(key=lambda x: x['count'], reverse=True)
+        self.popular_upsets = tuple(upsets[:UPSET_LIST_SIZE])
+
+
+def _rebuild_if_dirty(pool_id):
+    """
+    Rebuild the table if the pool is dirty. Concurrent first views (right after the
+    cutoff) queue on the pool row, and the later ones find it already rebuilt.
+    """
+    from app.models import Pool
+    pool = db.session.get(Pool, pool_id)
+    if pool is not None and not pool.pick_distribution_dirty:
+        return
+    if pool is not None:
+        # Clearing the flag locks the pool row (on SQLite, the database) until the rebuild
+        # commits; a view that waited re-checks the flag and finds nothing to claim
+        claimed = db.session.execute(
+            update(Pool).where(Pool.id == pool_id, Pool.pick_distribution_dirty.is_(True))
+            .values(pick_distribution_dirty=False)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.commit()
+            return
+    try:
+        rebuild_pick_distribution(pool_id)
+    except IntegrityError:
+        # A concurrent rebuild got in first anyway; its rows stand
+        db.session.rollback()
+
+
+def _build_snapshot(pool_id):
+    from app.models import Game, PickDistribution
+    _rebuild_if_dirty(pool_id)
+
+    by_game = {}
+    rows = db.session.query(
+        PickDistribution.game_id, PickDistribution.team_id, PickDistribution.count, PickDistribution.pct
+    ).filter(PickDistribution.pool_id == pool_id).order_by(
+        PickDistribution.game_id, PickDistribution.count.desc(), PickDistribution.team_id
+    ).all()
+    for game_id, team_id, count, pct in rows:
+        by_game.setdefault(game_id, []).append(DistributionEntry(team_id, count, pct))
+
+    teams = get_team_views_by_id()
+    round1_opponents = {}
+    for game_id, team1_id, team2_id in db.session.query(Game.id, Game.team1_id, Game.team2_id).filter(Game.round_id == 1):
+        if team1_id in teams and team2_id in teams:
+            round1_opponents[game_id] = (teams[team1_id].seed, teams[team2_id].seed)
+
+    return PickDistributionSnapshot(
+        _valid_user_count(pool_id),
+        {game_id: tuple(entries) for game_id, entries in by_game.items()},
+        round1_opponents,
+    )
+
+
+def get_pick_distribution(pool_id):
+    """PickDistributionSnapshot for the pool, rebuilding the table first if it's dirty."""
+    return _distribution_cache.get(pool_id, lambda: _build_snapshot(pool_id), pool_id=pool_id)
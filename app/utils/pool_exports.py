@@ -0,0 +1,100 @@
+"""
+Admin data exports: teams, efficiency ratings, every pick, standings and odds.
+
+Each export is a field list plus a generator of rows for exports.export_response(), so
+nothing is built before the first byte goes out. Picks (one row per user x game) and
+game odds come through server-side cursors, a batch at a time; team and round names
+come from the process caches and standings from the cached snapshot. Memory stays at
+one fetch batch however many million pick rows the pool has.
+"""
+from sqlalchemy import select
+
+from app import db
+from app.utils.bracket_store import iter_pool_picks
+from app.utils.standings import get_standings_snapshot
+from app.utils.teams import get_team_views, team_display_name
+
+EXPORT_BATCH_SIZE = 1000
+
+# admin_import_teams_csv and admin_import_efficiency read these columns back
+TEAM_FIELDS = ['region_name', 'seed', 'name', 'espn_team_id', 'is_play_in_slot', 'espn_play_in_team_2_id']
+EFFICIENCY_FIELDS = ['team_id', 'region', 'seed', 'team_name', 'off_efficiency', 'def_efficiency']
+PICK_FIELDS = ['user_id', 'user_name', 'bracket_valid', 'game_id', 'round_id', 'team_id', 'team_name']
+STANDINGS_FIELDS = [
+    'rank', 'user_id', 'full_name', 'currentscore', 'maxpossiblescore', 'expected_score',
+    'r1score', 'r2score', 'r3score', 'r4score', 'r5score', 'r6score', 'champion',
+]
+ODDS_FIELDS = ['game_id', 'round_id', 'team_id', 'team_name', 'probability']
+
+
+def team_rows():
+    """Teams by region and seed, in the import format."""
+    for team in sorted(get_team_views(), key=lambda team: (team.region_id, team.seed)):
+        yield [
+            team.region_name,
+            team.seed,
+            team.name,
+            team.espn_team_id or '',
+            '1' if team.is_play_in_slot else '0',
+            team.espn_play_in_team_2_id or '',
+        ]
+
+
+def efficiency_rows():
+    """Teams by (O - D) descending, then seed; teams without both ratings last."""
+    teams = sorted(get_team_views(), key=lambda team: (
+        -(team.off_efficiency - team.def_efficiency)
+        if team.off_efficiency is not None and team.def_efficiency is not None else float('inf'),
+        team.seed,
+    ))
+    for team in teams:
+        yield [
+            team.id,
+            team.region_name,
+            team.seed,
+            team.get_display_name(),
+            team.off_efficiency or '',
+            team.def_efficiency or '',
+        ]
+
+
+def _round_ids():
+    from app.models import Game
+    return dict(db.session.execute(select(Game.id, Game.round_id)).all())
+
+
+def pick_rows(pool_id):
+    """Every pick of every bracket in the pool (valid or not), by user then game."""
+    from app.models import User
+    users = {
+        user_id: (full_name, is_bracket_valid)
+        for user_id, full_name, is_bracket_valid in db.session.execute(
+            select(User.id, User.full_name, User.is_bracket_valid).where(User.pool_id == pool_id)
+        )
+    }
+    round_ids = _round_ids()
+    for user_id, game_id, team_id in iter_pool_picks(pool_id, valid_only=False, batch_size=EXPORT_BATCH_SIZE):
+        full_name, is_bracket_valid = users.get(user_id, (None, None))
+        yield [user_id, full_name, is_bracket_valid, game_id, round_ids.get(game_id), team_id, team_display_name(team_id)]
+
+
+def standings_rows(pool_id, valid_only):
+    """Standings by current score, with competition ranks, round scores and expected score."""
+    snapshot = get_standings_snapshot(pool_id, valid_only)
+    ranks = snapshot.ranks['currentscore', 'desc']
+    for index in snapshot.orders['currentscore', 'desc']:
+        row = snapshot.rows[index]
+        yield [
+            ranks[index], row.id, row.full_name, row.currentscore, row.maxpossiblescore, row.expected_score,
+            row.r1score, row.r2score, row.r3score, row.r4score, row.r5score, row.r6score, row.champion_team_name,
+        ]
+
+
+def odds_rows():
+    """Simulated probability of each team winning each game, by game then likelihood."""
+    from app.models import Game, GameProbability
+    query = select(GameProbability.game_id, Game.round_id, GameProbability.team_id, GameProbability.probability).join(
+        Game, GameProbability.game_id == Game.id
+    ).order_by(GameProbability.game_id, GameProbability.probability.desc(), GameProbability.team_id)
+    for game_id, round_id, team_id, probability in db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+        yield [game_id, round_id, team_id, team_display_name(team_id), probability]
@@ -0,0 +1,135 @@
+"""
+Pool routing: which pool a request belongs to.
+
+One process can serve every pool in the database. POOL_ROUTING picks how a request
+names its pool:
+- env (default): every request is POOL_ID's, as when each pool ran its own process
+- subdomain: <slug>.POOL_DOMAIN, e.g. smiths.madness.example.com
+- path: /p/<slug>/..., e.g. madness.example.com/p/smiths/standings
+
+A slug is the pool's slug column or, for pools without one, its numeric id.
+PoolRoutingMiddleware reads the slug off the WSGI environ; for path routing it also
+moves the prefix into SCRIPT_NAME so the views see their usual paths and url_for()
+keeps generating links inside the pool. bind_request_pool() then resolves the slug
+(one cached lookup) into g.pool_id, and current_pool_id() returns it. Outside a
+request (CLI commands, scripts) current_pool_id() falls back to POOL_ID.
+
+Tournament-wide state (games, teams, rounds, results, probabilities, the ESPN sync)
+has no pool and is cached once per process; per-pool caches key on the pool id and
+use pool-scoped generations (see app/utils/cache.py).
+"""
+import os
+import re
+
+from flask import abort, g, has_app_context, has_request_context, request
+from flask.sessions import SecureCookieSessionInterface
+
+from app import db
+from app.utils.cache import GenerationCache
+
+SLUG_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]{0,49}$')
+POOL_SLUG_ENVIRON_KEY = 'madness.pool_slug'
+
+_pool_slugs_cache = GenerationCache('pools', name='pool_slugs', shared=True)
+
+
+def default_pool_id():
+    """POOL_ID from the environment, or None if unset."""
+    pool_id = os.environ.get('POOL_ID')
+    if not pool_id:
+        return None
+    try:
+        return int(pool_id)
+    except ValueError:
+        raise ValueError(f"POOL_ID must be an integer, got: {pool_id}")
+
+
+def current_pool_id():
+    """The pool of the current request, else POOL_ID."""
+    if has_app_context():
+        pool_id = g.get('pool_id')
+        if pool_id is not None:
+            return pool_id
+    return default_pool_id()
+
+
+def all_pool_ids():
+    """Ids of every pool in the database."""
+    from app.models import Pool
+    return [pool_id for (pool_id,) in db.session.query(Pool.id).order_by(Pool.id)]
+
+
+def _build_pool_slugs():
+    from app.models import Pool
+    slugs = {}
+    for pool_id, slug in db.session.query(Pool.id, Pool.slug):
+        slugs[str(pool_id)] = pool_id
+        if slug:
+            slugs[slug] = pool_id
+    return slugs
+
+
+def resolve_pool_slug(slug):
+    """Pool id for a slug or numeric id, or None."""
+    return _pool_slugs_cache.get('slugs', _build_pool_slugs).get(slug.lower())
+
+
+class PoolRoutingMiddleware:
+    """WSGI middleware that extracts the pool slug from the host or path prefix."""
+
+    def __init__(self, wsgi_app, routing, domain=None):
+        self.wsgi_app = wsgi_app
+        self.routing = routing
+        self.domain = (domain or '').lower().strip('.')
+
+    def __call__(self, environ, start_response):
+        if self.routing == 'path':
+            path = environ.get('PATH_INFO', '')
+            parts = path.split('/', 3)  # ['', 'p', slug, rest]
+            if len(parts) >= 3 and parts[1] == 'p' and parts[2]:
+                environ[POOL_SLUG_ENVIRON_KEY] = parts[2]
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '').rstrip('/') + f'/p/{parts[2]}'
+                environ['PATH_INFO'] = '/' + (parts[3] if len(parts) > 3 else '')
+        elif self.routing == 'subdomain' and self.domain:
+            host = environ.get('HTTP_HOST', '').split(':', 1)[0].lower()
+            if host.endswith('.' + self.domain):
+                environ[POOL_SLUG_ENVIRON_KEY] = host[:-len(self.domain) - 1]
+        return self.wsgi_app(environ, start_response)
+
+
+def bind_request_pool():
+    """before_request hook: resolve the request's pool into g.pool_id (404 for unknown slugs)."""
+    slug = request.environ.get(POOL_SLUG_ENVIRON_KEY)
+    if slug is None:
+        # No pool in the URL: POOL_ID's pool, if one is configured
+        g.pool_id = default_pool_id()
+        return
+    pool_id = resolve_pool_slug(slug)
+    if pool_id is None:
+        abort(404)
+    g.pool_id = pool_id
+
+
+class PoolSessionInterface(SecureCookieSessionInterface):
+    """Scope the session cookie to the pool's path prefix, so each pool keeps its own login."""
+
+    def get_cookie_path(self, app):
+        if has_request_context() and POOL_SLUG_ENVIRON_KEY in request.environ:
+            return request.script_root
+        return super().get_cookie_path(app)
+
+
+def init_pool_routing(app):
+    """Install the routing middleware, request hook and session scoping for POOL_ROUTING."""
+    routing = app.config.get('POOL_ROUTING', 'env')
+    if routing not in ('env', 'subdomain', 'path'):
+        raise ValueError(f"POOL_ROUTING must be env, subdomain or path, got: {routing}")
+    if routing == 'env' and default_pool_id() is None:
+        raise ValueError("POOL_ID environment variable must be set")
+    if routing == 'subdomain' and not app.config.get('POOL_DOMAIN'):
+        raise ValueError("POOL_DOMAIN must be set for subdomain pool routing")
+    if routing != 'env':
+        app.wsgi_app = PoolRoutingMiddleware(app.wsgi_app, routing, app.config.get('POOL_DOMAIN'))
+    if routing == 'path':
+        app.session_interface = PoolSessionInterface()
+    app.before_request(bind_request_pool)
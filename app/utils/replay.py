@@ -0,0 +1,286 @@
+"""
+Offline replay of a recorded tournament through the ESPN score sync.
+
+A replay directory contains:
+- teams.csv: bracket slots in the Manage Teams export format
+  (region_name, seed, name, espn_team_id, is_play_in_slot, espn_play_in_team_2_id)
+- games.csv: expected final results in the app/static/games.csv format
+  (winning_team_id in the 6th column)
+- *.json: recorded ESPN scoreboard responses, replayed in filename order
+
+Each snapshot is served from a local HTTP stub in place of ESPN_SCOREBOARD_URL and
+sync_espn_results_to_games(force=True) is run against it, exactly as the standings
+page would. The replay resets games and team ESPN ids and creates synthetic users in
+the configured pool, so only run it against a scratch database.
+"""
+import csv
+import glob
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app import espn
+from app.models import Game, LogEntry, Pool, Region, Team, User
+from app.utils import TOURNAMENT_ROUND_DATES
+from app.utils.bracket_store import delete_brackets, insert_brackets
+from app.utils.pools import current_pool_id
+
+REPLAY_EMAIL_DOMAIN = 'replay.invalid'
+
+
+class _SnapshotHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def scoreboard_stub():
+    """Serve scoreboard snapshots from localhost and point app.espn at them.
+    Yields a setter that swaps the payload served on the next fetch."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SnapshotHandler)
+    server.payload = b'{"events": []}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    original_url = espn.ESPN_SCOREBOARD_URL
+    espn.ESPN_SCOREBOARD_URL = f"http://127.0.0.1:{server.server_address[1]}/scoreboard"
+
+    def set_payload(payload):
+        server.payload = payload
+
+    try:
+        yield set_payload
+    finally:
+        espn.ESPN_SCOREBOARD_URL = original_url
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed on the app engine. Yields a one-item list."""
+    counter = [0]
+
+    def _before_cursor_execute(*args, **kwargs):
+        counter[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+@contextmanager
+def time_recompute(routes_module):
+    """Wrap the post-sync recompute steps so their wall time can be reported per sync."""
+    elapsed = [0.0]
+    originals = {
+        name: getattr(routes_module, name)
+        for name in ('do_admin_update_potential_winners', 'recalculate_standings')
+    }
+
+    def _timed(fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed[0] += time.perf_counter() - start
+        return wrapper
+
+    for name, fn in originals.items():
+        setattr(routes_module, name, _timed(fn))
+    try:
+        yield elapsed
+    finally:
+        for name, fn in originals.items():
+            setattr(routes_module, name, fn)
+
+
+@contextmanager
+def open_round_dates():
+    """Accept any event date, for snapshots recorded in a season other than TOURNAMENT_ROUND_DATES."""
+    saved = dict(TOURNAMENT_ROUND_DATES)
+    for round_id in saved:
+        TOURNAMENT_ROUND_DATES[round_id] = (datetime.min, datetime.max)
+    try:
+        yield
+    finally:
+        TOURNAMENT_ROUND_DATES.clear()
+        TOURNAMENT_ROUND_DATES.update(saved)
+
+
+def load_replay_teams(teams_csv_path):
+    """Apply a Manage Teams export to the bracket slots. Returns number of slots updated."""
+    regions_by_name = {r.name: r for r in Region.query.all()}
+    teams_by_slot = {(t.region_id, t.seed): t for t in Team.query.all()}
+    updated = 0
+    with open(teams_csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            region = regions_by_name.get(row['region_name'].strip())
+            team = teams_by_slot.get((region.id, int(row['seed']))) if region else None
+            if not team:
+                continue
+            team.name = row['name'].strip() or team.name
+            team.espn_team_id = int(row['espn_team_id']) if row['espn_team_id'].strip() else None
+            team.is_play_in_slot = row['is_play_in_slot'].strip() == '1'
+            team.espn_play_in_team_2_id = int(row['espn_play_in_team_2_id']) if row['espn_play_in_team_2_id'].strip() else None
+            updated += 1
+    db.session.commit()
+    return updated
+
+
+def _bracket_tree():
+    """Games in play order plus {game_id: [feeder game ids]}."""
+    games = Game.query.order_by(Game.round_id, Game.id).all()
+    feeders = {}
+    for g in games:
+        if g.winner_goes_to_game_id:
+            feeders.setdefault(g.winner_goes_to_game_id, []).append(g.id)
+    return games, feeders
+
+
+def _random_bracket(games, feeders, rng):
+    """{game_id: team_id} advancing a random team through every game."""
+    picks = {}
+    for g in games:
+        if g.id in feeders:
+            candidates = [picks[f] for f in feeders[g.id] if f in picks]
+        else:
+            candidates = [t for t in (g.team1_id, g.team2_id) if t]
+        if candidates:
+            picks[g.id] = rng.choice(candidates)
+    return picks
+
+
+def synthetic_brackets(count, seed=0):
+    """{fake_user_id: [(game_id, team_id), ...]} of random valid brackets, without touching the database."""
+    games, feeders = _bracket_tree()
+    rng = random.Random(seed)
+    return {user_id: list(_random_bracket(games, feeders, rng).items()) for user_id in range(1, count + 1)}
+
+
+def create_synthetic_pool(pool_id, user_count, seed=0):
+    """Replace previous replay users in the pool with user_count random valid brackets."""
+    pool = Pool.query.get(pool_id)
+    if not pool:
+        pool = Pool(id=pool_id, name='Replay Pool')
+        db.session.add(pool)
+
+    old_ids = [u.id for u in User.query.filter(User.email.like(f'%@{REPLAY_EMAIL_DOMAIN}')).all()]
+    if old_ids:
+        LogEntry.query.filter(LogEntry.current_user_id.in_(old_ids)).delete(synchronize_session=False)
+        delete_brackets(old_ids)
+        User.query.filter(User.id.in_(old_ids)).delete(synchronize_session=False)
+
+    # One hash shared by every synthetic user; hashing per user dominates setup time otherwise
+    password_hash = generate_password_hash(os.urandom(8).hex())
+
+    games, feeders = _bracket_tree()
+    rng = random.Random(seed)
+    users = []
+    for i in range(user_count):
+        user = User(
+            email=f'replay-{i}@{REPLAY_EMAIL_DOMAIN}',
+            full_name=f'Replay User {i}',
+            password_hash=password_hash,
+            pool_id=pool_id,
+            is_bracket_valid=True,
+            invalid_game_count=0,
+            is_verified=True,
+        )
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+
+    insert_brackets({user.id: _random_bracket(games, feeders, rng) for user in users})
+    db.session.commit()
+    return len(users)
+
+
+def load_expected_winners(games_csv_path):
+    """Read {game_id: winning_team_id} from a games.csv-format file, skipping undecided rows."""
+    expected = {}
+    with open(games_csv_path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) > 5 and row[5].strip():
+                expected[int(row[0])] = int(row[5])
+    return expected
+
+
+def verify_winners(expected):
+    """Return [(game_id, expected_team_id, actual_team_id)] for every game that doesn't match."""
+    actual = {g.id: g.winning_team_id for g in Game.query.all()}
+    return [
+        (game_id, team_id, actual.get(game_id))
+        for game_id, team_id in sorted(expected.items())
+        if actual.get(game_id) != team_id
+    ]
+
+
+def replay_tournament(replay_dir, user_count=500, ignore_round_dates=False, seed=0):
+    """
+    Drive sync_espn_results_to_games through every snapshot in replay_dir.
+    Returns a dict with per-sync timings, query counts and winner mismatches.
+    """
+    from app import routes
+
+    snapshot_paths = sorted(glob.glob(os.path.join(replay_dir, '*.json')))
+    if not snapshot_paths:
+        raise ValueError(f'No *.json scoreboard snapshots in {replay_dir}')
+
+    routes.reset_game_table()
+    slots = load_replay_teams(os.path.join(replay_dir, 'teams.csv'))
+    users = create_synthetic_pool(current_pool_id(), user_count, seed=seed)
+    routes.clear_teams_cache()
+    routes.clear_potential_winners_cache()
+    routes.do_admin_update_potential_winners()
+    routes.recalculate_standings()
+
+    syncs = []
+    dates = open_round_dates() if ignore_round_dates else nullcontext()
+    with dates, scoreboard_stub() as set_payload, time_recompute(routes) as recompute:
+        for path in snapshot_paths:
+            with open(path, 'rb') as f:
+                set_payload(f.read())
+            decided_before = Game.query.filter(Game.winning_team_id.isnot(None)).count()
+            recompute[0] = 0.0
+            with count_queries() as queries:
+                start = time.perf_counter()
+                routes.sync_espn_results_to_games(force=True)
+                latency = time.perf_counter() - start
+            decided_after = Game.query.filter(Game.winning_team_id.isnot(None)).count()
+            syncs.append({
+                'snapshot': os.path.basename(path),
+                'games_updated': decided_after - decided_before,
+                'latency_ms': latency * 1000,
+                'queries': queries[0],
+                'recompute_ms': recompute[0] * 1000,
+            })
+
+    expected_path = os.path.join(replay_dir, 'games.csv')
+    expected = load_expected_winners(expected_path) if os.path.exists(expected_path) else {}
+    return {
+        'slots': slots,
+        'users': users,
+        'syncs': syncs,
+        'expected': len(expected),
+        'mismatches': verify_winners(expected),
+    }
+
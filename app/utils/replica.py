@@ -0,0 +1,126 @@
+"""
+Optional read replica for read-heavy pages.
+
+With REPLICA_DATABASE_URL set, the replica is registered as the 'replica' bind and
+db.session becomes a RoutingSession. Views decorated with @replica_reads send their
+SELECTs to the replica; everything else, every write and every read after a write in
+the same request go to the primary.
+
+Lag protection, checked once per replica-routed request:
+- Read-your-writes: a request that commits writes stamps the browser session, and
+  that browser reads from the primary for REPLICA_STICKY_SECONDS afterwards, so a
+  user who just saved picks sees them.
+- Staleness: the cache generation counters are always read from the primary. If any
+  counter on the replica is behind, the replica hasn't replayed a change this page
+  depends on yet, and the request reads from the primary.
+
+Any second database with the same schema can stand in for the replica locally, e.g.
+a copy of the SQLite file; `flask replica-status` shows whether it is current.
+"""
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_KEY = 'replica'
+PRIMARY_UNTIL_SESSION_KEY = '_primary_until'
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs of @replica_reads views to the replica bind; anything else goes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if isinstance(clause, Select):
+                if _replica_active():
+                    return self._db.engines[REPLICA_BIND_KEY]
+            elif isinstance(clause, UpdateBase):
+                _note_write()  # Bulk UPDATE/INSERT/DELETE outside a flush
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_active():
+    return has_request_context() and g.get('_replica_reads', False) and not g.get('_primary_pinned', False)
+
+
+def pin_primary():
+    """Send the rest of this request's reads to the primary (e.g. before a read-modify-write)."""
+    if has_request_context():
+        g._primary_pinned = True
+
+
+def replica_engine():
+    from app import db
+    return db.engines.get(REPLICA_BIND_KEY)
+
+
+def replica_lag(engine=None):
+    """{generation: primary - replica} for counters the replica is behind on; empty if current."""
+    from app import db
+    from app.models import CacheGeneration
+    from app.utils.cache import get_generations
+    engine = engine or replica_engine()
+    query = select(CacheGeneration.name, CacheGeneration.value)
+    with engine.connect() as conn:
+        replica = dict(conn.execute(query).all())
+    primary = get_generations() if has_request_context() else dict(db.session.execute(query).all())
+    return {
+        name: value - replica.get(name, 0)
+        for name, value in primary.items()
+        if replica.get(name, 0) < value
+    }
+
+
+def _replica_usable():
+    if replica_engine() is None:
+        return False
+    if session.get(PRIMARY_UNTIL_SESSION_KEY, 0) > time.time():
+        return False  # This browser wrote recently
+    try:
+        return not replica_lag()
+    except Exception:
+        current_app.logger.exception('Replica unavailable; reading from the primary')
+        return False
+
+
+def replica_reads(f):
+    """
+    Serve the view's reads from the replica when it is current. GET/HEAD only.
+    Place innermost (below login_required/pool_required/state_etag), so the login lookup
+    and 304s don't pay for the lag check.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            g._replica_reads = _replica_usable()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _note_write():
+    # Reads after a write must see it: stay on the primary for the rest of the request
+    if has_request_context():
+        g._primary_pinned = True
+        g._wrote_primary = True
+
+
+def _pin_on_flush(session, flush_context, instances):
+    _note_write()
+
+
+def _remember_write(response):
+    if g.get('_wrote_primary'):
+        session[PRIMARY_UNTIL_SESSION_KEY] = int(time.time()) + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+def init_replica(app, db):
+    """Wire the routing session's write tracking when a replica is configured."""
+    if not app.config.get('SQLALCHEMY_BINDS', {}).get(REPLICA_BIND_KEY):
+        return
+    event.listen(RoutingSession, 'before_flush', _pin_on_flush)
+    app.after_request(_remember_write)
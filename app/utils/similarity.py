@@ -0,0 +1,207 @@
+"""
+Bracket similarity: points-weighted agreement between every pair of brackets.
+
+Two brackets agree on a game when they advance the same team; their similarity is the
+sum of the round points of the games they agree on, and their distance (a
+points-weighted Hamming distance) is the pool's total points minus that.
+
+SimilarityIndex packs the pick matrix SWAR-style into Python big ints: for every
+(game, team) there is one integer with a byte-wide lane per valid bracket, 1 where that
+bracket picked the team. A user's similarity to the whole pool is then
+
+    sum(points[game] * lanes[game, their pick] for each game they picked)
+
+63 big-int multiply-adds that run in C over all lanes at once; the lanes never carry
+into each other because no similarity exceeds the total points. to_bytes() turns the
+result into one byte (two if the scoring allows more than 255 points) per user. A row
+costs under a millisecond at 10k users, the full condensed matrix (50M pairs, one
+byte each) around six seconds, and the index itself about 400 lane integers.
+
+On top of rows: most_similar() ("who is most like me"), condensed_matrix() for
+all pairs, and clusters(), a k-medoids grouping whose medoid updates use per-cluster
+pick counts instead of pairwise rows.
+
+Indexes and clusters are cached per 'picks' generation (plus 'rounds' for the points),
+so after the cutoff, when the archive is frozen, they are built once.
+"""
+import heapq
+import sys
+from array import array
+from collections import Counter, namedtuple
+
+from app import db
+from app.utils.bracket_archive import GAME_COUNT, load_pool_picks
+from app.utils.cache import GenerationCache
+
+MAX_COMPARE_BRACKETS = 8
+DEFAULT_CLUSTER_COUNT = 5
+CLUSTER_ITERATIONS = 10
+
+BracketCluster = namedtuple('BracketCluster', ['medoid_id', 'member_ids', 'mean_similarity'])
+
+_index_cache = GenerationCache('picks', 'rounds', name='similarity_index', shared=True)
+_cluster_cache = GenerationCache('picks', 'rounds', name='bracket_clusters', shared=True)
+
+
+def load_game_points():
+    """{game_id: round points} for every game."""
+    from app.models import Game, Round
+    return dict(db.session.query(Game.id, Round.points).join(Round, Game.round_id == Round.id).all())
+
+
+class SimilarityIndex:
+    """Lane-packed pick matrix over a fixed set of brackets. Treat as read-only."""
+
+    def __init__(self, picks_by_user, game_points):
+        self.user_ids = array('I', sorted(picks_by_user))
+        self.index_by_id = {user_id: index for index, user_id in enumerate(self.user_ids)}
+        self.game_points = dict(game_points)
+        self.total_points = sum(self.game_points.values())
+        self.lane_bytes = max(1, (self.total_points.bit_length() + 7) // 8)
+        if self.lane_bytes > 2:
+            raise ValueError(f'{self.total_points} total points is too many for the similarity lanes')
+
+        # Same layout as the bracket archive: team id per game, 0 = no pick
+        brackets = array('H', bytes(2 * GAME_COUNT * len(self.user_ids)))
+        size = len(self.user_ids) * self.lane_bytes
+        lanes = {}
+        for index, user_id in enumerate(self.user_ids):
+            for game_id, team_id in picks_by_user[user_id]:
+                brackets[index * GAME_COUNT + game_id - 1] = team_id
+                if game_id not in self.game_points:
+                    continue
+                lane = lanes.get((game_id, team_id))
+                if lane is None:
+                    lane = lanes[game_id, team_id] = bytearray(size)
+                lane[index * self.lane_bytes] = 1
+        self._brackets = brackets
+        self._lanes = {key: int.from_bytes(lane, 'little') for key, lane in lanes.items()}
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return user_id in self.index_by_id
+
+    def picks(self, user_id):
+        """{game_id: team_id} for an indexed user."""
+        start = self.index_by_id[user_id] * GAME_COUNT
+        return {
+            game_id: team_id
+            for game_id, team_id in enumerate(self._brackets[start:start + GAME_COUNT], 1) if team_id
+        }
+
+    def row_for_picks(self, picks):
+        """Similarity of a {game_id: team_id} bracket to every indexed bracket, in user_ids order."""
+        total = 0
+        for game_id, team_id in picks.items():
+            lane = self._lanes.get((game_id, team_id))
+            if lane is not None:
+                total += self.game_points[game_id] * lane
+        raw = total.to_bytes(len(self.user_ids) * self.lane_bytes, 'little')
+        if self.lane_bytes == 1:
+            return raw
+        row = array('H')
+        row.frombytes(raw)
+        if sys.byteorder != 'little':
+            row.byteswap()
+        return row
+
+    def row(self, user_id):
+        """Similarity of an indexed user's bracket to every indexed bracket."""
+        return self.row_for_picks(self.picks(user_id))
+
+    def similarity(self, picks_a, picks_b):
+        """Points two {game_id: team_id} brackets agree on."""
+        return sum(
+            points for game_id, points in self.game_points.items()
+            if picks_a.get(game_id) is not None and picks_a.get(game_id) == picks_b.get(game_id)
+        )
+
+    def most_similar(self, picks, limit=10, exclude=()):
+        """[(user_id, similarity)] for the indexed brackets closest to picks, most similar first."""
+        row = self.row_for_picks(picks)
+        exclude = set(exclude)
+        candidates = (
+            (similarity, -self.user_ids[index])
+            for index, similarity in enumerate(row)
+            if self.user_ids[index] not in exclude
+        )
+        return [(-neg_user_id, similarity) for similarity, neg_user_id in heapq.nlargest(limit, candidates)]
+
+    def condensed_matrix(self):
+        """
+        Similarity of every pair i < j, row-major like scipy's condensed form, as
+        one array of lane-width integers (a bytearray when lanes are one byte).
+        """
+        matrix = bytearray() if self.lane_bytes == 1 else array('H')
+        for index, user_id in enumerate(self.user_ids):
+            matrix.extend(self.row(user_id)[index + 1:])
+        return matrix
+
+    def _medoid(self, member_ids):
+        """Member whose bracket agrees with the rest of the cluster on the most points."""
+        brackets = [self.picks(user_id) for user_id in member_ids]
+        counts = Counter()
+        for picks in brackets:
+            counts.update(picks.items())
+        points = self.game_points
+
+        def score(picks):
+            return sum(
+                points[game_id] * counts[game_id, team_id]
+                for game_id, team_id in picks.items() if game_id in points
+            )
+        best = max(range(len(member_ids)), key=lambda i: (score(brackets[i]), -member_ids[i]))
+        return member_ids[best]
+
+    def _assign(self, medoids):
+        """Each medoid's row and the user ids closest to it (ties go to the earlier medoid)."""
+        rows = [self.row(medoid) for medoid in medoids]
+        members = [[] for _ in medoids]
+        for index, user_id in enumerate(self.user_ids):
+            cluster = max(range(len(medoids)), key=lambda k: (rows[k][index], -k))
+            members[cluster].append(user_id)
+        return rows, members
+
+    def clusters(self, count=DEFAULT_CLUSTER_COUNT, iterations=CLUSTER_ITERATIONS):
+        """k-medoids grouping of the indexed brackets. Returns BracketClusters, largest first."""
+        if not self.user_ids:
+            return []
+        count = min(count, len(self.user_ids))
+        # Farthest-first seeding from the pool's most central bracket
+        medoids = [self._medoid(list(self.user_ids))]
+        best = list(self.row(medoids[0]))
+        while len(medoids) < count:
+            index = min(range(len(best)), key=lambda i: (best[i], self.user_ids[i]))
+            if self.user_ids[index] in medoids:
+                break
+            medoids.append(self.user_ids[index])
+            best = [max(a, b) for a, b in zip(best, self.row(medoids[-1]))]
+
+        for _ in range(iterations):
+            _, members = self._assign(medoids)
+            new_medoids = [self._medoid(ids) if ids else medoid for ids, medoid in zip(members, medoids)]
+            if new_medoids == medoids:
+                break
+            medoids = new_medoids
+        rows, members = self._assign(medoids)
+
+        clusters = []
+        for medoid, row, ids in zip(medoids, rows, members):
+            if not ids:
+                continue
+            mean = sum(row[self.index_by_id[user_id]] for user_id in ids) / len(ids)
+            clusters.append(BracketCluster(medoid, tuple(ids), mean))
+        clusters.sort(key=lambda cluster: (-len(cluster.member_ids), cluster.medoid_id))
+        return clusters
+
+
+def get_similarity_index(pool_id):
+    """SimilarityIndex over the pool's valid brackets, cached per picks generation."""
+    return _index_cache.get(pool_id, lambda: SimilarityIndex(load_pool_picks(pool_id), load_game_points()), pool_id=pool_id)
+
+
+def get_bracket_clusters(pool_id, count=DEFAULT_CLUSTER_COUNT):
+    """k-medoids clusters of the pool's valid brackets, cached per picks generation."""
+    return _cluster_cache.get((pool_id, count), lambda: get_similarity_index(pool_id).clusters(count), pool_id=pool_id)
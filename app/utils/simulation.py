@@ -1,7 +1,9 @@
 from collections import defaultdict
 import math
-from app.models import Team, Game, Round, Pick, User, Pool
+from app.models import Team, Game, Round, User, Pool
 from app import db
+from app.utils.bracket_archive import load_pool_picks
+from app.utils.standings import bump_scores_version
 
 def get_win_probability(team_a, team_b, avg_o_rating):
     """
@@ -149,17 +151,17 @@ def calculate_expected_points(pool_id):
     users = User.query.filter_by(pool_id=pool_id).filter(User.is_bracket_valid == True).all()
     user_expected_results = []
 
-    all_picks = Pick.query.join(User).filter(User.pool_id == pool_id).filter(User.is_bracket_valid == True).all()
-    user_picks_by_user = defaultdict(list)
-    for p in all_picks:
-        user_picks_by_user[p.user_id].append(p)
+    user_picks_by_user = load_pool_picks(pool_id)
+    games_by_id = {g.id: g for g in all_games}
+    round_points = {r.id: r.points for r in Round.query.all()}
 
     for user in users:
         expected_score = float(user.currentscore)
-        for pick in user_picks_by_user[user.id]:
-            if pick.game.winning_team_id is None:
-                prob = team_win_game_prob[pick.game_id][pick.team_id]
-                expected_score += prob * pick.game.round.points
+        for game_id, team_id in user_picks_by_user.get(user.id, ()):
+            game = games_by_id.get(game_id)
+            if game is not None and game.winning_team_id is None:
+                prob = team_win_game_prob[game_id][team_id]
+                expected_score += prob * round_points[game.round_id]
         
         user.expected_score = expected_score
         user_expected_results.append({
@@ -170,7 +172,7 @@ def calculate_expected_points(pool_id):
         })
 
     pool.expected_standings_dirty = False
-    db.session.commit()
+    bump_scores_version(pool_id=pool_id)
 
     user_expected_results.sort(key=lambda x: x['expected_score'], reverse=True)
     return {
@@ -270,29 +272,30 @@ def diagnose_zero_expected(pool_id):
                 for t_id, p_win in team_win_game_prob[g.id].items():
                     game_team_probs[g.winner_goes_to_game_id][t_id] += p_win
 
-    all_picks = Pick.query.join(User).filter(User.pool_id == pool_id).filter(User.is_bracket_valid == True).all()
-    user_picks_by_user = defaultdict(list)
-    for p in all_picks:
-        user_picks_by_user[p.user_id].append(p)
+    user_picks_by_user = load_pool_picks(pool_id)
+    games_by_id = {g.id: g for g in all_games}
 
     zero_users = User.query.filter_by(pool_id=pool_id).filter(User.is_bracket_valid == True, User.expected_score == 0).all()
     results = []
     for user in zero_users:
-        picks = user_picks_by_user[user.id]
-        unplayed = [p for p in picks if p.game.winning_team_id is None]
+        picks = list(user_picks_by_user.get(user.id, ()))
+        unplayed = [
+            (game_id, team_id) for game_id, team_id in picks
+            if game_id in games_by_id and games_by_id[game_id].winning_team_id is None
+        ]
         sample_picks = []
-        for pick in unplayed[:10]:
-            prob = team_win_game_prob[pick.game_id][pick.team_id]
-            team = teams.get(pick.team_id)
+        for game_id, team_id in unplayed[:10]:
+            prob = team_win_game_prob[game_id][team_id]
+            team = teams.get(team_id)
             team_name = team.get_display_name() if team else '?'
             sample_picks.append({
-                'game_id': pick.game_id,
-                'team_id': pick.team_id,
+                'game_id': game_id,
+                'team_id': team_id,
                 'team_name': team_name,
                 'prob': prob,
-                'points': pick.game.round.points,
-                'game_exists': pick.game_id in game_ids,
-                'team_in_prob_map': pick.team_id in team_win_game_prob[pick.game_id],
+                'points': games_by_id[game_id].round.points,
+                'game_exists': game_id in game_ids,
+                'team_in_prob_map': team_id in team_win_game_prob[game_id],
             })
         results.append({
             'user_id': user.id,
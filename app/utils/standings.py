@@ -0,0 +1,225 @@
+"""
+Immutable standings snapshot, rebuilt once per scores version.
+
+The standings page is the most-hit page during games. Instead of loading every user,
+resolving champion names and sorting per request, a snapshot holds the pool's rows
+with sort orders and competition ranks precomputed for every sortable field in both
+directions, plus the champion filter choices and the sorted score list used for the
+viewer's own rank. A request only filters and slices it.
+
+page() and around() serve the JSON API with keyset pagination over (sort key, user id):
+a cursor names the last row seen rather than an offset, so paging stays consistent
+when a new snapshot reorders the pool between requests.
+
+The snapshot is tied to the 'scores' generation (bumped by recalculate_standings,
+set_is_bracket_valid and the expected-score calculation) together with 'users' and
+'teams', and lives in the shared cache backend.
+"""
+import base64
+import json
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from app import db
+from app.utils.cache import GenerationCache, bump_generation
+from app.utils.teams import team_display_name
+
+SCORE_FIELDS = ('currentscore', 'expected_score', 'maxpossiblescore') + tuple(f'r{i}score' for i in range(1, 7))
+SORT_FIELDS = ('full_name', 'champion_team_name') + SCORE_FIELDS
+
+StandingsRow = namedtuple('StandingsRow', (
+    'id', 'full_name', 'currentscore', 'expected_score', 'maxpossiblescore',
+    'r1score', 'r2score', 'r3score', 'r4score', 'r5score', 'r6score',
+    'champion_team_name',
+))
+
+_standings_cache = GenerationCache('scores', 'users', 'teams', name='standings', shared=True)
+
+
+def bump_scores_version(commit=True, pool_id=None):
+    """Invalidate the pool's standings snapshots in every process (default: the request's pool)."""
+    bump_generation('scores', commit=commit, pool_id=pool_id)
+
+
+class StandingsSnapshot:
+    """Rows plus per-(field, order) row orders and ranks. Treat as read-only."""
+
+    def __init__(self, rows, champion_names, pool_scores):
+        self.rows = rows
+        self.champion_names = champion_names
+        self.pool_scores = pool_scores  # currentscore of every pool user, ascending
+        self._names_lower = tuple(row.full_name.lower() for row in rows)
+        self.index_by_id = {row.id: index for index, row in enumerate(rows)}
+        self.orders = {}
+        self.positions = {}
+        self.ranks = {}
+        for field in SORT_FIELDS:
+            keys = [getattr(row, field) for row in rows]
+            for order in ('asc', 'desc'):
+                # Stable sort from id order, matching the old list.sort(reverse=...):
+                # ties are always broken by ascending user id
+                indexes = sorted(range(len(rows)), key=keys.__getitem__, reverse=(order == 'desc'))
+                self.orders[field, order] = array('i', indexes)
+                positions = array('i', bytes(4 * len(rows)))
+                for position, index in enumerate(indexes):
+                    positions[index] = position
+                self.positions[field, order] = positions
+                if field == 'champion_team_name':
+                    continue
+                ranks = array('i', bytes(4 * len(rows)))
+                last_key = None
+                current_rank = 0
+                for position, index in enumerate(indexes):
+                    if keys[index] != last_key:
+                        current_rank = position + 1
+                        last_key = keys[index]
+                    ranks[index] = current_rank
+                self.ranks[field, order] = ranks
+
+    def view(self, sort_field, sort_order, champion_filter='Any', name_filter=''):
+        """Return [(row, rank)] in display order. Ranks are pool-wide, not re-ranked by filters."""
+        if sort_field not in SORT_FIELDS:
+            sort_field = 'currentscore'
+        if sort_order not in ('asc', 'desc'):
+            sort_order = 'desc'
+        ranks = self.ranks.get((sort_field, sort_order))
+        needle = name_filter.lower() if name_filter else None
+        result = []
+        for index in self.orders[sort_field, sort_order]:
+            row = self.rows[index]
+            if champion_filter != 'Any' and row.champion_team_name != champion_filter:
+                continue
+            if needle and needle not in self._names_lower[index]:
+                continue
+            result.append((row, ranks[index] if ranks is not None else ''))
+        return result
+
+    def _seek(self, sort_field, sort_order, cursor):
+        """Position of the first row sorting strictly after cursor (sort key, user id)."""
+        key, user_id = cursor
+        index = self.index_by_id.get(user_id)
+        if index is not None and getattr(self.rows[index], sort_field) == key:
+            return self.positions[sort_field, sort_order][index] + 1
+        # Cursor row moved or left since the cursor was issued: scan for the boundary
+        order = self.orders[sort_field, sort_order]
+        for position, index in enumerate(order):
+            row = self.rows[index]
+            row_key = getattr(row, sort_field)
+            if row_key == key:
+                if row.id > user_id:
+                    return position
+            elif (row_key > key) == (sort_order == 'asc'):
+                return position
+        return len(order)
+
+    def page(self, sort_field, sort_order, after=None, before=None, limit=100, champion_filter='Any', name_filter=''):
+        """
+        Keyset page in display order. after/before are (sort key, user id) cursors.
+        Returns (entries, has_more) where entries are (position, row, rank); position is
+        the row's index in the unfiltered order and has_more says whether rows remain
+        beyond the page in the direction travelled.
+        """
+        if sort_field not in SORT_FIELDS:
+            sort_field = 'currentscore'
+        if sort_order not in ('asc', 'desc'):
+            sort_order = 'desc'
+        order = self.orders[sort_field, sort_order]
+        ranks = self.ranks.get((sort_field, sort_order))
+        needle = name_filter.lower() if name_filter else None
+
+        if before is not None:
+            start = self._seek(sort_field, sort_order, before)
+            if self.index_by_id.get(before[1]) is not None and start > 0 and self.rows[order[start - 1]].id == before[1]:
+                start -= 1  # Exclude the cursor row itself
+            positions = range(start - 1, -1, -1)
+        else:
+            positions = range(self._seek(sort_field, sort_order, after) if after is not None else 0, len(order))
+
+        entries = []
+        has_more = False
+        for position in positions:
+            index = order[position]
+            row = self.rows[index]
+            if champion_filter != 'Any' and row.champion_team_name != champion_filter:
+                continue
+            if needle and needle not in self._names_lower[index]:
+                continue
+            if len(entries) == limit:
+                has_more = True
+                break
+            entries.append((position, row, ranks[index] if ranks is not None else ''))
+        if before is not None:
+            entries.reverse()
+        return entries, has_more
+
+    def around(self, user_id, sort_field, sort_order, radius=10):
+        """Unfiltered (position, row, rank) entries within radius of the user, or [] if not ranked."""
+        index = self.index_by_id.get(user_id)
+        if index is None:
+            return []
+        order = self.orders[sort_field, sort_order]
+        ranks = self.ranks.get((sort_field, sort_order))
+        center = self.positions[sort_field, sort_order][index]
+        return [
+            (position, self.rows[order[position]], ranks[order[position]] if ranks is not None else '')
+            for position in range(max(0, center - radius), min(len(order), center + radius + 1))
+        ]
+
+    def count(self, champion_filter='Any', name_filter=''):
+        """Number of rows matching the filters."""
+        if champion_filter == 'Any' and not name_filter:
+            return len(self.rows)
+        needle = name_filter.lower() if name_filter else None
+        return sum(
+            1 for index, row in enumerate(self.rows)
+            if (champion_filter == 'Any' or row.champion_team_name == champion_filter)
+            and (not needle or needle in self._names_lower[index])
+        )
+
+    def rank_for_score(self, score):
+        """1 + number of pool users with a strictly higher current score."""
+        return len(self.pool_scores) - bisect_right(self.pool_scores, score) + 1
+
+
+def encode_cursor(key, user_id):
+    """Opaque keyset cursor for a (sort key, user id) pair."""
+    return base64.urlsafe_b64encode(json.dumps([key, user_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on malformed input."""
+    try:
+        key, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(user_id, int):
+        raise ValueError('Invalid cursor')
+    return key, user_id
+
+
+def _build_snapshot(pool_id, valid_only):
+    from app.models import User
+    from app.utils.bracket_store import read_champion_picks
+
+    users = db.session.query(
+        User.id, User.full_name, User.currentscore, User.expected_score, User.maxpossiblescore,
+        User.r1score, User.r2score, User.r3score, User.r4score, User.r5score, User.r6score,
+        User.is_bracket_valid,
+    ).filter(User.pool_id == pool_id).order_by(User.id).all()
+
+    champion_picks = {user_id: team_display_name(team_id) for user_id, team_id in read_champion_picks(pool_id).items()}
+
+    rows = tuple(
+        StandingsRow(*user[:11], champion_picks.get(user.id) or '?')
+        for user in users
+        if user.is_bracket_valid or not valid_only
+    )
+    champion_names = tuple(sorted({name for name in champion_picks.values() if name}))
+    pool_scores = array('i', sorted(user.currentscore for user in users))
+    return StandingsSnapshot(rows, champion_names, pool_scores)
+
+
+def get_standings_snapshot(pool_id, valid_only):
+    """Snapshot for the pool; valid_only restricts rows to valid brackets (after the cutoff)."""
+    return _standings_cache.get((pool_id, bool(valid_only)), lambda: _build_snapshot(pool_id, valid_only), pool_id=pool_id)
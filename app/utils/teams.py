@@ -0,0 +1,130 @@
+"""
+Process-wide team snapshot: display names and read-only TeamView records.
+
+Team.get_display_name() used to run up to two EspnTeam queries per call, and every
+bracket page re-hydrated 64 Team + Region ORM objects. Both are now built from a
+couple of column queries and kept until the teams version is bumped. TeamView holds
+no ORM state, so it can be shared across requests and threads without
+DetachedInstanceError.
+
+Call bump_teams_version() (or routes.clear_teams_cache()) after changing team slots,
+ESPN ids, EspnTeam rows, region names or efficiency ratings. The version is the
+shared 'teams' generation, so a bump from one worker or a CLI command reaches all.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.utils.cache import GenerationCache, bump_generation
+
+TeamNames = namedtuple('TeamNames', ['short', 'full'])
+
+_teams_cache = GenerationCache('teams', shared=True)
+
+
+class TeamView:
+    """Immutable snapshot of a bracket slot. Duck-types the parts of Team used by templates."""
+    __slots__ = (
+        'id', 'seed', 'name', 'region_id', 'region_name', 'short_name', 'full_name',
+        'off_efficiency', 'def_efficiency', 'espn_team_id', 'espn_play_in_team_2_id',
+        'is_play_in_slot',
+    )
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            object.__setattr__(self, slot, fields[slot])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TeamView is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError('TeamView is read-only')
+
+    def __reduce__(self):
+        # Default slot pickling goes through __setattr__; rebuild via __init__ instead
+        return (_make_team_view, (tuple(getattr(self, slot) for slot in self.__slots__),))
+
+    def get_display_name(self, short=True):
+        return self.short_name if short else self.full_name
+
+    def __repr__(self):
+        return f'<TeamView {self.id} {self.short_name}>'
+
+
+def _make_team_view(values):
+    return TeamView(**dict(zip(TeamView.__slots__, values)))
+
+
+def bump_teams_version(commit=True):
+    """Invalidate the team snapshot in every process; the next lookup rebuilds it."""
+    bump_generation('teams', commit=commit)
+
+
+def _build_team_names():
+    from app.models import Team, EspnTeam
+    et1 = aliased(EspnTeam)
+    et2 = aliased(EspnTeam)
+    rows = db.session.query(
+        Team.id, Team.name,
+        et1.short_display_name, et1.display_name,
+        et2.short_display_name, et2.display_name,
+        Team.espn_play_in_team_2_id,
+    ).outerjoin(et1, et1.espn_id == Team.espn_team_id).outerjoin(
+        et2, et2.espn_id == Team.espn_play_in_team_2_id
+    ).all()
+
+    names = {}
+    for team_id, name, short1, full1, short2, full2, play_in_2_id in rows:
+        if play_in_2_id and short1 is not None and short2 is not None:
+            names[team_id] = TeamNames(f"{short1} / {short2}", f"{full1} / {full2}")
+        elif short1 is not None:
+            names[team_id] = TeamNames(short1, full1)
+        else:
+            names[team_id] = TeamNames(name, name)
+    return names
+
+
+def _build_team_views():
+    from app.models import Team, Region
+    names = get_team_names()
+    rows = db.session.query(
+        Team.id, Team.seed, Team.name, Team.region_id, Region.name,
+        Team.off_efficiency, Team.def_efficiency,
+        Team.espn_team_id, Team.espn_play_in_team_2_id, Team.is_play_in_slot,
+    ).join(Region, Team.region_id == Region.id).order_by(Team.id).all()
+
+    views = []
+    for row in rows:
+        team_names = names.get(row[0]) or TeamNames(row[2], row[2])
+        views.append(TeamView(
+            id=row[0], seed=row[1], name=row[2], region_id=row[3], region_name=row[4],
+            short_name=team_names.short, full_name=team_names.full,
+            off_efficiency=row[5], def_efficiency=row[6],
+            espn_team_id=row[7], espn_play_in_team_2_id=row[8], is_play_in_slot=row[9],
+        ))
+    return tuple(views)
+
+
+def get_team_names():
+    """Return {team_id: TeamNames(short, full)}."""
+    return _teams_cache.get('names', _build_team_names)
+
+
+def get_team_views():
+    """Return a tuple of TeamView ordered by team id."""
+    return _teams_cache.get('views', _build_team_views)
+
+
+def get_team_views_by_id():
+    """Return {team_id: TeamView}."""
+    return MappingProxyType(_teams_cache.get('views_by_id', lambda: {team.id: team for team in get_team_views()}))
+
+
+def team_display_name(team_id, short=True):
+    """Display name for a team id, or None if the team doesn't exist."""
+    names = get_team_names().get(team_id)
+    if names is None:
+        return None
+    return names.short if short else names.full
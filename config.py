@@ -3,8 +3,39 @@ import os
 DATABASE_URL = os.environ.get('DATABASE_URL').replace("postgres://", "postgresql://", 1)
 SQLALCHEMY_DATABASE_URI = DATABASE_URL
 
+# Optional read replica for @replica_reads views; browsers read from the primary for
+# REPLICA_STICKY_SECONDS after they write
+REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL', '').replace("postgres://", "postgresql://", 1)
+SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '30'))
+
 SECRET_KEY = os.environ.get('SECRET_KEY')
 
 # Jinja2 whitespace control - prevents unwanted line breaks in rendered HTML
 JINJA2_TRIM_BLOCKS = True
-JINJA2_LSTRIP_BLOCKS = True
\ No newline at end of file
+JINJA2_LSTRIP_BLOCKS = True
+
+# Cache storage for shared hot objects: 'memory' (per worker) or 'shared' (mmap files in CACHE_DIR)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_DIR = os.environ.get('CACHE_DIR')
+
+# Rendered bracket grids kept per worker after the cutoff; PRERENDER_BRACKETS re-renders them after each result
+BRACKET_GRID_CACHE_SIZE = int(os.environ.get('BRACKET_GRID_CACHE_SIZE', '500'))
+PRERENDER_BRACKETS = os.environ.get('PRERENDER_BRACKETS', '').lower() in ('1', 'true', 'yes')
+
+# How requests name their pool: 'env' (POOL_ID only), 'subdomain' (<slug>.POOL_DOMAIN) or 'path' (/p/<slug>/...)
+POOL_ROUTING = os.environ.get('POOL_ROUTING', 'env')
+POOL_DOMAIN = os.environ.get('POOL_DOMAIN')
+
+# Where live brackets are stored: 'rows' (pick table), 'dual' (write both while backfilling) or 'packed' (packed_bracket)
+BRACKET_STORAGE = os.environ.get('BRACKET_STORAGE', 'rows')
+
+# Audit log entries are queued after commit and batch-inserted by a background thread, every
+# AUDIT_LOG_BATCH_SIZE entries or AUDIT_LOG_FLUSH_MS; AUDIT_LOG_ASYNC=false writes them in the request
+AUDIT_LOG_ASYNC = os.environ.get('AUDIT_LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '100'))
+AUDIT_LOG_FLUSH_MS = int(os.environ.get('AUDIT_LOG_FLUSH_MS', '500'))
+AUDIT_LOG_MAX_QUEUE = int(os.environ.get('AUDIT_LOG_MAX_QUEUE', '10000'))
+
+# Months of log entries kept in log_entry, the current one included; `flask archive-logs` archives older months
+LOG_RETENTION_MONTHS = int(os.environ.get('LOG_RETENTION_MONTHS', '6'))
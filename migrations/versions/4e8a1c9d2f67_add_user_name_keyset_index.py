@@ -0,0 +1,25 @@
+"""Add user (pool_id, lower(full_name), id) index
+
+Revision ID: 4e8a1c9d2f67
+Revises: 9c4d7e21b8a5
+Create Date: 2026-10-19 15:02:44.610382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a1c9d2f67'
+down_revision = '9c4d7e21b8a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_pool_id_lower_full_name_id', 'user',
+                    ['pool_id', sa.text('lower(full_name)'), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_pool_id_lower_full_name_id', table_name='user')
@@ -0,0 +1,33 @@
+"""Add CacheGeneration table
+
+Revision ID: 6b1e2f9a4c30
+Revises: 3798a3d2f671
+Create Date: 2026-10-19 10:12:31.482210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e2f9a4c30'
+down_revision = '3798a3d2f671'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = op.create_table('cache_generation',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed known counters so concurrent first bumps never race on INSERT
+    op.bulk_insert(cache_generation, [
+        {'name': name, 'value': 0}
+        for name in ('pool', 'users', 'teams', 'rounds', 'regions', 'results', 'winners')
+    ])
+
+
+def downgrade():
+    op.drop_table('cache_generation')
@@ -0,0 +1,28 @@
+"""Add picks cache generation
+
+Revision ID: 7d2c5a9e1f48
+Revises: a3f5b8e2c914
+Create Date: 2026-10-19 17:22:48.093611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2c5a9e1f48'
+down_revision = 'a3f5b8e2c914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = sa.table('cache_generation',
+    sa.column('name', sa.String(length=50)),
+    sa.column('value', sa.Integer())
+    )
+    op.bulk_insert(cache_generation, [{'name': 'picks', 'value': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_generation WHERE name = 'picks'")
@@ -0,0 +1,28 @@
+"""Add scores cache generation
+
+Revision ID: 9c4d7e21b8a5
+Revises: 6b1e2f9a4c30
+Create Date: 2026-10-19 13:41:07.215934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d7e21b8a5'
+down_revision = '6b1e2f9a4c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = sa.table('cache_generation',
+    sa.column('name', sa.String(length=50)),
+    sa.column('value', sa.Integer())
+    )
+    op.bulk_insert(cache_generation, [{'name': 'scores', 'value': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_generation WHERE name = 'scores'")
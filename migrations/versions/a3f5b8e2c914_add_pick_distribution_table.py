@@ -0,0 +1,41 @@
+"""Add PickDistribution table
+
+Revision ID: a3f5b8e2c914
+Revises: 4e8a1c9d2f67
+Create Date: 2026-10-19 16:27:53.118604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f5b8e2c914'
+down_revision = '4e8a1c9d2f67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pick_distribution',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('pool_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('pct', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['game.id'], ),
+    sa.ForeignKeyConstraint(['pool_id'], ['pool.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['team.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('pool_id', 'game_id', 'team_id', name='uq_pick_distribution_pool_game_team')
+    )
+    with op.batch_alter_table('pool', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pick_distribution_dirty', sa.Boolean(), nullable=False, server_default=sa.text('true')))
+
+
+def downgrade():
+    with op.batch_alter_table('pool', schema=None) as batch_op:
+        batch_op.drop_column('pick_distribution_dirty')
+
+    op.drop_table('pick_distribution')
@@ -0,0 +1,46 @@
+"""Add log category table and log_categories cache generation
+
+Revision ID: a7c3e5f9b214
+Revises: f3b8d2a7c910
+Create Date: 2026-10-21 15:36:12.904118
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f9b214'
+down_revision = 'f3b8d2a7c910'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    log_category = op.create_table('log_category',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute('INSERT INTO log_category (name) SELECT DISTINCT category FROM log_entry')
+    if not op.get_context().as_sql:
+        # Categories that now only appear in archived months
+        bind = op.get_bind()
+        known = set(bind.execute(sa.text('SELECT name FROM log_category')).scalars())
+        archived = set()
+        for names in bind.execute(sa.text('SELECT categories FROM log_archive')).scalars():
+            archived.update(json.loads(names))
+        if archived - known:
+            op.bulk_insert(log_category, [{'name': name} for name in sorted(archived - known)])
+
+    cache_generation = sa.table('cache_generation',
+    sa.column('name', sa.String(length=50)),
+    sa.column('value', sa.Integer())
+    )
+    op.bulk_insert(cache_generation, [{'name': 'log_categories', 'value': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_generation WHERE name = 'log_categories'")
+    op.drop_table('log_category')
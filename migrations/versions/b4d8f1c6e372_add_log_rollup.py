@@ -0,0 +1,31 @@
+"""Add per-minute log rollup for analytics
+
+Revision ID: b4d8f1c6e372
+Revises: a7c3e5f9b214
+Create Date: 2026-10-22 09:12:40.517263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d8f1c6e372'
+down_revision = 'a7c3e5f9b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by `flask rebuild-log-rollup` (the sketches are built in Python)
+    op.create_table('log_rollup',
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('minute', sa.DateTime(), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=False),
+    sa.Column('user_sketch', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('category', 'minute')
+    )
+
+
+def downgrade():
+    op.drop_table('log_rollup')
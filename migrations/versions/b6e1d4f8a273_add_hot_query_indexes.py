@@ -0,0 +1,45 @@
+"""Add indexes for hot queries
+
+Revision ID: b6e1d4f8a273
+Revises: 7d2c5a9e1f48
+Create Date: 2026-10-19 19:05:31.448207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1d4f8a273'
+down_revision = '7d2c5a9e1f48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the newest row of any duplicated (user, game) pick so the unique index can build
+    op.execute(
+        "DELETE FROM pick WHERE id NOT IN "
+        "(SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM pick GROUP BY user_id, game_id) AS newest)"
+    )
+    op.create_index('uq_pick_user_id_game_id', 'pick', ['user_id', 'game_id'], unique=True)
+    op.create_index('ix_pick_game_id_team_id', 'pick', ['game_id', 'team_id'], unique=False)
+    op.create_index('ix_user_pool_id_is_bracket_valid', 'user', ['pool_id', 'is_bracket_valid'], unique=False)
+    op.create_index('ix_user_pool_id_lower_email', 'user', ['pool_id', sa.text('lower(email)')], unique=False)
+    op.create_index('ix_user_reset_code', 'user', ['reset_code'], unique=False)
+    op.create_index('ix_log_entry_timestamp', 'log_entry', ['timestamp'], unique=False)
+    op.create_index('ix_log_entry_category_timestamp', 'log_entry', ['category', 'timestamp'], unique=False)
+    op.create_index('ix_post_thread_id_created_at', 'post', ['thread_id', 'created_at'], unique=False)
+    op.create_index('ix_game_winner_goes_to_game_id', 'game', ['winner_goes_to_game_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_game_winner_goes_to_game_id', table_name='game')
+    op.drop_index('ix_post_thread_id_created_at', table_name='post')
+    op.drop_index('ix_log_entry_category_timestamp', table_name='log_entry')
+    op.drop_index('ix_log_entry_timestamp', table_name='log_entry')
+    op.drop_index('ix_user_reset_code', table_name='user')
+    op.drop_index('ix_user_pool_id_lower_email', table_name='user')
+    op.drop_index('ix_user_pool_id_is_bracket_valid', table_name='user')
+    op.drop_index('ix_pick_game_id_team_id', table_name='pick')
+    op.drop_index('uq_pick_user_id_game_id', table_name='pick')
@@ -0,0 +1,36 @@
+"""Add pool slug and pools cache generation
+
+Revision ID: c4a7e9d2b15f
+Revises: b6e1d4f8a273
+Create Date: 2026-10-19 20:14:07.582913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e9d2b15f'
+down_revision = 'b6e1d4f8a273'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pool', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slug', sa.String(length=50), nullable=True))
+        batch_op.create_unique_constraint('uq_pool_slug', ['slug'])
+
+    cache_generation = sa.table('cache_generation',
+    sa.column('name', sa.String(length=50)),
+    sa.column('value', sa.Integer())
+    )
+    op.bulk_insert(cache_generation, [{'name': 'pools', 'value': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_generation WHERE name = 'pools'")
+
+    with op.batch_alter_table('pool', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_pool_slug', type_='unique')
+        batch_op.drop_column('slug')
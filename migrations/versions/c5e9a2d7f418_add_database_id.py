@@ -0,0 +1,31 @@
+"""Add database_id row naming this database for host-shared cache files
+
+Revision ID: c5e9a2d7f418
+Revises: b4d8f1c6e372
+Create Date: 2026-10-23 11:04:27.381542
+
+"""
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9a2d7f418'
+down_revision = 'b4d8f1c6e372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = sa.table('cache_generation',
+    sa.column('name', sa.String(length=50)),
+    sa.column('value', sa.Integer())
+    )
+    # Random, never bumped: see app.utils.cache.database_identity
+    op.bulk_insert(cache_generation, [{'name': 'database_id', 'value': secrets.randbelow(2 ** 31 - 1) + 1}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_generation WHERE name = 'database_id'")
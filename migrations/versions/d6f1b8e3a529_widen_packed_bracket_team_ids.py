@@ -0,0 +1,93 @@
+"""Widen packed bracket team ids to two bytes
+
+Revision ID: d6f1b8e3a529
+Revises: c5e9a2d7f418
+Create Date: 2026-10-24 10:21:53.160384
+
+"""
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f1b8e3a529'
+down_revision = 'c5e9a2d7f418'
+branch_labels = None
+depends_on = None
+
+WIDE_VIEW = """
+    CREATE VIEW bracket_pick AS
+    SELECT packed_bracket.user_id, games.game_id,
+           get_byte(packed_bracket.picks, 2 * games.game_id - 2) + 256 * get_byte(packed_bracket.picks, 2 * games.game_id - 1) AS team_id
+    FROM packed_bracket CROSS JOIN generate_series(1, 63) AS games(game_id)
+    WHERE get_byte(packed_bracket.picks, 2 * games.game_id - 2) + 256 * get_byte(packed_bracket.picks, 2 * games.game_id - 1) <> 0
+    UNION ALL
+    SELECT pick.user_id, pick.game_id, pick.team_id
+    FROM pick
+    WHERE NOT EXISTS (SELECT 1 FROM packed_bracket WHERE packed_bracket.user_id = pick.user_id)
+"""
+NARROW_VIEW = """
+    CREATE VIEW bracket_pick AS
+    SELECT packed_bracket.user_id, games.game_id, get_byte(packed_bracket.picks, games.game_id - 1) AS team_id
+    FROM packed_bracket CROSS JOIN generate_series(1, 63) AS games(game_id)
+    WHERE get_byte(packed_bracket.picks, games.game_id - 1) <> 0
+"""
+
+
+def _repack(from_length, convert):
+    bind = op.get_bind()
+    rows = bind.execute(sa.text('SELECT user_id, picks FROM packed_bracket')).all()
+    updates = [
+        {'user_id': user_id, 'picks': convert(bytes(picks))}
+        for user_id, picks in rows if len(picks) == from_length
+    ]
+    if updates:
+        bind.execute(sa.text('UPDATE packed_bracket SET picks = :picks WHERE user_id = :user_id'), updates)
+
+
+def upgrade():
+    # The column is BYTEA / BLOB whatever its length, so only the stored bytes change
+    if op.get_bind().dialect.name == 'postgresql':
+        # Each byte b becomes b, 0: a little-endian uint16
+        op.execute("""
+            UPDATE packed_bracket SET picks = (
+                SELECT string_agg(set_byte('\\x0000'::bytea, 0, get_byte(packed_bracket.picks, games.game_id - 1)), ''::bytea ORDER BY games.game_id)
+                FROM generate_series(1, 63) AS games(game_id)
+            )
+            WHERE length(picks) = 63
+        """)
+        # Brackets the packed format can't hold stay in the pick table, so the view reads those too
+        op.execute('DROP VIEW bracket_pick')
+        op.execute(WIDE_VIEW)
+    elif not op.get_context().as_sql:
+        _repack(63, lambda picks: struct.pack('<63H', *picks))
+
+
+def downgrade():
+    # A team id above 255 has no one-byte form: refuse rather than lose the bracket
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM packed_bracket CROSS JOIN generate_series(1, 63) AS games(game_id)
+                    WHERE length(packed_bracket.picks) = 126 AND get_byte(packed_bracket.picks, 2 * games.game_id - 1) <> 0
+                ) THEN
+                    RAISE EXCEPTION 'packed_bracket holds team ids above 255';
+                END IF;
+            END
+            $$
+        """)
+        op.execute("""
+            UPDATE packed_bracket SET picks = (
+                SELECT string_agg(substring(packed_bracket.picks FROM 2 * games.game_id - 1 FOR 1), ''::bytea ORDER BY games.game_id)
+                FROM generate_series(1, 63) AS games(game_id)
+            )
+            WHERE length(picks) = 126
+        """)
+        op.execute('DROP VIEW bracket_pick')
+        op.execute(NARROW_VIEW)
+    elif not op.get_context().as_sql:
+        _repack(126, lambda picks: bytes(struct.unpack('<63H', picks)))
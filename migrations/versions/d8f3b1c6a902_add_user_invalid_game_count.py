@@ -0,0 +1,27 @@
+"""Add user invalid game count
+
+Revision ID: d8f3b1c6a902
+Revises: c4a7e9d2b15f
+Create Date: 2026-10-19 22:41:53.106284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f3b1c6a902'
+down_revision = 'c4a7e9d2b15f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Left NULL: each bracket's count is filled in by its next save
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('invalid_game_count', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('invalid_game_count')
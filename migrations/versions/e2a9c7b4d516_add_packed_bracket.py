@@ -0,0 +1,40 @@
+"""Add packed bracket table
+
+Revision ID: e2a9c7b4d516
+Revises: d8f3b1c6a902
+Create Date: 2026-10-20 09:12:38.441907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c7b4d516'
+down_revision = 'd8f3b1c6a902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('packed_bracket',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('picks', sa.LargeBinary(length=63), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Packed brackets as pick rows, for ad-hoc SQL once BRACKET_STORAGE=packed
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            CREATE VIEW bracket_pick AS
+            SELECT packed_bracket.user_id, games.game_id, get_byte(packed_bracket.picks, games.game_id - 1) AS team_id
+            FROM packed_bracket CROSS JOIN generate_series(1, 63) AS games(game_id)
+            WHERE get_byte(packed_bracket.picks, games.game_id - 1) <> 0
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP VIEW bracket_pick')
+    op.drop_table('packed_bracket')
@@ -0,0 +1,86 @@
+"""Partition log entries by month and add the log archive
+
+Revision ID: f3b8d2a7c910
+Revises: e2a9c7b4d516
+Create Date: 2026-10-21 10:04:51.227310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2a7c910'
+down_revision = 'e2a9c7b4d516'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('log_archive',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.Column('categories', sa.Text(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+    # PostgreSQL: rebuild log_entry as a table partitioned by month on timestamp. Every
+    # existing row lands in the default partition; `flask archive-logs` moves the months
+    # it keeps into their own partitions and archives the rest.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE log_entry RENAME TO log_entry_old')
+        op.execute('ALTER TABLE log_entry_old RENAME CONSTRAINT log_entry_pkey TO log_entry_old_pkey')
+        op.execute('DROP INDEX ix_log_entry_timestamp')
+        op.execute('DROP INDEX ix_log_entry_category_timestamp')
+        # Keep the id sequence when the old table goes
+        op.execute('ALTER SEQUENCE log_entry_id_seq OWNED BY NONE')
+        op.execute("""
+            CREATE TABLE log_entry (
+                id INTEGER NOT NULL DEFAULT nextval('log_entry_id_seq'),
+                timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                category VARCHAR(100) NOT NULL,
+                current_user_id INTEGER REFERENCES "user" (id),
+                description TEXT NOT NULL,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """)
+        op.execute('ALTER SEQUENCE log_entry_id_seq OWNED BY log_entry.id')
+        op.execute('CREATE TABLE log_entry_default PARTITION OF log_entry DEFAULT')
+        op.create_index('ix_log_entry_timestamp', 'log_entry', ['timestamp'], unique=False)
+        op.create_index('ix_log_entry_category_timestamp', 'log_entry', ['category', 'timestamp'], unique=False)
+        op.execute("""
+            INSERT INTO log_entry (id, timestamp, category, current_user_id, description)
+            SELECT id, timestamp, category, current_user_id, description FROM log_entry_old
+        """)
+        op.execute('DROP TABLE log_entry_old')
+
+
+def downgrade():
+    # Archived entries are not restored: load them back from log_archive first if needed
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE log_entry RENAME TO log_entry_partitioned')
+        op.execute('ALTER TABLE log_entry_partitioned RENAME CONSTRAINT log_entry_pkey TO log_entry_partitioned_pkey')
+        op.execute('DROP INDEX ix_log_entry_timestamp')
+        op.execute('DROP INDEX ix_log_entry_category_timestamp')
+        op.execute('ALTER SEQUENCE log_entry_id_seq OWNED BY NONE')
+        op.execute("""
+            CREATE TABLE log_entry (
+                id INTEGER NOT NULL DEFAULT nextval('log_entry_id_seq'),
+                timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                category VARCHAR(100) NOT NULL,
+                current_user_id INTEGER REFERENCES "user" (id),
+                description TEXT NOT NULL,
+                CONSTRAINT log_entry_pkey PRIMARY KEY (id)
+            )
+        """)
+        op.execute('ALTER SEQUENCE log_entry_id_seq OWNED BY log_entry.id')
+        op.execute("""
+            INSERT INTO log_entry (id, timestamp, category, current_user_id, description)
+            SELECT id, timestamp, category, current_user_id, description FROM log_entry_partitioned
+        """)
+        op.execute('DROP TABLE log_entry_partitioned')
+        op.create_index('ix_log_entry_timestamp', 'log_entry', ['timestamp'], unique=False)
+        op.create_index('ix_log_entry_category_timestamp', 'log_entry', ['category', 'timestamp'], unique=False)
+    op.drop_table('log_archive')